@@ -1,37 +1,130 @@
+from contextlib import asynccontextmanager
+from tempfile import SpooledTemporaryFile
 from http import HTTPStatus
+from typing import AsyncIterator, IO, List, Tuple
 
 from starlette.applications import Starlette
+from starlette.middleware import Middleware
 from starlette.requests import Request
-from starlette.responses import Response
-from starlette.routing import Route
+from starlette.responses import Response, StreamingResponse
+from starlette.routing import Mount, Route
+from starlette.types import ASGIApp, Receive, Scope, Send
 
-from apischema.encoder import encode_to_json_response, encode_error_to_json_response
+from apischema.conditional import is_not_modified, make_representation
+from apischema.encoder import (
+    encode_to_json_response,
+    encode_error_to_json_response,
+    encode_errors_to_json_response,
+    encode_bulk_update_to_json_response,
+    encode_identifiers_to_json_response,
+    encode_page_to_json_response,
+    encode_search_page_to_json_response,
+    encode_import_result_to_ndjson,
+    encode_import_summary_to_ndjson,
+)
+from apischema.export import EXPORT_CHUNK_SIZE, encode_export, export_formats
+from apischema.ndjson import iter_ndjson
+from apischema.pagination import DEFAULT_PAGE_SIZE, decode_cursor
+from apischema.schema import (
+    todo_entries_bulk_updating_schema,
+    todo_entry_creation_schema,
+    todo_entry_listing_schema,
+    todo_entry_updating_schema,
+)
 from apischema.validator import (
+    SchemaError,
     validate_todo_entry_creation,
+    validate_todo_entry_import,
+    validate_todo_entry_listing,
+    validate_todo_entry_search,
+    validate_todo_entries_bulk_creation,
     validate_todo_entry_updating,
+    validate_todo_entries_bulk_updating,
     validate_todo_label,
 )
 from entities import TodoEntry
-from persistence.database import session_maker
-from persistence.mapper.sqlite import (
-    SqliteTodoEntryMapper,
-    SqliteTodoLabelMapper,
-)
-from persistence.repository import (
-    TodoEntryRepository,
-    TodoLabelRepository,
-)
-from value_objects import TodoLabel
+from metrics import CONTENT_TYPE, MetricsMiddleware, registry
+from persistence.database import StorageSettings
+from persistence.errors import InvalidTenantError
+from persistence.repository import TodoEntryRepository
+from persistence.storage import Storage
+from persistence.tenants import TenantRegistry
+from profiling import ProfilingMiddleware, ProfilingSettings
+from value_objects import TodoEntryFilter, TodoLabel
 
 from usecases import (
     get_todo_entry, 
+    list_todo_entries,
+    search_todo_entries,
+    export_todo_entries,
     create_todo_entry, 
+    create_todo_entries,
     update_todo_entry,
+    update_todo_entries,
     create_todo_label,
     UseCaseError, 
     NotFoundError,
+    InvalidReferenceError,
 )
 
+TENANT_HEADER = "X-Tenant-ID"
+
+# Scope key of the tenant storages leased by a request
+TENANT_LEASES = "tenant_leases"
+
+
+async def _get_storage(request: Request) -> Storage:
+    """
+    Storage of the request: the tenant's one, taken from `/tenants/{tenant}/`
+    path prefix or `X-Tenant-ID` header, when tenants are configured. It
+    is leased until `TenantLeaseMiddleware` releases it.
+    """
+    tenants = request.app.state.tenants
+    if tenants is None:
+        return request.app.state.storage
+
+    tenant = request.path_params.get("tenant") or request.headers.get(TENANT_HEADER)
+    storage = await tenants.acquire(tenant)
+    request.scope[TENANT_LEASES].append(storage)
+    return storage
+
+
+class TenantLeaseMiddleware:
+    """
+    Releases the tenant storages leased by `_get_storage` once the response
+    is sent, streamed bodies included, so that an evicted storage isn't
+    disposed under the request.
+    """
+    _app: ASGIApp
+
+    def __init__(self, app: ASGIApp) -> None:
+        self._app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        leases = scope[TENANT_LEASES] = []
+        try:
+            await self._app(scope, receive, send)
+        finally:
+            for storage in leases:
+                await scope["app"].state.tenants.release(storage)
+
+
+async def invalid_tenant(request: Request, error: InvalidTenantError) -> Response:
+    return Response(
+        content=encode_error_to_json_response(error=SchemaError(
+            type="Tenant error",
+            message=str(error),
+            validation_schema={},
+            path="",
+        )),
+        status_code=HTTPStatus.BAD_REQUEST,
+        media_type="application/json",
+    )
+
 
 async def get_todo(request: Request) -> Response:
     """
@@ -47,19 +140,40 @@ async def get_todo(request: Request) -> Response:
     responses:
         "200":
             description: Object was found.
+            headers:
+                ETag:
+                    schema:
+                        type: string
+                Last-Modified:
+                    schema:
+                        type: string
             examples:
-                {"id": 1, "summary": "Lorem Ipsum", "detail": null, "created_at": "2022-09-27T17:29:06.183775+00:00"}
+                {"id": 1, "summary": "Lorem Ipsum", "detail": null, "created_at": "2022-09-27T17:29:06.183775+00:00", "updated_at": null, "label": null}
+        "304":
+            description: Object was not modified since `If-None-Match` or `If-Modified-Since`.
         "404":
             description: Object was not found
     """
     try:
         identifier = request.path_params["id"]  # TODO: add validation
 
-        mapper = SqliteTodoEntryMapper(storage=session_maker)
-        repository = TodoEntryRepository(mapper=mapper)
+        storage = await _get_storage(request)
+        response_cache = storage.todo_entry_response_cache
 
-        entity = await get_todo_entry(identifier=identifier, repository=repository)
-        content = encode_to_json_response(data=entity)
+        representation = None if response_cache is None else response_cache.get(identifier)
+        if representation is None:
+            generation = None if response_cache is None else response_cache.generation
+            entity = await get_todo_entry(
+                identifier=identifier,
+                repository=storage.todo_entry_repository,
+            )
+            representation = make_representation(
+                content=encode_to_json_response(data=entity),
+                last_modified=entity.updated_at or entity.created_at,
+            )
+
+            if response_cache is not None:
+                response_cache.set(identifier, representation, generation=generation)
 
     except NotFoundError:
         return Response(
@@ -68,7 +182,198 @@ async def get_todo(request: Request) -> Response:
             media_type="application/json",
         )
 
-    return Response(content=content, media_type="application/json")
+    if is_not_modified(headers=request.headers, representation=representation):
+        return Response(
+            status_code=HTTPStatus.NOT_MODIFIED,
+            headers=representation.headers,
+        )
+
+    return Response(
+        content=representation.content,
+        headers=representation.headers,
+        media_type="application/json",
+    )
+
+
+async def list_todos(request: Request) -> Response:
+    """
+    summary: Lists TodoEntries ordered by creation time
+    parameters:
+        - name: label_id
+          in: query
+          schema:
+            type: integer
+        - name: created_after
+          in: query
+          description: Inclusive lower bound of created_at
+          schema:
+            type: string
+            format: date-time
+        - name: created_before
+          in: query
+          description: Exclusive upper bound of created_at
+          schema:
+            type: string
+            format: date-time
+        - name: limit
+          in: query
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 100
+            default: 20
+        - name: cursor
+          in: query
+          description: `next_cursor` of the previous page
+          schema:
+            type: string
+    responses:
+        "200":
+            description: Page of TodoEntries, `next_cursor` is null on the last page.
+            examples:
+                {"items": [{"id": 1, "summary": "Lorem Ipsum", "detail": null, "created_at": "2022-09-27T17:29:06.183775", "updated_at": null, "label": null}], "next_cursor": null}
+        "422":
+            description: Validation error.
+    """
+    data = dict(request.query_params)
+    error = validate_todo_entry_listing(raw_data=data)
+    if error is None:
+        try:
+            filters = TodoEntryFilter(
+                label_id=data.get("label_id"),
+                created_after=data.get("created_after"),
+                created_before=data.get("created_before"),
+            )
+            after = decode_cursor(data["cursor"]) if "cursor" in data else None
+        except ValueError as err:
+            error = SchemaError(
+                type="Validation error",
+                message=str(err),
+                validation_schema=todo_entry_listing_schema,
+                path="",
+            )
+
+    if error:
+        return Response(
+            content=encode_error_to_json_response(error=error),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    repository = (await _get_storage(request)).todo_entry_repository
+    page = await list_todo_entries(
+        filters=filters,
+        after=after,
+        limit=int(data.get("limit", DEFAULT_PAGE_SIZE)),
+        repository=repository,
+    )
+
+    return Response(
+        content=encode_page_to_json_response(page=page),
+        media_type="application/json",
+    )
+
+
+async def search_todos(request: Request) -> Response:
+    """
+    summary: Finds TodoEntries containing every word of the query in summary or detail
+    parameters:
+        - name: q
+          in: query
+          required: true
+          schema:
+            type: string
+            minLength: 1
+            maxLength: 256
+        - name: limit
+          in: query
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 100
+            default: 20
+        - name: offset
+          in: query
+          description: `next_offset` of the previous page
+          schema:
+            type: integer
+            minimum: 0
+            maximum: 9999
+            default: 0
+    responses:
+        "200":
+            description: Page of TodoEntries, best match first, `next_offset` is null on the last page.
+            examples:
+                {"items": [{"id": 1, "summary": "Lorem Ipsum", "detail": null, "created_at": "2022-09-27T17:29:06.183775", "updated_at": null, "label": null}], "next_offset": null}
+        "422":
+            description: Validation error.
+    """
+    data = dict(request.query_params)
+    error = validate_todo_entry_search(raw_data=data)
+    if error:
+        return Response(
+            content=encode_error_to_json_response(error=error),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    repository = (await _get_storage(request)).todo_entry_repository
+    page = await search_todo_entries(
+        query=data["q"],
+        offset=int(data.get("offset", 0)),
+        limit=int(data.get("limit", DEFAULT_PAGE_SIZE)),
+        repository=repository,
+    )
+
+    return Response(
+        content=encode_search_page_to_json_response(page=page),
+        media_type="application/json",
+    )
+
+
+async def export_todos(request: Request) -> Response:
+    """
+    summary: Streams all TodoEntries with their labels
+    parameters:
+        - name: format
+          in: query
+          schema:
+            type: string
+            enum: [ndjson, csv]
+            default: ndjson
+    responses:
+        "200":
+            description: One row per TodoEntry, in id order.
+        "422":
+            description: Unknown format.
+    """
+    name = request.query_params.get("format", "ndjson")
+    export_format = export_formats.get(name)
+    if export_format is None:
+        return Response(
+            content=encode_error_to_json_response(
+                error=SchemaError(
+                    type="Validation error",
+                    message=f"Unknown export format `{name}`.",
+                    validation_schema={"type": "string", "enum": sorted(export_formats)},
+                    path="format",
+                ),
+            ),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    repository = (await _get_storage(request)).todo_entry_repository
+    chunks = export_todo_entries(
+        chunk_size=EXPORT_CHUNK_SIZE,
+        repository=repository,
+    )
+
+    return StreamingResponse(
+        content=encode_export(chunks=chunks, export_format=export_format),
+        media_type=export_format.media_type,
+        headers={"Content-Disposition": f'attachment; filename="todo_entries.{name}"'},
+    )
 
 
 async def create_new_todo_entry(request: Request) -> Response:
@@ -93,8 +398,7 @@ async def create_new_todo_entry(request: Request) -> Response:
             media_type="application/json",
         )
 
-    mapper = SqliteTodoEntryMapper(storage=session_maker)
-    repository = TodoEntryRepository(mapper=mapper)
+    repository = (await _get_storage(request)).todo_entry_repository
 
     try:
         entity = TodoEntry(**data)
@@ -112,6 +416,192 @@ async def create_new_todo_entry(request: Request) -> Response:
     )
 
 
+async def create_new_todo_entries(request: Request) -> Response:
+    """
+    summary: Creates many TodoEntries in one transaction
+    responses:
+        "201":
+            description: TodoEntries were created.
+            examples:
+                {"ids": [1, 2, 3]}
+        "422":
+            description: Validation errors of every invalid item, path starts with the item index.
+        "500":
+            description: Something went wrong, try again later.
+    """
+    data = await request.json()
+    errors = validate_todo_entries_bulk_creation(raw_data=data)
+    if errors:
+        return Response(
+            content=encode_errors_to_json_response(errors=errors),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    # The schema doesn't enforce formats, e.g. of `created_at`
+    entities = []
+    for index, item in enumerate(data):
+        try:
+            entities.append(TodoEntry(**item))
+        except ValueError as error:
+            errors.append(SchemaError(
+                type="Validation error",
+                message=str(error),
+                validation_schema=todo_entry_creation_schema,
+                path=str(index),
+            ))
+    if errors:
+        return Response(
+            content=encode_errors_to_json_response(errors=errors),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    repository = (await _get_storage(request)).todo_entry_repository
+
+    try:
+        identifiers = await create_todo_entries(entities=entities, repository=repository)
+        content = encode_identifiers_to_json_response(identifiers=identifiers)
+    except UseCaseError:
+        return Response(
+            content=None,
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            media_type="application/json",
+        )
+
+    return Response(
+        content=content, status_code=HTTPStatus.CREATED, media_type="application/json"
+    )
+
+
+IMPORT_CHUNK_SIZE = 500
+IMPORT_REPORT_MEMORY_SIZE = 1024 * 1024
+
+
+async def _import_chunk(
+    chunk: List[Tuple[int, TodoEntry]],
+    errors: List[Tuple[int, SchemaError]],
+    repository: TodoEntryRepository,
+    report: IO[bytes],
+) -> int:
+    """
+    Commits `chunk` and writes its results with `errors` of the lines in
+    between, in line order.
+    """
+    try:
+        identifiers = await create_todo_entries(
+            entities=[entity for _, entity in chunk],
+            repository=repository,
+        )
+    except UseCaseError as error:
+        storage_error = SchemaError(
+            type="Storage error",
+            message=str(error),
+            validation_schema={},
+            path="",
+        )
+        results = [
+            (line, encode_import_result_to_ndjson(line=line, error=storage_error))
+            for line, _ in chunk
+        ]
+        imported = 0
+    else:
+        results = [
+            (line, encode_import_result_to_ndjson(line=line, identifier=identifier))
+            for (line, _), identifier in zip(chunk, identifiers)
+        ]
+        imported = len(identifiers)
+
+    results.extend(
+        (line, encode_import_result_to_ndjson(line=line, error=error)) for line, error in errors
+    )
+    for _, result in sorted(results, key=lambda result: result[0]):
+        report.write(result)
+    return imported
+
+
+async def import_new_todo_entries(request: Request) -> Response:
+    """
+    summary: Imports TodoEntries from NDJSON body, one object per line
+    parameters:
+        - name: chunk_size
+          in: query
+          description: Number of valid lines committed in one transaction
+          schema:
+            type: integer
+            minimum: 1
+            maximum: 9999
+            default: 500
+    responses:
+        "200":
+            description: |
+                NDJSON report in line order, per line `{"line": 1, "id": 42}` or
+                `{"line": 2, "error": {...}}`, followed by `{"created": 1, "failed": 1}` summary.
+        "422":
+            description: Validation error of query parameters.
+    """
+    data = dict(request.query_params)
+    error = validate_todo_entry_import(raw_data=data)
+    if error:
+        return Response(
+            content=encode_error_to_json_response(error=error),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    chunk_size = int(data.get("chunk_size", IMPORT_CHUNK_SIZE))
+    repository = (await _get_storage(request)).todo_entry_repository
+
+    # The body is consumed before the response starts, the report is kept
+    # on disk once it outgrows `IMPORT_REPORT_MEMORY_SIZE`.
+    report = SpooledTemporaryFile(max_size=IMPORT_REPORT_MEMORY_SIZE)
+    # Errors of lines after the first one of `chunk` wait for its results
+    chunk: List[Tuple[int, TodoEntry]] = []
+    errors: List[Tuple[int, SchemaError]] = []
+    created = failed = 0
+
+    async for line, item in iter_ndjson(request.stream()):
+        error = item if isinstance(item, SchemaError) else validate_todo_entry_creation(raw_data=item)
+        if error is None:
+            try:
+                chunk.append((line, TodoEntry(**item)))
+            except ValueError as err:
+                error = SchemaError(
+                    type="Validation error",
+                    message=str(err),
+                    validation_schema=todo_entry_creation_schema,
+                    path="",
+                )
+
+        if error is not None:
+            if chunk:
+                errors.append((line, error))
+            else:
+                report.write(encode_import_result_to_ndjson(line=line, error=error))
+            failed += 1
+
+        if len(chunk) >= chunk_size:
+            imported = await _import_chunk(chunk=chunk, errors=errors, repository=repository, report=report)
+            created, failed = created + imported, failed + len(chunk) - imported
+            chunk, errors = [], []
+
+    if chunk:
+        imported = await _import_chunk(chunk=chunk, errors=errors, repository=repository, report=report)
+        created, failed = created + imported, failed + len(chunk) - imported
+
+    report.write(encode_import_summary_to_ndjson(created=created, failed=failed))
+    report.seek(0)
+
+    async def read_report() -> AsyncIterator[bytes]:
+        try:
+            while content := report.read(64 * 1024):
+                yield content
+        finally:
+            report.close()
+
+    return StreamingResponse(content=read_report(), media_type="application/x-ndjson")
+
+
 async def update_todo(request: Request) -> Response:
     """
     summary: Updates new TodoEntry
@@ -120,8 +610,10 @@ async def update_todo(request: Request) -> Response:
             description: TodoEntry was created.
             examples:
                 {"label_id": 1}
+        "404":
+            description: TodoEntry was not found.
         "422":
-            description: Validation error.
+            description: Validation error or the label doesn't exist.
         "500":
             description: Something went wrong, try again later.
     """
@@ -134,8 +626,7 @@ async def update_todo(request: Request) -> Response:
             media_type="application/json",
         )
 
-    mapper = SqliteTodoEntryMapper(storage=session_maker)
-    repository = TodoEntryRepository(mapper=mapper)
+    repository = (await _get_storage(request)).todo_entry_repository
 
     try:
         identifier = request.path_params["id"]  # TODO: add validation
@@ -145,6 +636,25 @@ async def update_todo(request: Request) -> Response:
             repository=repository,
         )
         content = encode_to_json_response(data=entity)
+    except NotFoundError:
+        return Response(
+            content=None,
+            status_code=HTTPStatus.NOT_FOUND,
+            media_type="application/json",
+        )
+    except InvalidReferenceError as error:
+        return Response(
+            content=encode_error_to_json_response(
+                error=SchemaError(
+                    type="Reference error",
+                    message=str(error),
+                    validation_schema=todo_entry_updating_schema["properties"]["label_id"],
+                    path="label_id",
+                ),
+            ),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
     except UseCaseError:
         return Response(
             content=None,
@@ -157,6 +667,64 @@ async def update_todo(request: Request) -> Response:
     )
 
 
+async def update_todos(request: Request) -> Response:
+    """
+    summary: Assigns a TodoLabel to many TodoEntries in one transaction
+    responses:
+        "200":
+            description: TodoEntries were updated, not existing ones are reported as missing.
+            examples:
+                {"updated": [1, 2], "missing": [42]}
+        "422":
+            description: Validation error or the label doesn't exist.
+        "500":
+            description: Something went wrong, try again later.
+    """
+    data = await request.json()
+    errors = validate_todo_entries_bulk_updating(raw_data=data)
+    if errors:
+        return Response(
+            content=encode_error_to_json_response(error=errors),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+
+    repository = (await _get_storage(request)).todo_entry_repository
+
+    try:
+        identifiers = data["ids"]
+        updated = await update_todo_entries(
+            identifiers=identifiers,
+            fields={"label_id": data["label_id"]},
+            repository=repository,
+        )
+        content = encode_bulk_update_to_json_response(
+            updated=updated,
+            missing=sorted(set(identifiers).difference(updated)),
+        )
+    except InvalidReferenceError as error:
+        return Response(
+            content=encode_error_to_json_response(
+                error=SchemaError(
+                    type="Reference error",
+                    message=str(error),
+                    validation_schema=todo_entries_bulk_updating_schema["properties"]["label_id"],
+                    path="label_id",
+                ),
+            ),
+            status_code=HTTPStatus.UNPROCESSABLE_ENTITY,
+            media_type="application/json",
+        )
+    except UseCaseError:
+        return Response(
+            content=None,
+            status_code=HTTPStatus.INTERNAL_SERVER_ERROR,
+            media_type="application/json",
+        )
+
+    return Response(content=content, media_type="application/json")
+
+
 async def create_new_todo_label(request: Request) -> Response:
     """
     summary: Creates new TodoLabel
@@ -179,8 +747,7 @@ async def create_new_todo_label(request: Request) -> Response:
             media_type="application/json",
         )
 
-    mapper = SqliteTodoLabelMapper(storage=session_maker)
-    repository = TodoLabelRepository(mapper=mapper)
+    repository = (await _get_storage(request)).todo_label_repository
 
     try:
         value_object = TodoLabel(**data)
@@ -200,12 +767,64 @@ async def create_new_todo_label(request: Request) -> Response:
         content=content, status_code=HTTPStatus.CREATED, media_type="application/json"
     )
 
+
+async def get_metrics(request: Request) -> Response:
+    """
+    summary: Exposes metrics in Prometheus text format
+    responses:
+        "200":
+            description: Latency histograms of requests, schema validation, response encoding and mappers, and counters of tenant storages.
+    """
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
+
+
+@asynccontextmanager
+async def lifespan(app: Starlette) -> AsyncIterator[None]:
+    settings = StorageSettings()
+    app.state.storage = None
+    app.state.tenants = None
+    if settings.tenants_path is None:
+        app.state.storage = Storage(settings=settings)
+    else:
+        app.state.tenants = TenantRegistry(settings=settings)
+        tenant_metrics = app.state.tenants.register_metrics(registry)
+
+    try:
+        yield
+    finally:
+        if app.state.tenants is None:
+            await app.state.storage.dispose()
+        else:
+            await app.state.tenants.dispose()
+            for metric in tenant_metrics:
+                registry.unregister(metric)
+
+
+routes = [
+    Route("/todo/", list_todos, methods=["GET"]),
+    Route("/todo/", create_new_todo_entry, methods=["POST"]),
+    Route("/todo/search/", search_todos, methods=["GET"]),
+    Route("/todo/export/", export_todos, methods=["GET"]),
+    Route("/todo/import/", import_new_todo_entries, methods=["POST"]),
+    Route("/todo/bulk/", create_new_todo_entries, methods=["POST"]),
+    Route("/todo/bulk/", update_todos, methods=["PATCH"]),
+    Route("/todo/{id:int}/", get_todo, methods=["GET"]),
+    Route("/todo/{id:int}/", update_todo, methods=["PATCH"]),
+    Route("/label/", create_new_todo_label, methods=["POST"]),
+]
+
 app = Starlette(
     debug=True,
+    lifespan=lifespan,
     routes=[
-        Route("/todo/", create_new_todo_entry, methods=["POST"]),
-        Route("/todo/{id:int}/", get_todo, methods=["GET"]),
-        Route("/todo/{id:int}/", update_todo, methods=["PATCH"]),
-        Route("/label/", create_new_todo_label, methods=["POST"]),
+        *routes,
+        Route("/metrics", get_metrics, methods=["GET"]),
+        Mount("/tenants/{tenant}", routes=routes),
+    ],
+    middleware=[
+        Middleware(MetricsMiddleware),
+        Middleware(ProfilingMiddleware, settings=ProfilingSettings()),
+        Middleware(TenantLeaseMiddleware),
     ],
+    exception_handlers={InvalidTenantError: invalid_tenant},
 )
@@ -0,0 +1,72 @@
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from hashlib import blake2b
+from typing import Dict, Mapping
+
+
+@dataclass(frozen=True)
+class Representation:
+    """Encoded response body together with its validators"""
+    content: bytes
+    etag: str
+    last_modified: datetime
+
+    @property
+    def headers(self) -> Dict[str, str]:
+        return {
+            "ETag": self.etag,
+            "Last-Modified": format_datetime(self.last_modified, usegmt=True),
+        }
+
+
+def _to_utc(value: datetime) -> datetime:
+    # Dates are stored without time zone, in UTC
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+
+    return value.astimezone(timezone.utc)
+
+
+def make_representation(content: bytes, last_modified: datetime) -> Representation:
+    return Representation(
+        content=content,
+        etag=f'"{blake2b(content, digest_size=16).hexdigest()}"',
+        last_modified=_to_utc(last_modified).replace(microsecond=0),
+    )
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison
+    if if_none_match.strip() == "*":
+        return True
+
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag == etag:
+            return True
+
+    return False
+
+
+def is_not_modified(headers: Mapping[str, str], representation: Representation) -> bool:
+    """
+    Evaluates `If-None-Match` and `If-Modified-Since` preconditions,
+    the latter is ignored when the former is present (RFC 9110, 13.1.3).
+    """
+    if_none_match = headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, representation.etag)
+
+    if_modified_since = headers.get("if-modified-since")
+    if if_modified_since is not None:
+        try:
+            since = _to_utc(parsedate_to_datetime(if_modified_since))
+        except (TypeError, ValueError):
+            return False
+
+        return representation.last_modified <= since
+
+    return False
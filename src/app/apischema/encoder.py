@@ -1,19 +1,106 @@
 from json import dumps
+from os import environ
+from typing import Any, Callable, Dict, List, Optional, Type
 
 from pydantic.json import pydantic_encoder
 from pydantic import BaseModel
 
+from apischema.pagination import encode_cursor
 from apischema.validator import SchemaError
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from metrics import registry as metrics_registry, timed
+from value_objects import TodoLabel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+encoding_seconds = metrics_registry.histogram(
+    name="todo_encoding_seconds",
+    documentation="Time spent encoding response bodies, per kind of body.",
+    label_names=("body",),
+)
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return dumps(
+        data,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=pydantic_encoder,
+    ).encode("utf-8")
+
+
+def _orjson_dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=pydantic_encoder)
+
+
+_backends: Dict[str, Callable[[Any], bytes]] = {"stdlib": _stdlib_dumps}
+if orjson is not None:
+    _backends["orjson"] = _orjson_dumps
+
+_dumps: Callable[[Any], bytes]
+
+
+def use_backend(name: str) -> None:
+    """
+    Switches JSON backend: `stdlib`, `orjson` (when installed) or `auto`,
+    the fastest available one.
+    """
+    global _dumps
+
+    if name == "auto":
+        _dumps = _backends.get("orjson", _stdlib_dumps)
+    elif name in _backends:
+        _dumps = _backends[name]
+    else:
+        raise ValueError(f"JSON backend `{name}` is not available.")
+
+
+def _todo_label_to_dict(data: TodoLabel) -> dict:
+    return {"id": data.id, "name": data.name}
+
+
+def _todo_entry_to_dict(data: TodoEntry) -> dict:
+    label = data.label
+    return {
+        "id": data.id,
+        "summary": data.summary,
+        "detail": data.detail,
+        "created_at": data.created_at.isoformat(),
+        "updated_at": None if data.updated_at is None else data.updated_at.isoformat(),
+        "label": None if label is None else _todo_label_to_dict(label),
+    }
+
+
+_fast_paths: Dict[Type[BaseModel], Callable[[Any], dict]] = {
+    TodoEntry: _todo_entry_to_dict,
+    TodoLabel: _todo_label_to_dict,
+}
+
+
+def base_model_to_dict(data: BaseModel) -> dict:
+    fast_path = _fast_paths.get(type(data))
+    if fast_path is None:
+        return data.dict()
+
+    return fast_path(data)
+
+
+def _error_to_dict(error: SchemaError) -> dict:
+    return {
+        "type": error.type,
+        "message": error.message,
+        "validation_schema": error.validation_schema,
+        "path": error.path,
+    }
 
 
 def error_to_json(error: SchemaError) -> str:
     return dumps(
-        {
-            "type": error.type,
-            "message": error.message,
-            "validation_schema": error.validation_schema,
-            "path": error.path,
-        },
+        _error_to_dict(error),
         ensure_ascii=False,
         allow_nan=False,
         indent=None,
@@ -22,12 +109,70 @@ def error_to_json(error: SchemaError) -> str:
 
 
 def base_model_to_json(data: BaseModel) -> str:
-    return dumps(data, indent=4, default=pydantic_encoder)
+    return encode_to_json_response(data).decode("utf-8")
 
 
+@timed(encoding_seconds, "entity")
 def encode_to_json_response(data: BaseModel) -> bytes:
-    return base_model_to_json(data).encode("utf-8")
+    return _dumps(base_model_to_dict(data))
+
+
+@timed(encoding_seconds, "page")
+def encode_page_to_json_response(page: TodoEntryPage) -> bytes:
+    return _dumps({
+        "items": [_todo_entry_to_dict(entity) for entity in page.items],
+        "next_cursor": None if page.next_cursor is None else encode_cursor(page.next_cursor),
+    })
+
+
+@timed(encoding_seconds, "search_page")
+def encode_search_page_to_json_response(page: TodoEntrySearchPage) -> bytes:
+    return _dumps({
+        "items": [_todo_entry_to_dict(entity) for entity in page.items],
+        "next_offset": page.next_offset,
+    })
+
+
+@timed(encoding_seconds, "rows")
+def encode_rows_to_ndjson(rows: List[dict]) -> bytes:
+    return b"".join(_dumps(row) + b"\n" for row in rows)
+
+
+@timed(encoding_seconds, "import_result")
+def encode_import_result_to_ndjson(
+    line: int,
+    identifier: Optional[int] = None,
+    error: Optional[SchemaError] = None,
+) -> bytes:
+    if error is None:
+        return _dumps({"line": line, "id": identifier}) + b"\n"
 
+    return _dumps({"line": line, "error": _error_to_dict(error)}) + b"\n"
 
+
+@timed(encoding_seconds, "import_summary")
+def encode_import_summary_to_ndjson(created: int, failed: int) -> bytes:
+    return _dumps({"created": created, "failed": failed}) + b"\n"
+
+
+@timed(encoding_seconds, "error")
 def encode_error_to_json_response(error: SchemaError) -> bytes:
     return error_to_json(error).encode("utf-8")
+
+
+@timed(encoding_seconds, "errors")
+def encode_errors_to_json_response(errors: List[SchemaError]) -> bytes:
+    return _dumps([_error_to_dict(error) for error in errors])
+
+
+@timed(encoding_seconds, "identifiers")
+def encode_identifiers_to_json_response(identifiers: List[int]) -> bytes:
+    return _dumps({"ids": identifiers})
+
+
+@timed(encoding_seconds, "bulk_update")
+def encode_bulk_update_to_json_response(updated: List[int], missing: List[int]) -> bytes:
+    return _dumps({"updated": updated, "missing": missing})
+
+
+use_backend(environ.get("TODO_JSON_BACKEND", "auto"))
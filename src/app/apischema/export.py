@@ -0,0 +1,67 @@
+from csv import writer
+from dataclasses import dataclass
+from datetime import datetime
+from io import StringIO
+from typing import Any, AsyncIterator, Callable, Dict, List
+
+from apischema.encoder import encode_rows_to_ndjson
+
+EXPORT_CHUNK_SIZE = 1_000
+
+TODO_ENTRY_EXPORT_FIELDS = (
+    "id",
+    "summary",
+    "detail",
+    "created_at",
+    "updated_at",
+    "label_id",
+    "label_name",
+)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+
+    return value
+
+
+def encode_rows_to_csv(rows: List[dict]) -> bytes:
+    buffer = StringIO()
+    csv_writer = writer(buffer)
+    csv_writer.writerows(
+        [_csv_value(row[field]) for field in TODO_ENTRY_EXPORT_FIELDS]
+        for row in rows
+    )
+    return buffer.getvalue().encode("utf-8")
+
+
+def _csv_header() -> bytes:
+    buffer = StringIO()
+    writer(buffer).writerow(TODO_ENTRY_EXPORT_FIELDS)
+    return buffer.getvalue().encode("utf-8")
+
+
+@dataclass(frozen=True)
+class ExportFormat:
+    media_type: str
+    encode: Callable[[List[dict]], bytes]
+    header: bytes = b""
+
+
+export_formats: Dict[str, ExportFormat] = {
+    "ndjson": ExportFormat(media_type="application/x-ndjson", encode=encode_rows_to_ndjson),
+    "csv": ExportFormat(media_type="text/csv", encode=encode_rows_to_csv, header=_csv_header()),
+}
+
+
+async def encode_export(
+    chunks: AsyncIterator[List[dict]],
+    export_format: ExportFormat,
+) -> AsyncIterator[bytes]:
+    """Encodes every chunk of rows as it comes, nothing is accumulated"""
+    if export_format.header:
+        yield export_format.header
+
+    async for rows in chunks:
+        yield export_format.encode(rows)
@@ -0,0 +1,57 @@
+from json import JSONDecodeError, loads
+from typing import AsyncIterator, Tuple, Union
+
+from apischema.validator import SchemaError
+
+MAX_LINE_SIZE = 64 * 1024
+
+
+def _decoding_error(message: str) -> SchemaError:
+    return SchemaError(
+        type="Decoding error",
+        message=message,
+        validation_schema={},
+        path="",
+    )
+
+
+def _decode_line(line: bytes) -> Union[dict, SchemaError]:
+    try:
+        return loads(line)
+    except (JSONDecodeError, UnicodeDecodeError) as error:
+        return _decoding_error(str(error))
+
+
+async def iter_ndjson(
+    stream: AsyncIterator[bytes],
+    max_line_size: int = MAX_LINE_SIZE,
+) -> AsyncIterator[Tuple[int, Union[dict, SchemaError]]]:
+    """
+    Decodes NDJSON incrementally, yields `(line number, object or error)`
+    for every non blank line. At most `max_line_size` bytes are buffered,
+    longer lines are skipped and reported.
+    """
+    buffer = b""
+    number = 0
+    oversized = False
+
+    async for chunk in stream:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+
+        for line in lines:
+            number += 1
+            if oversized or len(line) > max_line_size:
+                oversized = False
+                yield number, _decoding_error(f"Line is longer than {max_line_size} bytes.")
+            elif line.strip():
+                yield number, _decode_line(line)
+
+        if len(buffer) > max_line_size:
+            oversized = True
+            buffer = b""
+
+    if oversized:
+        yield number + 1, _decoding_error(f"Line is longer than {max_line_size} bytes.")
+    elif buffer.strip():
+        yield number + 1, _decode_line(buffer)
@@ -0,0 +1,25 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from json import dumps, loads
+
+from value_objects import PageCursor
+
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(cursor: PageCursor) -> str:
+    """Opaque, URL safe representation of the position in a listing"""
+    raw = dumps([cursor.created_at.isoformat(), cursor.id], separators=(",", ":"))
+    return urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(value: str) -> PageCursor:
+    """Raises `ValueError` when the cursor is malformed"""
+    try:
+        raw = urlsafe_b64decode(value + "=" * (-len(value) % 4))
+        created_at, identifier = loads(raw)
+    except (BinasciiError, UnicodeDecodeError, TypeError) as error:
+        raise ValueError(f"Cursor `{value}` is malformed.") from error
+
+    return PageCursor(created_at=created_at, id=identifier)
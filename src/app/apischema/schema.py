@@ -9,6 +9,13 @@ todo_entry_creation_schema = {
     },
 }
 
+todo_entries_bulk_creation_schema = {
+    "type": "array",
+    "minItems": 1,
+    "maxItems": 1_000,
+    "items": todo_entry_creation_schema,
+}
+
 todo_entry_updating_schema = {
     "type": "object",
     "required": ["label_id"],
@@ -17,6 +24,20 @@ todo_entry_updating_schema = {
     },
 }
 
+todo_entries_bulk_updating_schema = {
+    "type": "object",
+    "required": ["ids", "label_id"],
+    "properties": {
+        "ids": {
+            "type": "array",
+            "minItems": 1,
+            "maxItems": 10_000,
+            "items": {"type": "integer", "minimum": 1},
+        },
+        "label_id": {"type": "integer", "minimum": 1},
+    },
+}
+
 todo_label_creation_schema = {
     "type": "object",
     "required": ["name"],
@@ -24,3 +45,38 @@ todo_label_creation_schema = {
         "name": {"type": "string", "minLength": 3, "maxLength": 26},
     },
 }
+
+_date_time_pattern = (
+    r"^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}(:\d{2}(\.\d{1,6})?)?(Z|[+-]\d{2}:\d{2})?$"
+)
+
+todo_entry_listing_schema = {
+    "type": "object",
+    "additionalProperties": False,
+    "properties": {
+        "label_id": {"type": "string", "pattern": r"^[1-9]\d{0,17}$"},
+        "created_after": {"type": "string", "pattern": _date_time_pattern},
+        "created_before": {"type": "string", "pattern": _date_time_pattern},
+        "limit": {"type": "string", "pattern": r"^([1-9]\d?|100)$"},
+        "cursor": {"type": "string", "maxLength": 128},
+    },
+}
+
+todo_entry_search_schema = {
+    "type": "object",
+    "required": ["q"],
+    "additionalProperties": False,
+    "properties": {
+        "q": {"type": "string", "minLength": 1, "maxLength": 256},
+        "limit": {"type": "string", "pattern": r"^([1-9]\d?|100)$"},
+        "offset": {"type": "string", "pattern": r"^\d{1,4}$"},
+    },
+}
+
+todo_entry_import_schema = {
+    "type": "object",
+    "additionalProperties": False,
+    "properties": {
+        "chunk_size": {"type": "string", "pattern": r"^[1-9]\d{0,3}$"},
+    },
+}
@@ -1,14 +1,27 @@
-from typing import Optional
+from time import perf_counter
+from typing import Callable, Dict, List, Optional
 
-from jsonschema.exceptions import ValidationError
-from jsonschema.validators import validate
+from jsonschema.exceptions import ValidationError, best_match, relevance
+from jsonschema.protocols import Validator
+from jsonschema.validators import validator_for
 from pydantic.dataclasses import dataclass
 
 from apischema.schema import (
+    todo_entries_bulk_creation_schema,
+    todo_entries_bulk_updating_schema,
     todo_entry_creation_schema,
+    todo_entry_import_schema,
+    todo_entry_listing_schema,
+    todo_entry_search_schema,
     todo_entry_updating_schema,
     todo_label_creation_schema,
 )
+from metrics import registry as metrics_registry
+
+try:
+    import fastjsonschema
+except ImportError:  # pragma: no cover
+    fastjsonschema = None
 
 
 @dataclass
@@ -24,24 +37,141 @@ def _validation_error_to_structure(error: ValidationError) -> SchemaError:
         message=error.message,
         validation_schema=error.schema,
         type="Validation error",
-        path=".".join(error.absolute_path),
+        path=".".join(str(part) for part in error.absolute_path),
     )
 
 
-def _validate(raw_data: dict, schema: dict) -> Optional[SchemaError]:
-    try:
-        validate(instance=raw_data, schema=schema)
-    except ValidationError as err:
-        return _validation_error_to_structure(error=err)
+def _compile_check(schema: dict) -> Optional[Callable[[dict], bool]]:
+    """
+    Generates Python code specialised to the schema, when `fastjsonschema`
+    is installed. It only answers "is it valid", the error report is built
+    by `jsonschema` which is slower but much more descriptive.
+    """
+    if fastjsonschema is None:
+        return None
+
+    validate = fastjsonschema.compile(schema, use_default=False, use_formats=False)
+
+    def check(raw_data: dict) -> bool:
+        try:
+            validate(raw_data)
+        except fastjsonschema.JsonSchemaException:
+            return False
+        return True
+
+    return check
+
+
+class _CompiledSchema:
+    _validator: Validator
+    _check: Optional[Callable[[dict], bool]]
+
+    def __init__(self, schema: dict) -> None:
+        validator_class = validator_for(schema)
+        validator_class.check_schema(schema)
+
+        self._validator = validator_class(schema)
+        self._check = _compile_check(schema)
+
+    def validate(self, raw_data: dict) -> Optional[SchemaError]:
+        if self._check is not None and self._check(raw_data):
+            return None
+
+        error = best_match(self._validator.iter_errors(raw_data))
+        if error is not None:
+            return _validation_error_to_structure(error=error)
+
+    def validate_all(self, raw_data: dict) -> List[SchemaError]:
+        if self._check is not None and self._check(raw_data):
+            return []
+
+        return [
+            _validation_error_to_structure(error=error)
+            for error in sorted(
+                self._validator.iter_errors(raw_data), key=relevance, reverse=True,
+            )
+        ]
+
+
+schema_validation_seconds = metrics_registry.histogram(
+    name="todo_schema_validation_seconds",
+    documentation="Time spent validating request data, per schema.",
+    label_names=("schema",),
+)
+
+
+class ValidatorRegistry:
+    """
+    Keeps validators compiled once per schema, so neither the schema check
+    nor the validator construction are paid per request.
+    """
+    _schemas: Dict[str, _CompiledSchema]
+
+    def __init__(self) -> None:
+        self._schemas = {}
+
+    def register(self, name: str, schema: dict) -> None:
+        self._schemas[name] = _CompiledSchema(schema)
+
+    def validate(self, name: str, raw_data: dict) -> Optional[SchemaError]:
+        """Returns the most relevant error only"""
+        started_at = perf_counter()
+        try:
+            return self._schemas[name].validate(raw_data)
+        finally:
+            schema_validation_seconds.observe(perf_counter() - started_at, name)
+
+    def validate_all(self, name: str, raw_data: dict) -> List[SchemaError]:
+        """Returns every error, the most relevant first"""
+        started_at = perf_counter()
+        try:
+            return self._schemas[name].validate_all(raw_data)
+        finally:
+            schema_validation_seconds.observe(perf_counter() - started_at, name)
+
+
+registry = ValidatorRegistry()
+registry.register("todo_entry_creation", todo_entry_creation_schema)
+registry.register("todo_entries_bulk_creation", todo_entries_bulk_creation_schema)
+registry.register("todo_entry_updating", todo_entry_updating_schema)
+registry.register("todo_entries_bulk_updating", todo_entries_bulk_updating_schema)
+registry.register("todo_entry_import", todo_entry_import_schema)
+registry.register("todo_entry_listing", todo_entry_listing_schema)
+registry.register("todo_entry_search", todo_entry_search_schema)
+registry.register("todo_label_creation", todo_label_creation_schema)
 
 
 def validate_todo_entry_creation(raw_data: dict) -> Optional[SchemaError]:
-    return _validate(raw_data=raw_data, schema=todo_entry_creation_schema)
+    return registry.validate("todo_entry_creation", raw_data)
+
+
+def validate_todo_entries_bulk_creation(raw_data: list) -> List[SchemaError]:
+    """Returns errors of every item, paths are prefixed by the item index"""
+    return registry.validate_all("todo_entries_bulk_creation", raw_data)
 
 
 def validate_todo_entry_updating(raw_data: dict) -> Optional[SchemaError]:
-    return _validate(raw_data=raw_data, schema=todo_entry_updating_schema)
+    return registry.validate("todo_entry_updating", raw_data)
+
+
+def validate_todo_entries_bulk_updating(raw_data: dict) -> Optional[SchemaError]:
+    return registry.validate("todo_entries_bulk_updating", raw_data)
+
+
+def validate_todo_entry_import(raw_data: dict) -> Optional[SchemaError]:
+    """Validates query parameters, all of them are strings"""
+    return registry.validate("todo_entry_import", raw_data)
+
+
+def validate_todo_entry_listing(raw_data: dict) -> Optional[SchemaError]:
+    """Validates query parameters, all of them are strings"""
+    return registry.validate("todo_entry_listing", raw_data)
+
+
+def validate_todo_entry_search(raw_data: dict) -> Optional[SchemaError]:
+    """Validates query parameters, all of them are strings"""
+    return registry.validate("todo_entry_search", raw_data)
 
 
 def validate_todo_label(raw_data: dict) -> Optional[SchemaError]:
-    return _validate(raw_data=raw_data, schema=todo_label_creation_schema)
+    return registry.validate("todo_label_creation", raw_data)
@@ -0,0 +1,96 @@
+"""
+Minimal in-process ASGI transport: requests go straight to the app,
+without sockets or an HTTP server, so the measurement is the app alone.
+"""
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Optional, Tuple
+
+from starlette.types import ASGIApp, Message
+
+
+@asynccontextmanager
+async def lifespan(app: ASGIApp) -> AsyncIterator[None]:
+    """Runs the startup of the app, and its shutdown on exit"""
+    messages: "asyncio.Queue[Message]" = asyncio.Queue()
+    started = asyncio.get_running_loop().create_future()
+    stopped = asyncio.get_running_loop().create_future()
+
+    async def send(message: Message) -> None:
+        if message["type"].startswith("lifespan.startup"):
+            started.set_result(message)
+        elif message["type"].startswith("lifespan.shutdown"):
+            stopped.set_result(message)
+
+    task = asyncio.create_task(
+        app({"type": "lifespan", "asgi": {"version": "3.0"}}, messages.get, send),
+    )
+    await messages.put({"type": "lifespan.startup"})
+    message = await started
+    if message["type"] != "lifespan.startup.complete":
+        raise RuntimeError(message.get("message", "Startup failed."))
+
+    try:
+        yield
+    finally:
+        await messages.put({"type": "lifespan.shutdown"})
+        await stopped
+        await task
+
+
+async def request(
+    app: ASGIApp,
+    method: str,
+    path: str,
+    query: str = "",
+    body: Optional[Any] = None,
+    content: Optional[bytes] = None,
+) -> Tuple[int, bytes]:
+    """
+    Returns the status and the body of the response, `body` is sent as
+    JSON, `content` as it is.
+    """
+    if content is None:
+        content = b"" if body is None else json.dumps(body).encode("utf-8")
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode("utf-8"),
+        "root_path": "",
+        "query_string": query.encode("utf-8"),
+        "headers": [(b"host", b"benchmark"), (b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("benchmark", 80),
+    }
+    received = False
+    disconnected = asyncio.Event()
+
+    async def receive() -> Message:
+        nonlocal received
+        if not received:
+            received = True
+            return {"type": "http.request", "body": content, "more_body": False}
+
+        await disconnected.wait()
+        return {"type": "http.disconnect"}
+
+    status = 0
+    chunks = []
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        disconnected.set()
+    return status, b"".join(chunks)
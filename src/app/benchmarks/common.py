@@ -0,0 +1,114 @@
+"""
+Helpers shared by the mapper benchmarks: timing loops, seed entities and
+mappers of every mode on a fresh database.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from timeit import repeat
+from typing import AsyncIterator, Awaitable, Callable, Tuple
+
+from sqlalchemy import create_engine
+
+from entities import TodoEntry
+from persistence.cache import LabelCache
+from persistence.database import (
+    Base,
+    StorageSettings,
+    create_async_session_maker,
+    create_async_storage_engine,
+    create_session_maker,
+    create_storage_engine,
+)
+from persistence.executor import SessionExecutor
+from persistence.mapper.async_sqlite import (
+    AsyncSqliteTodoEntryMapper,
+    AsyncSqliteTodoLabelMapper,
+)
+from persistence.mapper.interfaces import (
+    TodoEntryMapperInterface,
+    TodoLabelMapperInterface,
+)
+from persistence.mapper.memory import (
+    MemoryStorage,
+    MemoryTodoEntryMapper,
+    MemoryTodoLabelMapper,
+)
+from persistence.mapper.sqlite import (
+    SqliteTodoEntryMapper,
+    SqliteTodoLabelMapper,
+)
+from persistence.mapper.statements import ReadPath
+
+SEED_ENTRIES = 1000
+BATCH_SIZE = 100
+
+Mappers = Tuple[TodoEntryMapperInterface, TodoLabelMapperInterface]
+
+
+def best_of(function: Callable[[], object], number: int) -> float:
+    return min(repeat(function, number=number, repeat=5)) / number
+
+
+async def best_of_async(function: Callable[[], Awaitable[object]], number: int) -> float:
+    timings = []
+    loop = asyncio.get_running_loop()
+    for _ in range(3):
+        started = loop.time()
+        for _ in range(number):
+            await function()
+        timings.append((loop.time() - started) / number)
+    return min(timings)
+
+
+def make_entity(index: int) -> TodoEntry:
+    return TodoEntry(
+        summary=f"Lorem Ipsum {index}",
+        detail="Dolor sit amet",
+        created_at=datetime.now(tz=timezone.utc),
+    )
+
+
+@asynccontextmanager
+async def open_mappers(
+    mapper_mode: str,
+    db_path: Path,
+    label_cache: bool,
+    read_path: ReadPath = "orm",
+) -> AsyncIterator[Mappers]:
+    if mapper_mode == "memory":
+        storage = MemoryStorage()
+        yield MemoryTodoEntryMapper(storage=storage), MemoryTodoLabelMapper(storage=storage)
+        return
+
+    schema_engine = create_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(schema_engine)
+    schema_engine.dispose()
+
+    settings = StorageSettings(db_path=db_path, mapper_mode=mapper_mode)
+    cache = LabelCache() if label_cache else None
+    if mapper_mode == "async":
+        engine = create_async_storage_engine(settings=settings)
+        session_maker = create_async_session_maker(engine=engine)
+        try:
+            yield (
+                AsyncSqliteTodoEntryMapper(storage=session_maker, label_cache=cache, read_path=read_path),
+                AsyncSqliteTodoLabelMapper(storage=session_maker, label_cache=cache),
+            )
+        finally:
+            await engine.dispose()
+    else:
+        engine = create_storage_engine(settings=settings)
+        session_maker = create_session_maker(engine=engine)
+        executor = SessionExecutor(max_workers=settings.thread_pool_size)
+        try:
+            yield (
+                SqliteTodoEntryMapper(
+                    storage=session_maker, executor=executor, label_cache=cache, read_path=read_path,
+                ),
+                SqliteTodoLabelMapper(storage=session_maker, executor=executor, label_cache=cache),
+            )
+        finally:
+            executor.shutdown()
+            engine.dispose()
@@ -0,0 +1,77 @@
+"""
+Compares response encoding backends against the former encoder
+(`json.dumps` with `indent=4` and `pydantic_encoder` fallback).
+
+    cd src/app
+    python -m benchmarks.encoder --output encoder.json
+    python -m benchmarks.encoder --backend orjson --baseline encoder.json
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from json import dumps
+from pathlib import Path
+
+from pydantic.json import pydantic_encoder
+
+from apischema import encoder
+from benchmarks.common import best_of
+from benchmarks.results import Results, report
+from entities import TodoEntry
+from value_objects import TodoLabel
+
+
+def _legacy_encode(data: TodoEntry) -> bytes:
+    return dumps(data, indent=4, default=pydantic_encoder).encode("utf-8")
+
+
+def _bench_backends(backends: list, number: int) -> Results:
+    entity = TodoEntry(
+        id=1,
+        summary="Lorem Ipsum",
+        detail="Dolor sit amet",
+        created_at=datetime.now(tz=timezone.utc),
+        label=TodoLabel(id=1, name="Lorem"),
+    )
+
+    results = {"legacy": {"us_per_op": best_of(lambda: _legacy_encode(entity), number=number) * 1e6}}
+    try:
+        for backend in backends:
+            encoder.use_backend(backend)
+            timing = best_of(lambda: encoder.encode_to_json_response(entity), number=number)
+            results[backend] = {"us_per_op": timing * 1e6}
+    finally:
+        encoder.use_backend("auto")
+    return results
+
+
+def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--backend",
+        action="append",
+        choices=list(encoder._backends),
+        help="Repeatable, all available backends by default",
+    )
+    parser.add_argument("--number", type=int, default=20_000, help="Calls per measurement")
+    parser.add_argument("--output", type=Path, help="Stores results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown, 0.1 is 10%%")
+    arguments = parser.parse_args()
+
+    results = _bench_backends(backends=arguments.backend or list(encoder._backends), number=arguments.number)
+
+    baseline = results["legacy"]["us_per_op"]
+    for name, metrics in results.items():
+        print(f"{name:>10}: {metrics['us_per_op']:8.2f} us/op, x{baseline / metrics['us_per_op']:.1f}")
+
+    return report(
+        results=results,
+        output=arguments.output,
+        baseline=arguments.baseline,
+        tolerance=arguments.tolerance,
+        benchmark="encoder",
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
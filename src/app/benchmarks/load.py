@@ -0,0 +1,194 @@
+"""
+Load harness driving `api.app` in-process with concurrent clients and
+a weighted request mix, reports req/s and p50/p95/p99 latencies.
+
+    cd src/app
+    python -m benchmarks.load --concurrency 20 --requests 5000 --output load.json
+    python -m benchmarks.load --mix get=80,create=20 --baseline load.json
+"""
+import asyncio
+import os
+from argparse import ArgumentParser, ArgumentTypeError
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+from random import Random
+from tempfile import TemporaryDirectory
+from time import perf_counter
+from typing import Dict, Iterator, List, Tuple
+
+from sqlalchemy import create_engine
+
+from api import app
+from benchmarks.asgi import lifespan, request
+from benchmarks.results import Results, percentile, report
+from persistence.database import Base
+
+DEFAULT_MIX = "get=50,list=20,search=10,create=10,update=10"
+
+Request = Tuple[str, str, str, object]
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for item in value.split(","):
+        kind, _, weight = item.partition("=")
+        if kind not in _kinds or not weight.isdigit():
+            raise ArgumentTypeError(f"`{item}` is not a `<{'|'.join(_kinds)}>=<weight>` item.")
+        mix[kind] = int(weight)
+    return mix
+
+
+def _get(random: Random, identifiers: int, label_id: int) -> Request:
+    return "GET", f"/todo/{random.randint(1, identifiers)}/", "", None
+
+
+def _list(random: Random, identifiers: int, label_id: int) -> Request:
+    return "GET", "/todo/", "limit=20", None
+
+
+def _search(random: Random, identifiers: int, label_id: int) -> Request:
+    return "GET", "/todo/search/", f"q=ipsum+{random.randint(1, identifiers)}", None
+
+
+def _create(random: Random, identifiers: int, label_id: int) -> Request:
+    created_at = datetime.now(tz=timezone.utc).isoformat()
+    return "POST", "/todo/", "", {"summary": "Lorem Ipsum", "created_at": created_at}
+
+
+def _update(random: Random, identifiers: int, label_id: int) -> Request:
+    return "PATCH", f"/todo/{random.randint(1, identifiers)}/", "", {"label_id": label_id}
+
+
+_kinds = {
+    "get": _get,
+    "list": _list,
+    "search": _search,
+    "create": _create,
+    "update": _update,
+}
+
+
+@contextmanager
+def _environment(**values: str) -> Iterator[None]:
+    """The app reads its settings from the environment on startup"""
+    previous = {name: os.environ.get(name) for name in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for name, value in previous.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+async def _seed(entries: int) -> int:
+    created_at = datetime.now(tz=timezone.utc).isoformat()
+    for start in range(0, entries, 500):
+        status, _ = await request(app, "POST", "/todo/bulk/", body=[
+            {"summary": f"Lorem Ipsum {index}", "detail": "Dolor sit amet", "created_at": created_at}
+            for index in range(start, min(start + 500, entries))
+        ])
+        assert status == 201, status
+
+    status, body = await request(app, "POST", "/label/", body={"name": "Lorem"})
+    assert status == 201, status
+    return int(body.split(b'"id":')[1].split(b",")[0])
+
+
+async def _run(mix: Dict[str, int], requests: int, concurrency: int, seed: int) -> Results:
+    label_id = await _seed(entries=seed)
+    random = Random(0)
+    plan = iter(random.choices(list(mix), weights=list(mix.values()), k=requests))
+    latencies: Dict[str, List[float]] = {kind: [] for kind in mix}
+    errors = 0
+
+    async def client() -> None:
+        nonlocal errors
+        for kind in plan:
+            method, path, query, body = _kinds[kind](random, seed, label_id)
+            started = perf_counter()
+            status, _ = await request(app, method, path, query=query, body=body)
+            latencies[kind].append(perf_counter() - started)
+            errors += status >= 400
+
+    started = perf_counter()
+    await asyncio.gather(*[client() for _ in range(concurrency)])
+    elapsed = perf_counter() - started
+
+    def summary(values: List[float]) -> Dict[str, float]:
+        ordered = sorted(values)
+        return {
+            "requests": len(ordered),
+            "p50_ms": percentile(ordered, 0.50) * 1000,
+            "p95_ms": percentile(ordered, 0.95) * 1000,
+            "p99_ms": percentile(ordered, 0.99) * 1000,
+        }
+
+    results = {"all": {
+        **summary([value for values in latencies.values() for value in values]),
+        "rps": requests / elapsed,
+        "errors": errors,
+    }}
+    results.update({kind: summary(values) for kind, values in latencies.items()})
+    return results
+
+
+async def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--mapper-mode",
+        action="append",
+        choices=["async", "thread_pool", "memory"],
+        help="Repeatable, memory and async by default",
+    )
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=10, help="Concurrent clients")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=DEFAULT_MIX)
+    parser.add_argument("--seed", type=int, default=1000, help="Entries created before the run")
+    parser.add_argument("--output", type=Path, help="Stores results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown, 0.1 is 10%%")
+    arguments = parser.parse_args()
+
+    results = {}
+    with TemporaryDirectory() as directory:
+        for mapper_mode in arguments.mapper_mode or ["memory", "async"]:
+            db_path = Path(directory) / f"{mapper_mode}.sqlite3"
+            engine = create_engine(f"sqlite:///{db_path}")
+            Base.metadata.create_all(engine)
+            engine.dispose()
+
+            with _environment(TODO_STORAGE_DB_PATH=str(db_path), TODO_STORAGE_MAPPER_MODE=mapper_mode):
+                async with lifespan(app):
+                    mode_results = await _run(
+                        mix=arguments.mix,
+                        requests=arguments.requests,
+                        concurrency=arguments.concurrency,
+                        seed=arguments.seed,
+                    )
+
+            for kind, metrics in mode_results.items():
+                results[f"{mapper_mode} {kind}"] = metrics
+                rps = f"{metrics['rps']:8.0f} req/s, " if "rps" in metrics else " " * 15
+                print(
+                    f"{mapper_mode + ' ' + kind:>20}: {rps}{metrics['requests']:6.0f} requests,"
+                    f" p50 {metrics['p50_ms']:7.2f} ms, p95 {metrics['p95_ms']:7.2f} ms,"
+                    f" p99 {metrics['p99_ms']:7.2f} ms"
+                )
+            if mode_results["all"]["errors"]:
+                print(f"{mapper_mode}: {mode_results['all']['errors']:.0f} requests failed")
+
+    return report(
+        results=results,
+        output=arguments.output,
+        baseline=arguments.baseline,
+        tolerance=arguments.tolerance,
+        benchmark="load",
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
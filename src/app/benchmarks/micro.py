@@ -0,0 +1,154 @@
+"""
+Micro-benchmarks of the request path pieces: schema validation, response
+encoding, ORM hydration and every operation of each mapper mode.
+
+    cd src/app
+    python -m benchmarks.micro --output micro.json
+    python -m benchmarks.micro --mapper-mode memory --mapper-mode async --baseline micro.json
+"""
+import asyncio
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from itertools import count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+
+from apischema.encoder import encode_to_json_response
+from apischema.validator import validate_todo_entry_creation
+from benchmarks.common import (
+    BATCH_SIZE,
+    SEED_ENTRIES,
+    Mappers,
+    best_of,
+    best_of_async,
+    make_entity,
+    open_mappers,
+)
+from benchmarks.results import Results, report
+from entities import TodoEntry
+from persistence.models import TodoEntryModel, TodoLabelModel
+from value_objects import TodoEntryFilter, TodoLabel
+
+
+def _bench_functions(number: int) -> Results:
+    data = {
+        "summary": "Lorem Ipsum",
+        "detail": "Dolor sit amet",
+        "created_at": "2022-09-05T18:07:19.280040+00:00",
+    }
+    entity = TodoEntry(
+        id=1,
+        summary="Lorem Ipsum",
+        detail="Dolor sit amet",
+        created_at=datetime.now(tz=timezone.utc),
+        label=TodoLabel(id=1, name="Lorem"),
+    )
+    model = TodoEntryModel(
+        id=1,
+        summary="Lorem Ipsum",
+        detail="Dolor sit amet",
+        created_at=datetime.utcnow(),
+        label=TodoLabelModel(id=1, name="Lorem"),
+    )
+
+    return {
+        "validate_todo_entry_creation": {
+            "us_per_op": best_of(lambda: validate_todo_entry_creation(raw_data=data), number) * 1e6,
+        },
+        "validate_todo_entry_creation invalid": {
+            "us_per_op": best_of(
+                lambda: validate_todo_entry_creation(raw_data={**data, "summary": "Lo"}), number,
+            ) * 1e6,
+        },
+        "encode_to_json_response": {
+            "us_per_op": best_of(lambda: encode_to_json_response(data=entity), number) * 1e6,
+        },
+        "TodoEntry.from_orm": {
+            "us_per_op": best_of(lambda: TodoEntry.from_orm(model), number) * 1e6,
+        },
+    }
+
+
+async def _bench_mappers(mappers: Mappers, mapper_mode: str, number: int) -> Results:
+    entry_mapper, label_mapper = mappers
+    label = await label_mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[make_entity(index) for index in range(SEED_ENTRIES)])
+    await entry_mapper.update_many(identifiers=identifiers[::2], fields={"label_id": label.id})
+
+    counter = count()
+
+    def next_identifier() -> int:
+        return identifiers[next(counter) % len(identifiers)]
+
+    async def export() -> None:
+        async for _ in entry_mapper.export(chunk_size=500):
+            pass
+
+    batch = [make_entity(index) for index in range(BATCH_SIZE)]
+    operations = {
+        "get": lambda: entry_mapper.get(identifier=next_identifier()),
+        "find": lambda: entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=20),
+        "find by label": lambda: entry_mapper.find(
+            filters=TodoEntryFilter(label_id=label.id), after=None, limit=20,
+        ),
+        "search": lambda: entry_mapper.search(query="ipsum", offset=0, limit=20),
+        "create": lambda: entry_mapper.create(entity=make_entity(0)),
+        "create_many": lambda: entry_mapper.create_many(entities=batch),
+        "update": lambda: entry_mapper.update(
+            identifier=next_identifier(), fields={"label_id": label.id},
+        ),
+        "update_many": lambda: entry_mapper.update_many(
+            identifiers=identifiers[:BATCH_SIZE], fields={"label_id": label.id},
+        ),
+        "export": export,
+        "label get_or_create": lambda: label_mapper.get_or_create(value_object=TodoLabel(name="Lorem")),
+    }
+    # Batch operations handle 100 or more rows per call
+    numbers = {"create_many": max(1, number // 10), "export": max(1, number // 50)}
+
+    results = {}
+    for name, operation in operations.items():
+        timing = await best_of_async(operation, numbers.get(name, number))
+        results[f"{mapper_mode} {name}"] = {"us_per_op": timing * 1e6}
+    return results
+
+
+async def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--mapper-mode",
+        action="append",
+        choices=["async", "thread_pool", "memory"],
+        help="Repeatable, all modes by default",
+    )
+    parser.add_argument("--number", type=int, default=500, help="Calls per measurement")
+    parser.add_argument("--label-cache", action="store_true", help="SQLite mappers use a label cache")
+    parser.add_argument("--output", type=Path, help="Stores results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown, 0.1 is 10%%")
+    arguments = parser.parse_args()
+
+    results = _bench_functions(number=arguments.number * 10)
+    with TemporaryDirectory() as directory:
+        for mapper_mode in arguments.mapper_mode or ["memory", "async", "thread_pool"]:
+            async with open_mappers(
+                mapper_mode=mapper_mode,
+                db_path=Path(directory) / f"{mapper_mode}.sqlite3",
+                label_cache=arguments.label_cache,
+            ) as mappers:
+                results.update(await _bench_mappers(mappers, mapper_mode, arguments.number))
+
+    for name, metrics in results.items():
+        print(f"{name:>40}: {metrics['us_per_op']:10.1f} us/op")
+
+    return report(
+        results=results,
+        output=arguments.output,
+        baseline=arguments.baseline,
+        tolerance=arguments.tolerance,
+        benchmark="micro",
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
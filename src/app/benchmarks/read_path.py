@@ -0,0 +1,126 @@
+"""
+Compares the read paths of the SQLite mappers: ORM models validated into
+entities against Core rows constructed into entities, by latency and by
+the peak of memory allocated per call.
+
+    cd src/app
+    python -m benchmarks.read_path --output read_path.json
+    python -m benchmarks.read_path --mapper-mode async --baseline read_path.json
+"""
+import asyncio
+import tracemalloc
+from argparse import ArgumentParser
+from itertools import count
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from typing import Awaitable, Callable, Dict
+
+from benchmarks.common import (
+    BATCH_SIZE,
+    SEED_ENTRIES,
+    Mappers,
+    best_of_async,
+    make_entity,
+    open_mappers,
+)
+from benchmarks.results import Results, report
+from persistence.mapper.statements import ReadPath
+from value_objects import TodoEntryFilter, TodoLabel
+
+READ_PATHS = ("orm", "core")
+
+
+async def _peak_kib(function: Callable[[], Awaitable[object]], number: int) -> float:
+    """Mean peak of traced memory of a call, tracemalloc slows the calls down"""
+    peaks = []
+    tracemalloc.start()
+    try:
+        for _ in range(number):
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            await function()
+            _, peak = tracemalloc.get_traced_memory()
+            peaks.append(peak - before)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024
+
+
+async def _seed(mappers: Mappers) -> list:
+    entry_mapper, label_mapper = mappers
+    label = await label_mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[make_entity(index) for index in range(SEED_ENTRIES)])
+    await entry_mapper.update_many(identifiers=identifiers[::2], fields={"label_id": label.id})
+    return identifiers
+
+
+async def _bench_read_path(mappers: Mappers, identifiers: list, number: int) -> Dict[str, Results]:
+    entry_mapper, _ = mappers
+    counter = count()
+
+    def next_identifier() -> int:
+        return identifiers[next(counter) % len(identifiers)]
+
+    operations = {
+        "get": lambda: entry_mapper.get(identifier=next_identifier()),
+        "find": lambda: entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=20),
+        f"find {BATCH_SIZE}": lambda: entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=BATCH_SIZE),
+        "search": lambda: entry_mapper.search(query="ipsum", offset=0, limit=20),
+    }
+
+    results = {}
+    for name, operation in operations.items():
+        results[name] = {
+            "us_per_op": await best_of_async(operation, number) * 1e6,
+            "peak_kib": await _peak_kib(operation, max(1, number // 10)),
+        }
+    return results
+
+
+async def main() -> int:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--mapper-mode",
+        action="append",
+        choices=["async", "thread_pool"],
+        help="Repeatable, both modes by default",
+    )
+    parser.add_argument("--number", type=int, default=500, help="Calls per measurement")
+    parser.add_argument("--output", type=Path, help="Stores results as JSON")
+    parser.add_argument("--baseline", type=Path, help="Results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.1, help="Allowed slowdown, 0.1 is 10%%")
+    arguments = parser.parse_args()
+
+    results = {}
+    with TemporaryDirectory() as directory:
+        for mapper_mode in arguments.mapper_mode or ["async", "thread_pool"]:
+            read_path: ReadPath
+            for read_path in READ_PATHS:
+                # Both paths read the same rows, seeded in a database of the mode
+                async with open_mappers(
+                    mapper_mode=mapper_mode,
+                    db_path=Path(directory) / f"{mapper_mode}.sqlite3",
+                    label_cache=False,
+                    read_path=read_path,
+                ) as mappers:
+                    if read_path == READ_PATHS[0]:
+                        identifiers = await _seed(mappers)
+                    path_results = await _bench_read_path(mappers, identifiers, arguments.number)
+
+                for name, metrics in path_results.items():
+                    results[f"{mapper_mode} {read_path} {name}"] = metrics
+
+    for name, metrics in results.items():
+        print(f"{name:>30}: {metrics['us_per_op']:10.1f} us/op, {metrics['peak_kib']:8.1f} KiB peak")
+
+    return report(
+        results=results,
+        output=arguments.output,
+        baseline=arguments.baseline,
+        tolerance=arguments.tolerance,
+        benchmark="read_path",
+    )
+
+
+if __name__ == "__main__":
+    raise SystemExit(asyncio.run(main()))
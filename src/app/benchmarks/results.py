@@ -0,0 +1,89 @@
+"""
+Results of benchmark runs, stored as JSON for regression comparison.
+
+Every result is a named set of metrics, e.g. `{"memory GET /todo/{id}/":
+{"rps": 5400.0, "p95_ms": 2.1}}`. A later run is compared metric by
+metric with a stored baseline.
+"""
+import json
+import platform
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+Results = Dict[str, Dict[str, float]]
+
+LOWER_IS_BETTER = ("us_per_op", "peak_kib", "p50_ms", "p95_ms", "p99_ms")
+HIGHER_IS_BETTER = ("rps",)
+
+
+def percentile(ordered: Sequence[float], fraction: float) -> float:
+    """Nearest-rank percentile of sorted values"""
+    if not ordered:
+        return 0.0
+
+    rank = max(1, round(fraction * len(ordered)))
+    return ordered[min(rank, len(ordered)) - 1]
+
+
+def save_results(path: Path, benchmark: str, results: Results) -> None:
+    path.write_text(json.dumps(
+        {
+            "benchmark": benchmark,
+            "created_at": datetime.now(tz=timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "results": results,
+        },
+        indent=2,
+    ))
+
+
+def load_results(path: Path) -> Results:
+    return json.loads(path.read_text())["results"]
+
+
+def compare_results(baseline: Results, current: Results, tolerance: float) -> List[str]:
+    """Descriptions of metrics worse than the baseline by more than `tolerance`"""
+    regressions = []
+    for name, metrics in current.items():
+        for metric, value in metrics.items():
+            before = baseline.get(name, {}).get(metric)
+            if not before:
+                continue
+
+            if metric in LOWER_IS_BETTER:
+                change = value / before - 1
+            elif metric in HIGHER_IS_BETTER:
+                change = before / value - 1 if value else float("inf")
+            else:
+                continue
+
+            if change > tolerance:
+                regressions.append(f"{name} {metric}: {before:.2f} -> {value:.2f}")
+    return regressions
+
+
+def report(
+    results: Results,
+    output: Optional[Path],
+    baseline: Optional[Path],
+    tolerance: float,
+    benchmark: str,
+) -> int:
+    """Stores and compares results, returns the exit code: 1 on regressions"""
+    if output is not None:
+        save_results(path=output, benchmark=benchmark, results=results)
+
+    if baseline is None:
+        return 0
+
+    regressions = compare_results(
+        baseline=load_results(baseline),
+        current=results,
+        tolerance=tolerance,
+    )
+    for regression in regressions:
+        print(f"REGRESSION {regression}")
+    if not regressions:
+        print(f"No regression beyond {tolerance:.0%} against {baseline}")
+    return 1 if regressions else 0
@@ -0,0 +1,82 @@
+"""
+Compares create and get throughput of the SQLite connection profiles,
+every profile runs against a fresh database file.
+
+    cd src/app
+    python -m benchmarks.storage --mapper-mode thread_pool --operations 2000
+    python -m benchmarks.storage --concurrency 50 --group-commit-batch-size 50
+"""
+import asyncio
+from argparse import ArgumentParser, Namespace
+from datetime import datetime, timezone
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+from sqlalchemy import create_engine
+
+from entities import TodoEntry
+from persistence.database import Base, StorageSettings, sqlite_profiles
+from persistence.storage import Storage
+
+
+async def _run_profile(
+    db_path: Path,
+    profile: str,
+    arguments: Namespace,
+) -> None:
+    Base.metadata.create_all(create_engine(f"sqlite:///{db_path}"))
+    storage = Storage(settings=StorageSettings(
+        db_path=db_path,
+        mapper_mode=arguments.mapper_mode,
+        sqlite_profile=profile,
+        group_commit_max_batch_size=arguments.group_commit_batch_size,
+    ))
+    repository = storage.todo_entry_repository
+    operations = arguments.operations
+
+    async def create(worker: int) -> None:
+        for index in range(worker, operations, arguments.concurrency):
+            await repository.create(entity=TodoEntry(
+                summary=f"Lorem Ipsum {index}",
+                created_at=datetime.now(tz=timezone.utc),
+            ))
+
+    try:
+        started = perf_counter()
+        await asyncio.gather(*[create(worker) for worker in range(arguments.concurrency)])
+        create_time = perf_counter() - started
+
+        started = perf_counter()
+        for identifier in range(1, operations + 1):
+            await repository.get(identifier=identifier)
+        get_time = perf_counter() - started
+    finally:
+        await storage.dispose()
+
+    print(
+        f"{profile:>10}: create {operations / create_time:8.0f} ops/s,"
+        f" get {operations / get_time:8.0f} ops/s"
+    )
+
+
+async def main() -> None:
+    parser = ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--mapper-mode", choices=["async", "thread_pool", "memory"], default="async")
+    parser.add_argument("--operations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=1, help="Concurrent creating tasks")
+    parser.add_argument("--group-commit-batch-size", type=int, default=0, help="0 disables group commit")
+    parser.add_argument("--directory", default=None, help="Database directory, temporary by default")
+    arguments = parser.parse_args()
+
+    with TemporaryDirectory(dir=arguments.directory) as directory:
+        for profile in sqlite_profiles:
+            await _run_profile(
+                db_path=Path(directory) / f"{profile}.sqlite3",
+                profile=profile,
+                arguments=arguments,
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,52 @@
+"""
+Command line tools working on the storage configured by `TODO_STORAGE_*`
+environment variables.
+
+    cd src/app
+    python cli.py export --format csv --output todo_entries.csv
+"""
+import asyncio
+import sys
+from argparse import ArgumentParser, Namespace
+
+from apischema.export import EXPORT_CHUNK_SIZE, encode_export, export_formats
+from persistence.database import StorageSettings
+from persistence.storage import Storage
+from usecases import export_todo_entries
+
+
+async def export(arguments: Namespace) -> None:
+    storage = Storage(settings=StorageSettings())
+    output = sys.stdout.buffer if arguments.output == "-" else open(arguments.output, "wb")
+    try:
+        chunks = export_todo_entries(
+            chunk_size=arguments.chunk_size,
+            repository=storage.todo_entry_repository,
+        )
+        async for data in encode_export(
+            chunks=chunks,
+            export_format=export_formats[arguments.format],
+        ):
+            output.write(data)
+    finally:
+        if output is not sys.stdout.buffer:
+            output.close()
+        await storage.dispose()
+
+
+def main() -> None:
+    parser = ArgumentParser(description="Todo entries storage tools")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export_command = commands.add_parser("export", help="Dumps all todo entries")
+    export_command.add_argument("--format", choices=sorted(export_formats), default="ndjson")
+    export_command.add_argument("--output", default="-", help="File path, stdout by default")
+    export_command.add_argument("--chunk-size", type=int, default=EXPORT_CHUNK_SIZE)
+    export_command.set_defaults(handler=export)
+
+    arguments = parser.parse_args()
+    asyncio.run(arguments.handler(arguments))
+
+
+if __name__ == "__main__":
+    main()
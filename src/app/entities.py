@@ -1,9 +1,9 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel
 
-from value_objects import TodoLabel
+from value_objects import PageCursor, TodoLabel
 
 
 class AbstractEntity(BaseModel):
@@ -14,7 +14,19 @@ class TodoEntry(AbstractEntity):
     summary: str
     detail: Optional[str]
     created_at: datetime
+    updated_at: Optional[datetime]
     label: Optional[TodoLabel]
 
     class Config:
         orm_mode = True
+
+
+class TodoEntryPage(BaseModel):
+    items: List[TodoEntry]
+    next_cursor: Optional[PageCursor]
+
+
+class TodoEntrySearchPage(BaseModel):
+    """Ranked search results, `next_offset` is None on the last page"""
+    items: List[TodoEntry]
+    next_offset: Optional[int]
@@ -0,0 +1,231 @@
+from bisect import bisect_left
+from functools import wraps
+from math import inf
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple, TypeVar, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+Function = TypeVar("Function", bound=Callable[..., Any])
+
+# Seconds, from half a millisecond to ten seconds
+DEFAULT_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Starlette appends the charset to text media types
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _format_value(value: float) -> str:
+    if value == inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Series:
+    __slots__ = ("counts", "sum")
+
+    def __init__(self, size: int) -> None:
+        self.counts = [0] * size
+        self.sum = 0.0
+
+
+class Histogram:
+    """
+    Distribution of observed values in fixed buckets, Prometheus style.
+
+    An observation is a dict lookup, a bisection and two additions: only
+    the count of the bucket the value falls in is incremented, cumulative
+    bucket counts are summed up when rendered. Observations are expected
+    from the event loop thread, they take no lock.
+    """
+    name: str
+    documentation: str
+    label_names: Tuple[str, ...]
+    _buckets: Tuple[float, ...]
+    _series: Dict[Tuple[str, ...], _Series]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._buckets = tuple(sorted(buckets))
+        self._series = {}
+
+    def observe(self, value: float, *labels: str) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = _Series(len(self._buckets) + 1)
+
+        series.counts[bisect_left(self._buckets, value)] += 1
+        series.sum += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+
+        for labels, series in sorted(self._series.items()):
+            pairs = "".join(
+                f'{name}="{_escape(value)}",' for name, value in zip(self.label_names, labels)
+            )
+            cumulative = 0
+            for bound, count in zip((*self._buckets, inf), list(series.counts)):
+                cumulative += count
+                yield f'{self.name}_bucket{{{pairs}le="{_format_value(bound)}"}} {cumulative}'
+
+            pairs = pairs.rstrip(",")
+            yield f"{self.name}_sum{{{pairs}}} {_format_value(series.sum)}"
+            yield f"{self.name}_count{{{pairs}}} {cumulative}"
+
+
+class Counters:
+    """
+    Counters kept elsewhere, e.g. in stats dataclasses: `collect` returns
+    the value of every label tuple, it is called when rendered.
+    """
+    name: str
+    documentation: str
+    label_names: Tuple[str, ...]
+    _collect: Callable[[], Dict[Tuple[str, ...], float]]
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Dict[Tuple[str, ...], float]],
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._collect = collect
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+
+        for labels, value in sorted(self._collect().items()):
+            pairs = ",".join(
+                f'{name}="{_escape(label)}"' for name, label in zip(self.label_names, labels)
+            )
+            yield f"{self.name}{{{pairs}}} {_format_value(value)}"
+
+
+class MetricsRegistry:
+    _metrics: List[Union[Histogram, Counters]]
+
+    def __init__(self) -> None:
+        self._metrics = []
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        histogram = Histogram(
+            name=name,
+            documentation=documentation,
+            label_names=label_names,
+            buckets=buckets,
+        )
+        self._metrics.append(histogram)
+        return histogram
+
+    def counters(
+        self,
+        name: str,
+        documentation: str,
+        label_names: Sequence[str],
+        collect: Callable[[], Dict[Tuple[str, ...], float]],
+    ) -> Counters:
+        counters = Counters(
+            name=name,
+            documentation=documentation,
+            label_names=label_names,
+            collect=collect,
+        )
+        self._metrics.append(counters)
+        return counters
+
+    def unregister(self, metric: Union[Histogram, Counters]) -> None:
+        self._metrics.remove(metric)
+
+    def render(self) -> bytes:
+        """Prometheus text exposition format"""
+        lines = [line for metric in self._metrics for line in metric.render()]
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def timed(histogram: Histogram, *labels: str) -> Callable[[Function], Function]:
+    """Observes the run time of every call of the decorated function"""
+    def decorator(function: Function) -> Function:
+        @wraps(function)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            started_at = perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                histogram.observe(perf_counter() - started_at, *labels)
+
+        return wrapper
+
+    return decorator
+
+
+registry = MetricsRegistry()
+
+http_request_duration_seconds = registry.histogram(
+    name="todo_http_request_duration_seconds",
+    documentation="Time from the request to the end of the response body, per handler.",
+    label_names=("handler", "method", "status"),
+)
+
+
+class MetricsMiddleware:
+    """
+    Observes every HTTP request in `histogram`, labelled by the name of
+    the endpoint the router matched, so path parameters don't multiply
+    the series. The `_count` series are the request counts.
+    """
+    _app: ASGIApp
+    _histogram: Histogram
+
+    def __init__(self, app: ASGIApp, histogram: Histogram = http_request_duration_seconds) -> None:
+        self._app = app
+        self._histogram = histogram
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        started_at = perf_counter()
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self._app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched endpoint in the scope
+            handler = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            self._histogram.observe(
+                perf_counter() - started_at, handler, scope["method"], str(status),
+            )
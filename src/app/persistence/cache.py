@@ -0,0 +1,245 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from threading import Lock
+from time import monotonic
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Hashable,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from persistence.mapper.interfaces import TodoEntryMapperInterface
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+
+class LRUCache:
+    """
+    Bounded LRU cache with time to live for its entries.
+
+    Filling the cache after a slow load may race with an invalidation,
+    so `set` accepts the `generation` read before the load and ignores
+    the value if anything was invalidated in the meantime.
+    """
+    _entries: "OrderedDict[Hashable, Tuple[float, Any]]"
+    _max_size: int
+    _ttl: Optional[float]
+    _clock: Callable[[], float]
+    _stats: CacheStats
+    generation: int
+
+    def __init__(
+        self,
+        max_size: int,
+        ttl: Optional[float] = None,
+        clock: Callable[[], float] = monotonic,
+    ) -> None:
+        self._entries = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl
+        self._clock = clock
+        self._stats = CacheStats()
+        self.generation = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        try:
+            expires_at, value = self._entries[key]
+        except KeyError:
+            self._stats.misses += 1
+            return None
+
+        if expires_at < self._clock():
+            del self._entries[key]
+            self._stats.expirations += 1
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, generation: Optional[int] = None) -> None:
+        if generation is not None and generation != self.generation:
+            return
+
+        expires_at = float("inf") if self._ttl is None else self._clock() + self._ttl
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        self.generation += 1
+        if self._entries.pop(key, None) is not None:
+            self._stats.invalidations += 1
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._stats.invalidations += len(self._entries)
+        self._entries.clear()
+
+    @property
+    def stats(self) -> CacheStats:
+        return CacheStats(**{**vars(self._stats), "size": len(self._entries)})
+
+
+class LabelCache:
+    """
+    Process-wide map between TodoLabel ids and names of one database.
+
+    Labels are neither renamed nor deleted, so cached labels never get
+    stale and need no invalidation, labels created by other processes are
+    just missing until loaded. Past `max_size` labels nothing is added.
+
+    Thread pool mappers use it from executor workers, `_lock` keeps both
+    maps and the stats consistent with each other.
+    """
+    _names: Dict[int, str]
+    _identifiers: Dict[str, int]
+    _max_size: int
+    _stats: CacheStats
+    _lock: Lock
+
+    def __init__(self, max_size: int = 10_000) -> None:
+        self._names = {}
+        self._identifiers = {}
+        self._max_size = max_size
+        self._stats = CacheStats()
+        self._lock = Lock()
+
+    def get(self, identifier: Optional[int]) -> Optional[TodoLabel]:
+        with self._lock:
+            name = self._names.get(identifier)
+            if name is None:
+                self._stats.misses += 1
+                return None
+
+            self._stats.hits += 1
+        return TodoLabel.construct(id=identifier, name=name)
+
+    def get_by_name(self, name: str) -> Optional[TodoLabel]:
+        with self._lock:
+            identifier = self._identifiers.get(name)
+            if identifier is None:
+                self._stats.misses += 1
+                return None
+
+            self._stats.hits += 1
+        return TodoLabel.construct(id=identifier, name=name)
+
+    def missing(self, identifiers: Iterable[Optional[int]]) -> Set[int]:
+        """Identifiers not in the cache, `None` is skipped."""
+        identifiers = list(identifiers)
+        with self._lock:
+            return {
+                identifier for identifier in identifiers
+                if identifier is not None and identifier not in self._names
+            }
+
+    def add(self, value_object: TodoLabel) -> None:
+        with self._lock:
+            if len(self._names) >= self._max_size:
+                return
+
+            self._names[value_object.id] = value_object.name
+            self._identifiers[value_object.name] = value_object.id
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(**{**vars(self._stats), "size": len(self._names)})
+
+
+class CachedTodoEntryMapper(TodoEntryMapperInterface):
+    """
+    Read-through cache in front of another mapper. Writes go straight to
+    the wrapped mapper and invalidate the entity in `cache` and in the
+    optional `response_cache`, which keeps encoded responses.
+
+    Invalidation is local to the process, `ttl` bounds how stale an
+    entity changed by another worker can be.
+    """
+    _mapper: TodoEntryMapperInterface
+    _cache: LRUCache
+    _response_cache: Optional[LRUCache]
+
+    def __init__(
+        self,
+        mapper: TodoEntryMapperInterface,
+        cache: LRUCache,
+        response_cache: Optional[LRUCache] = None,
+    ) -> None:
+        self._mapper = mapper
+        self._cache = cache
+        self._response_cache = response_cache
+
+    async def get(self, identifier: int) -> TodoEntry:
+        entity = self._cache.get(identifier)
+        if entity is None:
+            generation = self._cache.generation
+            entity = await self._mapper.get(identifier=identifier)
+            self._cache.set(identifier, entity, generation=generation)
+
+        return entity
+
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        return await self._mapper.find(filters=filters, after=after, limit=limit)
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        return await self._mapper.search(query=query, offset=offset, limit=limit)
+
+    def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        return self._mapper.export(chunk_size=chunk_size)
+
+    async def create(self, entity: TodoEntry) -> TodoEntry:
+        entity = await self._mapper.create(entity=entity)
+        self._invalidate(entity.id)
+        return entity
+
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        identifiers = await self._mapper.create_many(entities=entities)
+        for identifier in identifiers:
+            self._invalidate(identifier)
+        return identifiers
+
+    async def update(self, identifier: int, fields: dict) -> TodoEntry:
+        try:
+            return await self._mapper.update(identifier=identifier, fields=fields)
+        finally:
+            self._invalidate(identifier)
+
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        try:
+            return await self._mapper.update_many(identifiers=identifiers, fields=fields)
+        finally:
+            for identifier in identifiers:
+                self._invalidate(identifier)
+
+    def _invalidate(self, identifier: int) -> None:
+        self._cache.invalidate(identifier)
+        if self._response_cache is not None:
+            self._response_cache.invalidate(identifier)
@@ -1,13 +1,219 @@
+import sqlite3
 from pathlib import Path
+from typing import Any, Dict, Literal, Optional, Tuple, Union
 
-from sqlalchemy import create_engine
+from pydantic import BaseSettings, validator
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 
 Base = declarative_base()
 
 DB_PATH = Path(__file__).resolve().parent.parent.parent.parent / "db.sqlite3"
 
-session_maker = sessionmaker(
-    bind=create_engine(f"sqlite:///{DB_PATH}"),
+# RETURNING clauses of the mappers' statements came with SQLite 3.35
+MIN_SQLITE_VERSION = (3, 35, 0)
+
+# Applied in this order, `busy_timeout` first so that switching
+# the journal mode waits for other connections.
+SQLITE_PRAGMAS = (
+    "busy_timeout",
+    "journal_mode",
+    "synchronous",
+    "foreign_keys",
+    "temp_store",
+    "cache_size",
+    "mmap_size",
 )
+
+sqlite_profiles: Dict[str, Dict[str, Union[str, int]]] = {
+    # SQLite defaults, nothing is set
+    "default": {},
+    # WAL lets readers run along a writer, every commit is still fsynced
+    "durable": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "FULL",
+        "foreign_keys": "ON",
+    },
+    # Commits are fsynced only on WAL checkpoints, a power loss may roll
+    # back the latest transactions but never corrupts the database
+    "fast": {
+        "busy_timeout": 5000,
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "foreign_keys": "ON",
+        "temp_store": "MEMORY",
+        "cache_size": -64000,
+        "mmap_size": 256 * 1024 * 1024,
+    },
+}
+
+
+class StorageSettings(BaseSettings):
+    """
+    Storage configuration, every option can be overridden by
+    `TODO_STORAGE_<OPTION>` environment variable.
+
+    The label cache takes precedence over `label_loading` and
+    `batch_label_loading`: labels aren't loaded with the entries but taken
+    from the cache, so setting either of them requires `label_cache=false`.
+    Unset, they are "joined" and "selectin".
+    """
+    db_path: Path = DB_PATH
+    mapper_mode: Literal["async", "thread_pool", "memory"] = "async"
+    thread_pool_size: int = 4
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_pre_ping: bool = False
+    pool_recycle: int = -1
+    cache_max_size: int = 0
+    cache_ttl: Optional[float] = 5.0
+    cache_responses: bool = False
+    label_loading: Optional[Literal["joined", "selectin"]] = None
+    batch_label_loading: Optional[Literal["joined", "selectin"]] = None
+    sqlite_profile: Literal["default", "durable", "fast"] = "durable"
+    sqlite_pragmas: Dict[str, Union[int, str]] = {}
+    group_commit_max_batch_size: int = 0
+    group_commit_max_wait: float = 0.002
+    read_write_split: bool = False
+    read_pool_size: int = 10
+    write_pool_size: int = 1
+    label_cache: bool = True
+    read_path: Literal["orm", "core"] = "orm"
+    tenants_path: Optional[Path] = None
+    max_open_tenants: int = 16
+
+    class Config:
+        env_prefix = "TODO_STORAGE_"
+
+    @validator("sqlite_pragmas")
+    def check_sqlite_pragmas(cls, pragmas: Dict[str, Union[int, str]]) -> Dict[str, Union[int, str]]:
+        for name, value in pragmas.items():
+            if name not in SQLITE_PRAGMAS:
+                raise ValueError(f"Unsupported pragma `{name}`.")
+            if not str(value).lstrip("-").isalnum():
+                raise ValueError(f"Invalid value `{value}` of pragma `{name}`.")
+
+        return pragmas
+
+    @validator("label_cache")
+    def check_label_loading(cls, label_cache: bool, values: Dict[str, Any]) -> bool:
+        for name in ("label_loading", "batch_label_loading"):
+            if label_cache and values.get(name) is not None:
+                raise ValueError(f"`{name}` has no effect with `label_cache`, disable it to load labels.")
+
+        return label_cache
+
+    @property
+    def pragmas(self) -> Dict[str, Union[int, str]]:
+        """Pragmas of `sqlite_profile` overridden by `sqlite_pragmas`."""
+        pragmas = {**sqlite_profiles[self.sqlite_profile], **self.sqlite_pragmas}
+        return {name: pragmas[name] for name in SQLITE_PRAGMAS if name in pragmas}
+
+
+def _database_url(driver: str, settings: StorageSettings, read_only: bool) -> str:
+    if read_only:
+        return f"{driver}:///{settings.db_path.resolve().as_uri()}?mode=ro&uri=true"
+
+    return f"{driver}:///{settings.db_path}"
+
+
+def _pool_options(settings: StorageSettings, read_only: bool) -> dict:
+    """
+    With `read_write_split` readers get a pool of `read_pool_size`, writers
+    a fixed one of `write_pool_size` connections, so that SQLite's single
+    writer lock is queued for in the pool rather than by busy waiting.
+    """
+    if not settings.read_write_split:
+        pool_size, max_overflow = settings.pool_size, settings.max_overflow
+    elif read_only:
+        pool_size, max_overflow = settings.read_pool_size, settings.max_overflow
+    else:
+        pool_size, max_overflow = settings.write_pool_size, 0
+
+    return {
+        "pool_size": pool_size,
+        "max_overflow": max_overflow,
+        "pool_timeout": settings.pool_timeout,
+        "pool_pre_ping": settings.pool_pre_ping,
+        "pool_recycle": settings.pool_recycle,
+    }
+
+
+def apply_sqlite_pragmas(engine: Engine, pragmas: Dict[str, Union[int, str]]) -> None:
+    """Executes `pragmas` on every new connection of `engine`."""
+    if not pragmas:
+        return
+
+    def on_connect(dbapi_connection: Any, connection_record: Any) -> None:
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name} = {value}")
+        finally:
+            cursor.close()
+
+    event.listen(engine, "connect", on_connect)
+
+
+def _connection_pragmas(settings: StorageSettings, read_only: bool) -> Dict[str, Union[int, str]]:
+    # The journal mode is persisted in the database file by the writer,
+    # read-only connections can't change it
+    pragmas = settings.pragmas
+    if read_only:
+        pragmas = {name: value for name, value in pragmas.items() if name != "journal_mode"}
+
+    return pragmas
+
+
+def check_sqlite_version(version_info: Tuple[int, ...] = sqlite3.sqlite_version_info) -> None:
+    """Fails on startup rather than on the first statement SQLite can't parse."""
+    if version_info < MIN_SQLITE_VERSION:
+        raise RuntimeError(
+            f"SQLite {'.'.join(map(str, MIN_SQLITE_VERSION))} or newer is required, "
+            f"{'.'.join(map(str, version_info))} is linked."
+        )
+
+
+def create_storage_engine(settings: StorageSettings, read_only: bool = False) -> Engine:
+    """
+    Engine of the database at `settings.db_path`, `read_only` one opens
+    it in read-only mode, the file must exist.
+    """
+    check_sqlite_version()
+    engine = create_engine(
+        _database_url("sqlite", settings, read_only),
+        poolclass=QueuePool,
+        connect_args={"check_same_thread": False},
+        **_pool_options(settings, read_only),
+    )
+    apply_sqlite_pragmas(engine=engine, pragmas=_connection_pragmas(settings, read_only))
+    return engine
+
+
+def create_async_storage_engine(settings: StorageSettings, read_only: bool = False) -> AsyncEngine:
+    """Non-blocking counterpart of `create_storage_engine`."""
+    check_sqlite_version()
+    engine = create_async_engine(
+        _database_url("sqlite+aiosqlite", settings, read_only),
+        poolclass=AsyncAdaptedQueuePool,
+        **_pool_options(settings, read_only),
+    )
+    apply_sqlite_pragmas(
+        engine=engine.sync_engine,
+        pragmas=_connection_pragmas(settings, read_only),
+    )
+    return engine
+
+
+def create_session_maker(engine: Engine) -> sessionmaker:
+    return sessionmaker(bind=engine)
+
+
+def create_async_session_maker(engine: AsyncEngine) -> sessionmaker:
+    return sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
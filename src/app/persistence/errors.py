@@ -12,3 +12,11 @@ class CreateError(RepositoryError):
 
 class UpdateError(RepositoryError):
     pass
+
+
+class RelatedEntityNotFoundError(UpdateError):
+    pass
+
+
+class InvalidTenantError(Exception):
+    pass
@@ -0,0 +1,88 @@
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, DefaultDict, Dict
+
+
+@dataclass
+class OperationStats:
+    calls: int = 0
+    errors: int = 0
+    queue_depth: int = 0
+    wait_time: float = 0.0
+    run_time: float = 0.0
+    max_wait_time: float = 0.0
+    max_run_time: float = 0.0
+
+
+class SessionExecutor:
+    """
+    Runs blocking session blocks on a dedicated, bounded thread pool.
+
+    Every call is accounted under an operation name: how many calls are
+    waiting for a free worker (`queue_depth`) and how long they waited
+    for it and ran on it (in seconds).
+    """
+    _pool: ThreadPoolExecutor
+    _stats: DefaultDict[str, OperationStats]
+    _lock: Lock
+
+    def __init__(self, max_workers: int = 4) -> None:
+        self._pool = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="session-executor",
+        )
+        self._stats = defaultdict(OperationStats)
+        self._lock = Lock()
+
+    async def run(self, operation: str, function: Callable, *args: Any, **kwargs: Any) -> Any:
+        stats = self._stats[operation]
+        submitted_at = perf_counter()
+
+        with self._lock:
+            stats.queue_depth += 1
+
+        def call() -> Any:
+            started_at = perf_counter()
+            with self._lock:
+                stats.queue_depth -= 1
+
+            try:
+                return function(*args, **kwargs)
+            except Exception:
+                with self._lock:
+                    stats.errors += 1
+                raise
+            finally:
+                finished_at = perf_counter()
+                with self._lock:
+                    self._record(
+                        stats=stats,
+                        wait_time=started_at - submitted_at,
+                        run_time=finished_at - started_at,
+                    )
+
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, call)
+
+    @property
+    def stats(self) -> Dict[str, OperationStats]:
+        with self._lock:
+            return {
+                operation: OperationStats(**vars(stats))
+                for operation, stats in self._stats.items()
+            }
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
+
+    @staticmethod
+    def _record(stats: OperationStats, wait_time: float, run_time: float) -> None:
+        stats.calls += 1
+        stats.wait_time += wait_time
+        stats.run_time += run_time
+        stats.max_wait_time = max(stats.max_wait_time, wait_time)
+        stats.max_run_time = max(stats.max_run_time, run_time)
@@ -0,0 +1,238 @@
+import asyncio
+from dataclasses import dataclass
+from typing import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from persistence.mapper.interfaces import (
+    TodoEntryMapperInterface,
+    TodoLabelMapperInterface,
+)
+from persistence.mapper.pagination import to_storage_datetime
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
+Item = TypeVar("Item")
+
+
+@dataclass
+class GroupCommitStats:
+    batches: int = 0
+    items: int = 0
+    max_batch_size: int = 0
+    fallbacks: int = 0
+
+
+class GroupCommit(Generic[Item]):
+    """
+    Coalesces concurrent `submit` calls into one `commit_many` call.
+
+    A batch is committed once it has `max_batch_size` items or `max_wait`
+    seconds after its first item, whichever comes first. Each caller gets
+    the id assigned to its own item. When the batch fails as a whole, its
+    items are committed one by one so that every caller gets its own
+    result or error.
+    """
+    _commit_many: Callable[[List[Item]], Awaitable[List[int]]]
+    _max_batch_size: int
+    _max_wait: float
+    _pending: List[Tuple[Item, asyncio.Future]]
+    _timer: Optional[asyncio.TimerHandle]
+    _flushes: Set[asyncio.Task]
+    _stats: GroupCommitStats
+
+    def __init__(
+        self,
+        commit_many: Callable[[List[Item]], Awaitable[List[int]]],
+        max_batch_size: int,
+        max_wait: float,
+    ) -> None:
+        self._commit_many = commit_many
+        self._max_batch_size = max_batch_size
+        self._max_wait = max_wait
+        self._pending = []
+        self._timer = None
+        self._flushes = set()
+        self._stats = GroupCommitStats()
+
+    async def submit(self, item: Item) -> int:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self._max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self._max_wait, self._flush)
+
+        return await future
+
+    async def close(self) -> None:
+        """Commits pending items and waits for running batches."""
+        self._flush()
+        if self._flushes:
+            await asyncio.wait(self._flushes)
+
+    @property
+    def stats(self) -> GroupCommitStats:
+        return GroupCommitStats(**vars(self._stats))
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+
+        task = asyncio.get_running_loop().create_task(self._commit(batch))
+        self._flushes.add(task)
+        task.add_done_callback(self._flushes.discard)
+
+    async def _commit(self, batch: List[Tuple[Item, asyncio.Future]]) -> None:
+        self._stats.batches += 1
+        self._stats.items += len(batch)
+        self._stats.max_batch_size = max(self._stats.max_batch_size, len(batch))
+
+        try:
+            identifiers = await self._commit_many([item for item, _ in batch])
+        except Exception as error:
+            if len(batch) == 1:
+                _resolve(batch[0][1], error=error)
+                return
+
+            self._stats.fallbacks += 1
+            for item, future in batch:
+                try:
+                    identifier, = await self._commit_many([item])
+                except Exception as item_error:
+                    _resolve(future, error=item_error)
+                else:
+                    _resolve(future, identifier=identifier)
+        else:
+            for (_, future), identifier in zip(batch, identifiers):
+                _resolve(future, identifier=identifier)
+
+
+def _resolve(
+    future: asyncio.Future,
+    identifier: Optional[int] = None,
+    error: Optional[BaseException] = None,
+) -> None:
+    # The caller may have been cancelled while its item was committed
+    if future.done():
+        return
+
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(identifier)
+
+
+class GroupCommitTodoEntryMapper(TodoEntryMapperInterface):
+    """
+    Routes `create` of the wrapped mapper through a `GroupCommit`,
+    concurrent creations share one transaction.
+    """
+    _mapper: TodoEntryMapperInterface
+    group_commit: GroupCommit[TodoEntry]
+
+    def __init__(
+        self,
+        mapper: TodoEntryMapperInterface,
+        max_batch_size: int,
+        max_wait: float,
+    ) -> None:
+        self._mapper = mapper
+        self.group_commit = GroupCommit(
+            commit_many=lambda entities: self._mapper.create_many(entities=entities),
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+        )
+
+    async def get(self, identifier: int) -> TodoEntry:
+        return await self._mapper.get(identifier=identifier)
+
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        return await self._mapper.find(filters=filters, after=after, limit=limit)
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        return await self._mapper.search(query=query, offset=offset, limit=limit)
+
+    def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        return self._mapper.export(chunk_size=chunk_size)
+
+    async def create(self, entity: TodoEntry) -> TodoEntry:
+        identifier = await self.group_commit.submit(entity)
+        # Same as the mappers return, the stored values
+        return entity.copy(update={
+            "id": identifier,
+            "created_at": to_storage_datetime(entity.created_at),
+            "updated_at": None,
+            "label": None,
+        })
+
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        return await self._mapper.create_many(entities=entities)
+
+    async def update(self, identifier: int, fields: dict) -> TodoEntry:
+        return await self._mapper.update(identifier=identifier, fields=fields)
+
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        return await self._mapper.update_many(identifiers=identifiers, fields=fields)
+
+
+class GroupCommitTodoLabelMapper(TodoLabelMapperInterface):
+    """
+    Same as `GroupCommitTodoEntryMapper` for TodoLabels, `get_or_create`
+    calls are coalesced into `get_or_create_many` by a group commit of
+    their own.
+    """
+    _mapper: TodoLabelMapperInterface
+    group_commit: GroupCommit[TodoLabel]
+    get_or_create_group_commit: GroupCommit[TodoLabel]
+
+    def __init__(
+        self,
+        mapper: TodoLabelMapperInterface,
+        max_batch_size: int,
+        max_wait: float,
+    ) -> None:
+        self._mapper = mapper
+        self.group_commit = GroupCommit(
+            commit_many=lambda value_objects: self._mapper.create_many(value_objects=value_objects),
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+        )
+        self.get_or_create_group_commit = GroupCommit(
+            commit_many=lambda value_objects: self._mapper.get_or_create_many(value_objects=value_objects),
+            max_batch_size=max_batch_size,
+            max_wait=max_wait,
+        )
+
+    async def create(self, value_object: TodoLabel) -> TodoLabel:
+        identifier = await self.group_commit.submit(value_object)
+        return value_object.copy(update={"id": identifier})
+
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        return await self._mapper.create_many(value_objects=value_objects)
+
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        identifier = await self.get_or_create_group_commit.submit(value_object)
+        return value_object.copy(update={"id": identifier})
+
+    async def get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        return await self._mapper.get_or_create_many(value_objects=value_objects)
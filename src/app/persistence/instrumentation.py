@@ -0,0 +1,126 @@
+from time import perf_counter
+from typing import AsyncIterator, Awaitable, List, Optional, TypeVar
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from metrics import Histogram, registry
+from persistence.mapper.interfaces import (
+    TodoEntryMapperInterface,
+    TodoLabelMapperInterface,
+)
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
+Result = TypeVar("Result")
+
+mapper_duration_seconds = registry.histogram(
+    name="todo_mapper_duration_seconds",
+    documentation="Time spent in storage mappers, per mapper and method.",
+    label_names=("mapper", "method"),
+)
+
+
+class _InstrumentedMapper:
+    _name: str
+    _histogram: Histogram
+
+    def __init__(self, name: str, histogram: Histogram) -> None:
+        self._name = name
+        self._histogram = histogram
+
+    async def _measure(self, method: str, call: Awaitable[Result]) -> Result:
+        started_at = perf_counter()
+        try:
+            return await call
+        finally:
+            self._histogram.observe(perf_counter() - started_at, self._name, method)
+
+
+class InstrumentedTodoEntryMapper(_InstrumentedMapper, TodoEntryMapperInterface):
+    """
+    Observes the duration of every call of the wrapped mapper. In thread
+    pool mode it includes the wait for a free worker. `export` observes
+    the fetch of each chunk.
+    """
+    _mapper: TodoEntryMapperInterface
+
+    def __init__(
+        self,
+        mapper: TodoEntryMapperInterface,
+        histogram: Histogram = mapper_duration_seconds,
+    ) -> None:
+        super().__init__(name=type(mapper).__name__, histogram=histogram)
+        self._mapper = mapper
+
+    async def get(self, identifier: int) -> TodoEntry:
+        return await self._measure("get", self._mapper.get(identifier=identifier))
+
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        return await self._measure(
+            "find", self._mapper.find(filters=filters, after=after, limit=limit),
+        )
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        return await self._measure(
+            "search", self._mapper.search(query=query, offset=offset, limit=limit),
+        )
+
+    async def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        chunks = self._mapper.export(chunk_size=chunk_size).__aiter__()
+        while True:
+            try:
+                rows = await self._measure("export", chunks.__anext__())
+            except StopAsyncIteration:
+                return
+
+            yield rows
+
+    async def create(self, entity: TodoEntry) -> TodoEntry:
+        return await self._measure("create", self._mapper.create(entity=entity))
+
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        return await self._measure("create_many", self._mapper.create_many(entities=entities))
+
+    async def update(self, identifier: int, fields: dict) -> TodoEntry:
+        return await self._measure(
+            "update", self._mapper.update(identifier=identifier, fields=fields),
+        )
+
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        return await self._measure(
+            "update_many", self._mapper.update_many(identifiers=identifiers, fields=fields),
+        )
+
+
+class InstrumentedTodoLabelMapper(_InstrumentedMapper, TodoLabelMapperInterface):
+    """Same as `InstrumentedTodoEntryMapper` for TodoLabels."""
+    _mapper: TodoLabelMapperInterface
+
+    def __init__(
+        self,
+        mapper: TodoLabelMapperInterface,
+        histogram: Histogram = mapper_duration_seconds,
+    ) -> None:
+        super().__init__(name=type(mapper).__name__, histogram=histogram)
+        self._mapper = mapper
+
+    async def create(self, value_object: TodoLabel) -> TodoLabel:
+        return await self._measure("create", self._mapper.create(value_object=value_object))
+
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        return await self._measure(
+            "create_many", self._mapper.create_many(value_objects=value_objects),
+        )
+
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        return await self._measure(
+            "get_or_create", self._mapper.get_or_create(value_object=value_object),
+        )
+
+    async def get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        return await self._measure(
+            "get_or_create_many", self._mapper.get_or_create_many(value_objects=value_objects),
+        )
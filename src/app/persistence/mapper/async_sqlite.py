@@ -0,0 +1,362 @@
+from datetime import datetime
+from typing import AsyncIterator, List, Optional, Sequence
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import sessionmaker
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from persistence.cache import LabelCache
+from persistence.mapper.errors import (
+    CreateMapperError,
+    EntityNotFoundMapperError,
+    RelatedEntityNotFoundMapperError,
+    UpdateMapperError,
+)
+from persistence.mapper.interfaces import (
+    TodoEntryMapperInterface,
+    TodoLabelMapperInterface,
+)
+from persistence.mapper.label_cache import LabelCacheMixin
+from persistence.mapper.pagination import make_page, to_storage_datetime
+from persistence.mapper.rows import todo_entry_from_row
+from persistence.mapper.search import make_search_page, search_terms
+from persistence.mapper.statements import (
+    LabelLoading,
+    ReadPath,
+    get_or_create_todo_labels,
+    insert_todo_entries,
+    insert_todo_labels,
+    insert_todo_label_if_missing,
+    inserted_identifiers,
+    load_todo_entry_label,
+    select_todo_entries_export,
+    select_todo_entries_page,
+    select_todo_entries_search,
+    select_todo_entry_row,
+    select_todo_entry_rows_page,
+    select_todo_entry_rows_search,
+    select_todo_label_by_name,
+    select_todo_labels,
+    update_todo_entries,
+    update_todo_entry_label,
+)
+from persistence.models import TodoEntryModel, TodoLabelModel
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
+
+class _AsyncSqliteMapper(LabelCacheMixin):
+    """Labels are looked up in `label_cache` first, when given."""
+    _storage: sessionmaker
+    _label_cache: Optional[LabelCache]
+
+    def __init__(
+        self,
+        storage: sessionmaker,
+        label_cache: Optional[LabelCache] = None,
+    ) -> None:
+        self._storage = storage
+        self._label_cache = label_cache
+
+    async def _find_label(
+        self,
+        session: AsyncSession,
+        identifier: Optional[int],
+    ) -> Optional[TodoLabel]:
+        if identifier is None:
+            return None
+
+        value_object = self._cached_label(identifier)
+        if value_object is not None:
+            return value_object
+
+        todo_label = await session.get(TodoLabelModel, ident=identifier)
+        if todo_label is None:
+            return None
+
+        value_object = TodoLabel.from_orm(todo_label)
+        self._cache_label(value_object)
+        return value_object
+
+
+class AsyncSqliteTodoEntryMapper(_AsyncSqliteMapper, TodoEntryMapperInterface):
+    """
+    Non-blocking counterpart of `SqliteTodoEntryMapper`.
+
+    `storage` must produce `AsyncSession` objects with `expire_on_commit=False`,
+    attributes can't be lazy loaded after the session is gone, so the label is
+    always loaded eagerly, `label_loading` for single entries and
+    `batch_label_loading` for pages, or taken from `label_cache` which takes
+    precedence over both. Reads use sessions of `read_storage` when given,
+    plain rows with "core" `read_path`.
+    """
+    _read_storage: sessionmaker
+    _label_loading: LabelLoading
+    _batch_label_loading: LabelLoading
+    _read_path: ReadPath
+
+    def __init__(
+        self,
+        storage: sessionmaker,
+        label_loading: Optional[LabelLoading] = None,
+        batch_label_loading: Optional[LabelLoading] = None,
+        read_storage: Optional[sessionmaker] = None,
+        label_cache: Optional[LabelCache] = None,
+        read_path: ReadPath = "orm",
+    ) -> None:
+        super().__init__(storage=storage, label_cache=label_cache)
+        self._read_storage = read_storage or storage
+        self._label_loading = label_loading or "joined"
+        self._batch_label_loading = batch_label_loading or "selectin"
+        self._read_path = read_path
+        if label_cache is not None:
+            self._label_loading = self._batch_label_loading = "noload"
+
+    async def get(self, identifier: int) -> TodoEntry:
+        try:
+            async with self._read_storage() as session:
+                if self._read_path == "core":
+                    row = (await session.execute(select_todo_entry_row(identifier))).first()
+                    if row is None:
+                        raise AttributeError
+
+                    return todo_entry_from_row(row)
+
+                todo_entry = await session.get(
+                    TodoEntryModel,
+                    ident=identifier,
+                    options=[load_todo_entry_label(self._label_loading)],
+                )
+
+                if todo_entry is None:
+                    raise AttributeError
+
+                return (await self._to_entities(session, [todo_entry]))[0]
+        except AttributeError:
+            raise EntityNotFoundMapperError(f"Entity `id:{identifier}` was not found.")
+
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        async with self._read_storage() as session:
+            if self._read_path == "core":
+                statement = select_todo_entry_rows_page(filters=filters, after=after, limit=limit)
+                return make_page(
+                    entities=[todo_entry_from_row(row) for row in await session.execute(statement)],
+                    limit=limit,
+                )
+
+            statement = select_todo_entries_page(
+                filters=filters,
+                after=after,
+                limit=limit,
+                label_loading=self._batch_label_loading,
+            )
+            todo_entries = (await session.execute(statement)).scalars().all()
+            return make_page(
+                entities=await self._to_entities(session, todo_entries),
+                limit=limit,
+            )
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        terms = search_terms(query)
+        if not terms:
+            return make_search_page(entities=[], offset=offset, limit=limit)
+
+        async with self._read_storage() as session:
+            if self._read_path == "core":
+                statement = select_todo_entry_rows_search(terms=terms, offset=offset, limit=limit)
+                return make_search_page(
+                    entities=[todo_entry_from_row(row) for row in await session.execute(statement)],
+                    offset=offset,
+                    limit=limit,
+                )
+
+            statement = select_todo_entries_search(
+                terms=terms,
+                offset=offset,
+                limit=limit,
+                label_loading=self._batch_label_loading,
+            )
+            todo_entries = (await session.execute(statement)).scalars().all()
+            return make_search_page(
+                entities=await self._to_entities(session, todo_entries),
+                offset=offset,
+                limit=limit,
+            )
+
+    async def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        after = 0
+        while True:
+            async with self._read_storage() as session:
+                statement = select_todo_entries_export(after=after, chunk_size=chunk_size)
+                result = await session.execute(statement)
+                rows = [dict(row) for row in result.mappings()]
+
+            if not rows:
+                return
+
+            yield rows
+            after = rows[-1]["id"]
+
+    async def create(self, entity: TodoEntry) -> TodoEntry:
+        try:
+            async with self._storage() as session:
+                todo_entry = TodoEntryModel(
+                    summary=entity.summary,
+                    detail=entity.detail,
+                    created_at=to_storage_datetime(entity.created_at),
+                    label=None,
+                )
+                session.add(todo_entry)
+                await session.commit()
+                return TodoEntry.from_orm(todo_entry)
+        except TypeError as error:
+            raise CreateMapperError(error)
+
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        try:
+            async with self._storage() as session:
+                identifiers = []
+                for statement in insert_todo_entries(entities):
+                    identifiers.extend(inserted_identifiers((await session.execute(statement)).scalars()))
+
+                await session.commit()
+                return identifiers
+        except TypeError as error:
+            raise CreateMapperError(error)
+
+    async def update(self, identifier: int, fields: dict) -> TodoEntry:
+        try:
+            label_id = fields.get("label_id")
+            async with self._storage() as session:
+                row = (await session.execute(update_todo_entry_label(
+                    identifier=identifier,
+                    label_id=label_id,
+                    updated_at=datetime.utcnow(),
+                ))).first()
+                if row is not None:
+                    await session.commit()
+                    return todo_entry_from_row(row)
+
+                # Nothing was written, tells a missing entry or label from a no-op
+                row = (await session.execute(select_todo_entry_row(identifier))).first()
+        except (TypeError, AttributeError) as error:
+            raise UpdateMapperError(error)
+
+        if row is None:
+            raise EntityNotFoundMapperError(f"Entity `id:{identifier}` was not found.")
+        if row.label_id != label_id:
+            raise RelatedEntityNotFoundMapperError(f"Label `id:{label_id}` was not found.")
+        return todo_entry_from_row(row)
+
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        try:
+            async with self._storage() as session:
+                label_id = fields["label_id"]
+                if await self._find_label(session, label_id) is None:
+                    raise RelatedEntityNotFoundMapperError(
+                        f"Label `id:{label_id}` was not found."
+                    )
+
+                updated = []
+                values = {"label_id": label_id, "updated_at": datetime.utcnow()}
+                for select_existing, update in update_todo_entries(identifiers, values):
+                    updated.extend((await session.execute(select_existing)).scalars())
+                    await session.execute(update)
+
+                await session.commit()
+                return updated
+        except (TypeError, KeyError) as error:
+            raise UpdateMapperError(error)
+
+    async def _to_entities(
+        self,
+        session: AsyncSession,
+        todo_entries: Sequence[TodoEntryModel],
+    ) -> List[TodoEntry]:
+        entities = [TodoEntry.from_orm(todo_entry) for todo_entry in todo_entries]
+        if self._label_cache is None:
+            return entities
+
+        missing = self._missing_label_ids(todo_entries)
+        if missing:
+            self._cache_todo_labels((await session.execute(select_todo_labels(missing))).scalars())
+
+        for entity, todo_entry in zip(entities, todo_entries):
+            if todo_entry.label_id is not None:
+                entity.label = await self._find_label(session, todo_entry.label_id)
+        return entities
+
+
+class AsyncSqliteTodoLabelMapper(_AsyncSqliteMapper, TodoLabelMapperInterface):
+    async def create(self, value_object: TodoLabel) -> TodoLabel:
+        try:
+            async with self._storage() as session:
+                todo_label = TodoLabelModel(
+                    name=value_object.name,
+                )
+                session.add(todo_label)
+                await session.commit()
+                value_object = TodoLabel.from_orm(todo_label)
+                self._cache_label(value_object)
+                return value_object
+        except (TypeError, IntegrityError) as error:
+            raise CreateMapperError(error)
+
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        try:
+            async with self._storage() as session:
+                identifiers_by_name = {}
+                for statement in insert_todo_labels(value_objects):
+                    identifiers_by_name.update((await session.execute(statement)).all())
+
+                await session.commit()
+                identifiers = [identifiers_by_name[value_object.name] for value_object in value_objects]
+                for identifier, value_object in zip(identifiers, value_objects):
+                    self._cache_label(TodoLabel.construct(id=identifier, name=value_object.name))
+                return identifiers
+        except (TypeError, IntegrityError) as error:
+            raise CreateMapperError(error)
+
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        if self._label_cache is not None:
+            cached = self._label_cache.get_by_name(value_object.name)
+            if cached is not None:
+                return cached
+
+        try:
+            async with self._storage() as session:
+                await session.execute(insert_todo_label_if_missing(value_object.name))
+                result = await session.execute(select_todo_label_by_name(value_object.name))
+                value_object = TodoLabel.from_orm(result.scalar_one())
+                await session.commit()
+                self._cache_label(value_object)
+                return value_object
+        except TypeError as error:
+            raise CreateMapperError(error)
+
+    async def get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        cached = self._cached_identifiers(value_objects)
+        if cached is not None:
+            return cached
+
+        try:
+            async with self._storage() as session:
+                identifiers_by_name = {}
+                for insert_missing, select_existing in get_or_create_todo_labels(
+                    [value_object.name for value_object in value_objects],
+                ):
+                    await session.execute(insert_missing)
+                    identifiers_by_name.update((await session.execute(select_existing)).all())
+
+                await session.commit()
+        except TypeError as error:
+            raise CreateMapperError(error)
+
+        for name, identifier in identifiers_by_name.items():
+            self._cache_label(TodoLabel.construct(id=identifier, name=name))
+        return [identifiers_by_name[value_object.name] for value_object in value_objects]
@@ -12,3 +12,7 @@ class CreateMapperError(MapperError):
 
 class UpdateMapperError(MapperError):
     pass
+
+
+class RelatedEntityNotFoundMapperError(UpdateMapperError):
+    pass
@@ -1,7 +1,8 @@
 from abc import ABCMeta, abstractmethod
+from typing import AsyncIterator, List, Optional
 
-from entities import TodoEntry
-from value_objects import TodoLabel
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
 
 
 class TodoEntryMapperInterface(metaclass=ABCMeta):
@@ -9,16 +10,59 @@ class TodoEntryMapperInterface(metaclass=ABCMeta):
     async def get(self, identifier: int) -> TodoEntry:
         """Return TodoEntry entity from persistence layer"""
 
+    @abstractmethod
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        """Returns up to `limit` TodoEntries following `after` in `(created_at, id)` order"""
+
+    @abstractmethod
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        """Returns up to `limit` TodoEntries containing every word of `query`, best match first"""
+
+    @abstractmethod
+    def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        """
+        Yields all TodoEntries in `id` order as chunks of plain rows: `id`, `summary`,
+        `detail`, `created_at`, `updated_at`, `label_id` and `label_name`
+        """
+
     @abstractmethod
     async def create(self, entity: TodoEntry) -> TodoEntry:
         """Creates new TodoEntry in persistence layer"""
 
+    @abstractmethod
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        """Creates TodoEntries in one transaction and returns their ids"""
+
     @abstractmethod
     async def update(self, identifier: int, fields: dict) -> TodoEntry:
         """Updates a TodoEntry in persistence layer"""
 
+    @abstractmethod
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        """
+        Updates TodoEntries in one transaction and returns ids of the updated ones,
+        raises `RelatedEntityNotFoundMapperError` when the label doesn't exist
+        """
+
 
 class TodoLabelMapperInterface(metaclass=ABCMeta):
     @abstractmethod
     async def create(self, value_object: TodoLabel) -> TodoLabel:
         """Creates new TodoLabel in persistence layer"""
+
+    @abstractmethod
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        """Creates TodoLabels in one transaction and returns their ids"""
+
+    @abstractmethod
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        """Returns TodoLabel of the same name, creates it when there is none"""
+
+    @abstractmethod
+    async def get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        """Same as `get_or_create` in one transaction, returns the ids"""
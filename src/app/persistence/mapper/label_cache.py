@@ -0,0 +1,44 @@
+from typing import Iterable, List, Optional, Sequence, Set
+
+from persistence.cache import LabelCache
+from persistence.models import TodoEntryModel, TodoLabelModel
+from value_objects import TodoLabel
+
+
+class LabelCacheMixin:
+    """
+    Label lookups of the SQLite mappers in `label_cache`, when given. None of
+    them does I/O, the mappers query what isn't cached with their sessions.
+    """
+    _label_cache: Optional[LabelCache]
+
+    def _cached_label(self, identifier: int) -> Optional[TodoLabel]:
+        if self._label_cache is None:
+            return None
+
+        return self._label_cache.get(identifier)
+
+    def _cache_label(self, value_object: TodoLabel) -> None:
+        if self._label_cache is not None:
+            self._label_cache.add(value_object)
+
+    def _cache_todo_labels(self, todo_labels: Iterable[TodoLabelModel]) -> None:
+        for todo_label in todo_labels:
+            self._cache_label(TodoLabel.from_orm(todo_label))
+
+    def _missing_label_ids(self, todo_entries: Sequence[TodoEntryModel]) -> Set[int]:
+        """Ids of the labels of `todo_entries` to load, none without cache"""
+        if self._label_cache is None:
+            return set()
+
+        return self._label_cache.missing(todo_entry.label_id for todo_entry in todo_entries)
+
+    def _cached_identifiers(self, value_objects: List[TodoLabel]) -> Optional[List[int]]:
+        """Ids of the labels when all of them are cached"""
+        if self._label_cache is None:
+            return None
+
+        cached = [self._label_cache.get_by_name(value_object.name) for value_object in value_objects]
+        if any(value_object is None for value_object in cached):
+            return None
+        return [value_object.id for value_object in cached]
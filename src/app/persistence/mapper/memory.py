@@ -1,71 +1,353 @@
-from random import randint
+import asyncio
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
 
-from entities import TodoEntry
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
 from persistence.mapper.errors import (
-    EntityNotFoundMapperError, 
+    EntityNotFoundMapperError,
     CreateMapperError,
+    RelatedEntityNotFoundMapperError,
     UpdateMapperError,
 )
 from persistence.mapper.interfaces import (
     TodoEntryMapperInterface,
     TodoLabelMapperInterface,
 )
-from value_objects import TodoLabel
+from persistence.mapper.pagination import make_page, to_storage_datetime
+from persistence.mapper.search import make_search_page, search_terms
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
+SortKey = Tuple[datetime, int]
+
+
+class _TodoEntryRow:
+    __slots__ = ("id", "summary", "detail", "created_at", "updated_at", "label_id")
+
+    def __init__(
+        self,
+        id: int,
+        summary: str,
+        detail: Optional[str],
+        created_at: datetime,
+        updated_at: Optional[datetime],
+        label_id: Optional[int],
+    ) -> None:
+        self.id = id
+        self.summary = summary
+        self.detail = detail
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.label_id = label_id
+
+    @property
+    def sort_key(self) -> SortKey:
+        return self.created_at, self.id
+
+
+class MemoryStorage:
+    """
+    In-memory tables shared by the memory mappers.
+
+    Entries are kept as compact rows, dates in UTC without time zone like
+    in SQLite. Ids are allocated from counters, so they are never reused.
+    `(created_at, id)` keys are kept sorted, in total and per label, for
+    keyset pagination. Mutations hold `lock`.
+    """
+    __slots__ = (
+        "entries",
+        "labels",
+        "entry_keys",
+        "entry_keys_by_label",
+        "last_entry_id",
+        "label_ids_by_name",
+        "last_label_id",
+        "lock",
+    )
+
+    entries: Dict[int, _TodoEntryRow]
+    labels: Dict[int, str]
+    label_ids_by_name: Dict[str, int]
+    entry_keys: List[SortKey]
+    entry_keys_by_label: Dict[int, List[SortKey]]
+    last_entry_id: int
+    last_label_id: int
+    lock: asyncio.Lock
+
+    def __init__(
+        self,
+        entries: Iterable[TodoEntry] = (),
+        labels: Iterable[TodoLabel] = (),
+    ) -> None:
+        self.entries = {}
+        self.labels = {}
+        self.label_ids_by_name = {}
+        self.entry_keys = []
+        self.entry_keys_by_label = {}
+        self.last_entry_id = 0
+        self.last_label_id = 0
+        self.lock = asyncio.Lock()
+
+        for label in labels:
+            self.labels[label.id] = label.name
+            self.label_ids_by_name[label.name] = label.id
+            self.last_label_id = max(self.last_label_id, label.id)
+        for entity in sorted(entries, key=lambda entity: entity.id):
+            self.insert_entry(entity=entity, identifier=entity.id)
+            if entity.label is not None:
+                self.labels.setdefault(entity.label.id, entity.label.name)
+                self.label_ids_by_name.setdefault(entity.label.name, entity.label.id)
+                self.set_entry_label(self.entries[entity.id], entity.label.id)
+
+    def insert_entry(self, entity: TodoEntry, identifier: Optional[int] = None) -> int:
+        if identifier is None:
+            identifier = self.last_entry_id + 1
+        return self.add_entry_row(self.to_entry_row(entity=entity, identifier=identifier))
+
+    def insert_entries(self, entities: List[TodoEntry]) -> List[int]:
+        """All or nothing: every row is built before any is added"""
+        rows = [
+            self.to_entry_row(entity=entity, identifier=self.last_entry_id + offset)
+            for offset, entity in enumerate(entities, start=1)
+        ]
+        return [self.add_entry_row(row) for row in rows]
+
+    def to_entry_row(self, entity: TodoEntry, identifier: int) -> _TodoEntryRow:
+        return _TodoEntryRow(
+            id=identifier,
+            summary=entity.summary,
+            detail=entity.detail,
+            created_at=to_storage_datetime(entity.created_at),
+            updated_at=None if entity.updated_at is None else to_storage_datetime(entity.updated_at),
+            label_id=None,
+        )
+
+    def add_entry_row(self, row: _TodoEntryRow) -> int:
+        self.last_entry_id = max(self.last_entry_id, row.id)
+        self.entries[row.id] = row
+        insort(self.entry_keys, row.sort_key)
+        return row.id
+
+    def insert_labels(self, value_objects: List[TodoLabel]) -> List[int]:
+        """All or nothing: names are checked against the storage and the batch first"""
+        names = set()
+        for value_object in value_objects:
+            if value_object.name in self.label_ids_by_name or value_object.name in names:
+                raise ValueError(f"Label `{value_object.name}` already exists.")
+            names.add(value_object.name)
+
+        return [self.insert_label(value_object=value_object) for value_object in value_objects]
+
+    def insert_label(self, value_object: TodoLabel) -> int:
+        if value_object.name in self.label_ids_by_name:
+            raise ValueError(f"Label `{value_object.name}` already exists.")
+
+        self.last_label_id += 1
+        self.labels[self.last_label_id] = value_object.name
+        self.label_ids_by_name[value_object.name] = self.last_label_id
+        return self.last_label_id
+
+    def set_entry_label(self, row: _TodoEntryRow, label_id: int) -> None:
+        if row.label_id is not None:
+            keys = self.entry_keys_by_label[row.label_id]
+            del keys[bisect_left(keys, row.sort_key)]
+
+        row.label_id = label_id
+        insort(self.entry_keys_by_label.setdefault(label_id, []), row.sort_key)
+
+    def to_entity(self, row: _TodoEntryRow) -> TodoEntry:
+        label = None
+        if row.label_id is not None:
+            label = TodoLabel.construct(id=row.label_id, name=self.labels[row.label_id])
+
+        return TodoEntry.construct(
+            id=row.id,
+            summary=row.summary,
+            detail=row.detail,
+            created_at=row.created_at,
+            updated_at=row.updated_at,
+            label=label,
+        )
 
 
 class MemoryTodoEntryMapper(TodoEntryMapperInterface):
-    _storage: dict
+    _storage: MemoryStorage
 
-    def __init__(self, storage: dict) -> None:
+    def __init__(self, storage: MemoryStorage) -> None:
         self._storage = storage
 
     async def get(self, identifier: int) -> TodoEntry:
         try:
-            return self._storage[identifier]
+            return self._storage.to_entity(self._storage.entries[identifier])
         except KeyError:
             raise EntityNotFoundMapperError(f"Entity `id:{identifier}` was not found.")
 
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        keys = self._storage.entry_keys
+        if filters.label_id is not None:
+            keys = self._storage.entry_keys_by_label.get(filters.label_id, [])
+
+        start = 0
+        if filters.created_after is not None:
+            start = bisect_left(keys, (to_storage_datetime(filters.created_after), 0))
+        if after is not None:
+            start = max(
+                start,
+                bisect_right(keys, (to_storage_datetime(after.created_at), after.id)),
+            )
+
+        created_before = None
+        if filters.created_before is not None:
+            created_before = to_storage_datetime(filters.created_before)
+
+        entities = []
+        for created_at, identifier in keys[start:start + limit + 1]:
+            if created_before is not None and created_at >= created_before:
+                break
+            entities.append(self._storage.to_entity(self._storage.entries[identifier]))
+
+        return make_page(entities=entities, limit=limit)
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        """
+        Naive scan of all entries, no index. Entries containing every term
+        are ranked by the number of occurrences of the terms.
+        """
+        terms = search_terms(query)
+        if not terms:
+            return make_search_page(entities=[], offset=offset, limit=limit)
+
+        ranked = []
+        for row in self._storage.entries.values():
+            words = search_terms(f"{row.summary} {row.detail or ''}")
+            if all(term in words for term in terms):
+                ranked.append((-sum(words.count(term) for term in terms), row.id))
+
+        ranked.sort()
+        return make_search_page(
+            entities=[
+                self._storage.to_entity(self._storage.entries[identifier])
+                for _, identifier in ranked[offset:offset + limit + 1]
+            ],
+            offset=offset,
+            limit=limit,
+        )
+
+    async def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        rows = list(self._storage.entries.values())
+        for start in range(0, len(rows), chunk_size):
+            yield [
+                {
+                    "id": row.id,
+                    "summary": row.summary,
+                    "detail": row.detail,
+                    "created_at": row.created_at,
+                    "updated_at": row.updated_at,
+                    "label_id": row.label_id,
+                    "label_name": self._storage.labels.get(row.label_id),
+                }
+                for row in rows[start:start + chunk_size]
+            ]
+
     async def create(self, entity: TodoEntry) -> TodoEntry:
         try:
-            entity.id = self._generate_unique_id()
-            self._storage[entity.id] = entity
-            return entity
-        except TypeError as error:
+            async with self._storage.lock:
+                identifier = self._storage.insert_entry(entity=entity)
+                return self._storage.to_entity(self._storage.entries[identifier])
+        except (TypeError, AttributeError) as error:
+            raise CreateMapperError(error)
+
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        try:
+            async with self._storage.lock:
+                return self._storage.insert_entries(entities=entities)
+        except (TypeError, AttributeError) as error:
             raise CreateMapperError(error)
 
     async def update(self, identifier: int, fields: dict) -> TodoEntry:
         try:
-            entity = self._storage[identifier]
-            label = self._storage[fields.get("label_id")]
-            entity.label = label
-            return entity
-        except (TypeError, KeyError) as error:
+            async with self._storage.lock:
+                row = self._storage.entries.get(identifier)
+                if row is None:
+                    raise EntityNotFoundMapperError(f"Entity `id:{identifier}` was not found.")
+
+                label_id = fields.get("label_id")
+                if row.label_id == label_id:
+                    return self._storage.to_entity(row)
+                if label_id not in self._storage.labels:
+                    raise RelatedEntityNotFoundMapperError(f"Label `id:{label_id}` was not found.")
+
+                self._storage.set_entry_label(row, label_id)
+                row.updated_at = datetime.utcnow()
+                return self._storage.to_entity(row)
+        except (TypeError, KeyError, AttributeError) as error:
             raise UpdateMapperError(error)
 
-    def _generate_unique_id(self) -> int:
-        identifier = randint(1, 10_000)
-        while identifier in self._storage:
-            identifier = randint(1, 10_000)
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        try:
+            async with self._storage.lock:
+                label_id = fields["label_id"]
+                if label_id not in self._storage.labels:
+                    raise RelatedEntityNotFoundMapperError(f"Label `id:{label_id}` was not found.")
+
+                updated_at = datetime.utcnow()
+                updated = []
+                for identifier in sorted(set(identifiers)):
+                    row = self._storage.entries.get(identifier)
+                    if row is not None:
+                        self._storage.set_entry_label(row, label_id)
+                        row.updated_at = updated_at
+                        updated.append(identifier)
+                return updated
+        except (TypeError, KeyError, AttributeError) as error:
+            raise UpdateMapperError(error)
 
-        return identifier
 
 class MemoryTodoLabelMapper(TodoLabelMapperInterface):
-    _storage: dict
+    _storage: MemoryStorage
 
-    def __init__(self, storage: dict) -> None:
+    def __init__(self, storage: MemoryStorage) -> None:
         self._storage = storage
 
     async def create(self, value_object: TodoLabel) -> TodoLabel:
         try:
-            value_object.id = self._generate_unique_id()
-            self._storage[value_object.id] = value_object
-            return value_object
-        except TypeError as error:
+            async with self._storage.lock:
+                identifier = self._storage.insert_label(value_object=value_object)
+                return TodoLabel.construct(id=identifier, name=value_object.name)
+        except (TypeError, ValueError, AttributeError) as error:
             raise CreateMapperError(error)
 
-    def _generate_unique_id(self) -> int:
-        identifier = randint(10_101, 20_000)
-        while identifier in self._storage:
-            identifier = randint(1, 10_000)
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        try:
+            async with self._storage.lock:
+                return self._storage.insert_labels(value_objects=value_objects)
+        except (TypeError, ValueError, AttributeError) as error:
+            raise CreateMapperError(error)
 
-        return identifier
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        try:
+            async with self._storage.lock:
+                identifier = self._storage.label_ids_by_name.get(value_object.name)
+                if identifier is None:
+                    identifier = self._storage.insert_label(value_object=value_object)
+                return TodoLabel.construct(id=identifier, name=value_object.name)
+        except (TypeError, AttributeError) as error:
+            raise CreateMapperError(error)
+
+    async def get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        try:
+            async with self._storage.lock:
+                identifiers = []
+                for value_object in value_objects:
+                    identifier = self._storage.label_ids_by_name.get(value_object.name)
+                    if identifier is None:
+                        identifier = self._storage.insert_label(value_object=value_object)
+                    identifiers.append(identifier)
+                return identifiers
+        except (TypeError, AttributeError) as error:
+            raise CreateMapperError(error)
@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+from typing import Sequence
+
+from entities import TodoEntry, TodoEntryPage
+from value_objects import PageCursor
+
+
+def to_storage_datetime(value: datetime) -> datetime:
+    """Dates are stored without time zone, in UTC"""
+    if value.tzinfo is None:
+        return value
+
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def make_page(entities: Sequence[TodoEntry], limit: int) -> TodoEntryPage:
+    items = list(entities[:limit])
+    next_cursor = None
+    if len(entities) > limit:
+        next_cursor = PageCursor(created_at=items[-1].created_at, id=items[-1].id)
+
+    return TodoEntryPage.construct(items=items, next_cursor=next_cursor)
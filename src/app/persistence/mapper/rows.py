@@ -0,0 +1,23 @@
+from sqlalchemy.engine import Row
+
+from entities import TodoEntry
+from value_objects import TodoLabel
+
+
+def todo_entry_from_row(row: Row) -> TodoEntry:
+    """
+    Builds the entity of a `_todo_entry_rows` row with `construct`: the row
+    comes from our own database, so pydantic validation is skipped.
+    """
+    label = None
+    if row.label_id is not None:
+        label = TodoLabel.construct(id=row.label_id, name=row.label_name)
+
+    return TodoEntry.construct(
+        id=row.id,
+        summary=row.summary,
+        detail=row.detail,
+        created_at=row.created_at,
+        updated_at=row.updated_at,
+        label=label,
+    )
@@ -0,0 +1,25 @@
+import re
+from typing import List, Sequence
+
+from entities import TodoEntry, TodoEntrySearchPage
+
+_TERM_PATTERN = re.compile(r"\w+")
+
+
+def search_terms(query: str) -> List[str]:
+    """
+    Words of a user query, lowercased. Operators and quotes of the FTS5
+    query syntax are dropped, so any input makes a valid query.
+    """
+    return _TERM_PATTERN.findall(query.lower())
+
+
+def to_match_query(terms: List[str]) -> str:
+    """FTS5 query matching rows which contain every term"""
+    return " ".join(f'"{term}"' for term in terms)
+
+
+def make_search_page(entities: Sequence[TodoEntry], offset: int, limit: int) -> TodoEntrySearchPage:
+    items = list(entities[:limit])
+    next_offset = offset + limit if len(entities) > limit else None
+    return TodoEntrySearchPage.construct(items=items, next_offset=next_offset)
@@ -1,94 +1,417 @@
-from sqlalchemy.orm import sessionmaker
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, List, Optional, Sequence
 
-from entities import TodoEntry
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, sessionmaker
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
+from persistence.cache import LabelCache
+from persistence.executor import SessionExecutor
 from persistence.mapper.errors import (
     CreateMapperError,
-    EntityNotFoundMapperError, 
+    EntityNotFoundMapperError,
+    RelatedEntityNotFoundMapperError,
     UpdateMapperError,
 )
 from persistence.mapper.interfaces import (
     TodoEntryMapperInterface,
     TodoLabelMapperInterface,
 )
+from persistence.mapper.label_cache import LabelCacheMixin
+from persistence.mapper.pagination import make_page, to_storage_datetime
+from persistence.mapper.rows import todo_entry_from_row
+from persistence.mapper.search import make_search_page, search_terms
+from persistence.mapper.statements import (
+    LabelLoading,
+    ReadPath,
+    get_or_create_todo_labels,
+    insert_todo_entries,
+    insert_todo_labels,
+    insert_todo_label_if_missing,
+    inserted_identifiers,
+    load_todo_entry_label,
+    select_todo_entries_export,
+    select_todo_entries_page,
+    select_todo_entries_search,
+    select_todo_entry_row,
+    select_todo_entry_rows_page,
+    select_todo_entry_rows_search,
+    select_todo_label_by_name,
+    select_todo_labels,
+    update_todo_entries,
+    update_todo_entry_label,
+)
 from persistence.models import TodoEntryModel, TodoLabelModel
-from value_objects import TodoLabel
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
 
+class _SqliteMapper(LabelCacheMixin):
+    """
+    Runs blocking session blocks inline or, when `executor` is given,
+    on its thread pool so the event loop stays free.
 
-class SqliteTodoEntryMapper(TodoEntryMapperInterface):
+    Labels are looked up in `label_cache` first, when given.
+    """
     _storage: sessionmaker
+    _executor: Optional[SessionExecutor]
+    _label_cache: Optional[LabelCache]
 
-    def __init__(self, storage: sessionmaker) -> None:
+    def __init__(
+        self,
+        storage: sessionmaker,
+        executor: Optional[SessionExecutor] = None,
+        label_cache: Optional[LabelCache] = None,
+    ) -> None:
         self._storage = storage
+        self._executor = executor
+        self._label_cache = label_cache
+
+    async def _execute(self, operation: str, function: Callable, *args: Any) -> Any:
+        if self._executor is None:
+            return function(*args)
+
+        return await self._executor.run(
+            f"{type(self).__name__}.{operation}", function, *args
+        )
+
+    def _find_label(self, session: Session, identifier: Optional[int]) -> Optional[TodoLabel]:
+        if identifier is None:
+            return None
+
+        value_object = self._cached_label(identifier)
+        if value_object is not None:
+            return value_object
+
+        todo_label = session.get(TodoLabelModel, ident=identifier)
+        if todo_label is None:
+            return None
+
+        value_object = TodoLabel.from_orm(todo_label)
+        self._cache_label(value_object)
+        return value_object
+
+
+class SqliteTodoEntryMapper(_SqliteMapper, TodoEntryMapperInterface):
+    """
+    Labels are loaded eagerly, `label_loading` ("joined" by default) for
+    single entries and `batch_label_loading` ("selectin") for pages, so
+    hydrating an entity never issues a lazy load per row. With `label_cache`,
+    which takes precedence over both, labels aren't loaded with the entries
+    but taken from the cache, only missing ones are queried.
+    Entities are built before commit, which would expire them and cost
+    a refresh SELECT.
+
+    Reads use sessions of `read_storage` when given, e.g. bound to
+    a read-only engine, writes always use `storage`. With "core"
+    `read_path` reads select plain rows, labels joined, and build the
+    entities without validation.
+    """
+    _read_storage: sessionmaker
+    _label_loading: LabelLoading
+    _batch_label_loading: LabelLoading
+    _read_path: ReadPath
+
+    def __init__(
+        self,
+        storage: sessionmaker,
+        executor: Optional[SessionExecutor] = None,
+        label_loading: Optional[LabelLoading] = None,
+        batch_label_loading: Optional[LabelLoading] = None,
+        read_storage: Optional[sessionmaker] = None,
+        label_cache: Optional[LabelCache] = None,
+        read_path: ReadPath = "orm",
+    ) -> None:
+        super().__init__(storage=storage, executor=executor, label_cache=label_cache)
+        self._read_storage = read_storage or storage
+        self._label_loading = label_loading or "joined"
+        self._batch_label_loading = batch_label_loading or "selectin"
+        self._read_path = read_path
+        if label_cache is not None:
+            self._label_loading = self._batch_label_loading = "noload"
 
     async def get(self, identifier: int) -> TodoEntry:
+        return await self._execute("get", self._get, identifier)
+
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        return await self._execute("find", self._find, filters, after, limit)
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        terms = search_terms(query)
+        if not terms:
+            return make_search_page(entities=[], offset=offset, limit=limit)
+
+        return await self._execute("search", self._search, terms, offset, limit)
+
+    async def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        after = 0
+        while True:
+            rows = await self._execute("export", self._export_chunk, after, chunk_size)
+            if not rows:
+                return
+
+            yield rows
+            after = rows[-1]["id"]
+
+    async def create(self, entity: TodoEntry) -> TodoEntry:
+        return await self._execute("create", self._create, entity)
+
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        return await self._execute("create_many", self._create_many, entities)
+
+    async def update(self, identifier: int, fields: dict) -> TodoEntry:
+        return await self._execute("update", self._update, identifier, fields)
+
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        return await self._execute("update_many", self._update_many, identifiers, fields)
+
+    def _get(self, identifier: int) -> TodoEntry:
         try:
-            with self._storage() as session:
+            with self._read_storage() as session:
+                if self._read_path == "core":
+                    row = session.execute(select_todo_entry_row(identifier)).first()
+                    if row is None:
+                        raise AttributeError
+
+                    return todo_entry_from_row(row)
+
                 todo_entry = session.get(
-                    TodoEntryModel, 
+                    TodoEntryModel,
                     ident=identifier,
+                    options=[load_todo_entry_label(self._label_loading)],
                 )
 
                 if todo_entry is None:
                     raise AttributeError
 
-                return TodoEntry.from_orm(todo_entry)
+                return self._to_entities(session, [todo_entry])[0]
         except AttributeError:
             raise EntityNotFoundMapperError(f"Entity `id:{identifier}` was not found.")
 
-    async def create(self, entity: TodoEntry) -> TodoEntry:
+    def _find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        with self._read_storage() as session:
+            if self._read_path == "core":
+                statement = select_todo_entry_rows_page(filters=filters, after=after, limit=limit)
+                return make_page(
+                    entities=[todo_entry_from_row(row) for row in session.execute(statement)],
+                    limit=limit,
+                )
+
+            statement = select_todo_entries_page(
+                filters=filters,
+                after=after,
+                limit=limit,
+                label_loading=self._batch_label_loading,
+            )
+            todo_entries = session.execute(statement).scalars().all()
+            return make_page(
+                entities=self._to_entities(session, todo_entries),
+                limit=limit,
+            )
+
+    def _search(self, terms: List[str], offset: int, limit: int) -> TodoEntrySearchPage:
+        with self._read_storage() as session:
+            if self._read_path == "core":
+                statement = select_todo_entry_rows_search(terms=terms, offset=offset, limit=limit)
+                return make_search_page(
+                    entities=[todo_entry_from_row(row) for row in session.execute(statement)],
+                    offset=offset,
+                    limit=limit,
+                )
+
+            statement = select_todo_entries_search(
+                terms=terms,
+                offset=offset,
+                limit=limit,
+                label_loading=self._batch_label_loading,
+            )
+            todo_entries = session.execute(statement).scalars().all()
+            return make_search_page(
+                entities=self._to_entities(session, todo_entries),
+                offset=offset,
+                limit=limit,
+            )
+
+    def _export_chunk(self, after: int, chunk_size: int) -> List[dict]:
+        with self._read_storage() as session:
+            statement = select_todo_entries_export(after=after, chunk_size=chunk_size)
+            return [dict(row) for row in session.execute(statement).mappings()]
+
+    def _create(self, entity: TodoEntry) -> TodoEntry:
         try:
             with self._storage() as session:
                 todo_entry = TodoEntryModel(
                     summary=entity.summary,
                     detail=entity.detail,
-                    created_at=entity.created_at,
+                    created_at=to_storage_datetime(entity.created_at),
+                    label=None,
                 )
                 session.add(todo_entry)
+                session.flush()
+                entity = TodoEntry.from_orm(todo_entry)
                 session.commit()
-                return TodoEntry.from_orm(todo_entry)
+                return entity
         except TypeError as error:
             raise CreateMapperError(error)
 
-    async def update(self, identifier: int, fields: dict) -> TodoEntry:
+    def _create_many(self, entities: List[TodoEntry]) -> List[int]:
         try:
             with self._storage() as session:
-                todo_entry = session.get(
-                    TodoEntryModel, 
-                    ident=identifier,
-                )
+                identifiers = []
+                for statement in insert_todo_entries(entities):
+                    identifiers.extend(inserted_identifiers(session.execute(statement).scalars()))
 
-                if todo_entry is None:
-                    raise AttributeError
+                session.commit()
+                return identifiers
+        except TypeError as error:
+            raise CreateMapperError(error)
 
-                label_id = fields.get("label_id")
-                todo_label = session.get(
-                    TodoLabelModel,
-                    ident=label_id,
-                )
+    def _update(self, identifier: int, fields: dict) -> TodoEntry:
+        try:
+            label_id = fields.get("label_id")
+            with self._storage() as session:
+                row = session.execute(update_todo_entry_label(
+                    identifier=identifier,
+                    label_id=label_id,
+                    updated_at=datetime.utcnow(),
+                )).first()
+                if row is not None:
+                    session.commit()
+                    return todo_entry_from_row(row)
 
-                if todo_label is not None:
-                    todo_entry.label_id = label_id
+                # Nothing was written, tells a missing entry or label from a no-op
+                row = session.execute(select_todo_entry_row(identifier)).first()
+        except (TypeError, AttributeError) as error:
+            raise UpdateMapperError(error)
+
+        if row is None:
+            raise EntityNotFoundMapperError(f"Entity `id:{identifier}` was not found.")
+        if row.label_id != label_id:
+            raise RelatedEntityNotFoundMapperError(f"Label `id:{label_id}` was not found.")
+        return todo_entry_from_row(row)
+
+    def _update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        try:
+            with self._storage() as session:
+                label_id = fields["label_id"]
+                if self._find_label(session, label_id) is None:
+                    raise RelatedEntityNotFoundMapperError(
+                        f"Label `id:{label_id}` was not found."
+                    )
+
+                updated = []
+                values = {"label_id": label_id, "updated_at": datetime.utcnow()}
+                for select_existing, update in update_todo_entries(identifiers, values):
+                    updated.extend(session.execute(select_existing).scalars())
+                    session.execute(update)
 
                 session.commit()
-                return TodoEntry.from_orm(todo_entry)
-        except (TypeError, AttributeError) as error:
+                return updated
+        except (TypeError, KeyError) as error:
             raise UpdateMapperError(error)
 
+    def _to_entities(self, session: Session, todo_entries: Sequence[TodoEntryModel]) -> List[TodoEntry]:
+        entities = [TodoEntry.from_orm(todo_entry) for todo_entry in todo_entries]
+        if self._label_cache is None:
+            return entities
 
-class SqliteTodoLabelMapper(TodoLabelMapperInterface):
-    _storage: sessionmaker
+        missing = self._missing_label_ids(todo_entries)
+        if missing:
+            self._cache_todo_labels(session.execute(select_todo_labels(missing)).scalars())
 
-    def __init__(self, storage: sessionmaker) -> None:
-        self._storage = storage
+        for entity, todo_entry in zip(entities, todo_entries):
+            if todo_entry.label_id is not None:
+                entity.label = self._find_label(session, todo_entry.label_id)
+        return entities
 
+
+class SqliteTodoLabelMapper(_SqliteMapper, TodoLabelMapperInterface):
     async def create(self, value_object: TodoLabel) -> TodoLabel:
+        return await self._execute("create", self._create, value_object)
+
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        return await self._execute("create_many", self._create_many, value_objects)
+
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        if self._label_cache is not None:
+            cached = self._label_cache.get_by_name(value_object.name)
+            if cached is not None:
+                return cached
+
+        return await self._execute("get_or_create", self._get_or_create, value_object)
+
+    async def get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        cached = self._cached_identifiers(value_objects)
+        if cached is not None:
+            return cached
+
+        return await self._execute("get_or_create_many", self._get_or_create_many, value_objects)
+
+    def _create(self, value_object: TodoLabel) -> TodoLabel:
         try:
             with self._storage() as session:
                 todo_label = TodoLabelModel(
                     name=value_object.name,
                 )
                 session.add(todo_label)
+                session.flush()
+                value_object = TodoLabel.from_orm(todo_label)
+                session.commit()
+                self._cache_label(value_object)
+                return value_object
+        except (TypeError, IntegrityError) as error:
+            raise CreateMapperError(error)
+
+    def _create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        try:
+            with self._storage() as session:
+                identifiers_by_name = {}
+                for statement in insert_todo_labels(value_objects):
+                    identifiers_by_name.update(session.execute(statement).all())
+
+                session.commit()
+                identifiers = [identifiers_by_name[value_object.name] for value_object in value_objects]
+                for identifier, value_object in zip(identifiers, value_objects):
+                    self._cache_label(TodoLabel.construct(id=identifier, name=value_object.name))
+                return identifiers
+        except (TypeError, IntegrityError) as error:
+            raise CreateMapperError(error)
+
+    def _get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        try:
+            with self._storage() as session:
+                session.execute(insert_todo_label_if_missing(value_object.name))
+                todo_label = session.execute(select_todo_label_by_name(value_object.name)).scalar_one()
+                value_object = TodoLabel.from_orm(todo_label)
+                session.commit()
+                self._cache_label(value_object)
+                return value_object
+        except TypeError as error:
+            raise CreateMapperError(error)
+
+    def _get_or_create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        try:
+            with self._storage() as session:
+                identifiers_by_name = {}
+                for insert_missing, select_existing in get_or_create_todo_labels(
+                    [value_object.name for value_object in value_objects],
+                ):
+                    session.execute(insert_missing)
+                    identifiers_by_name.update(session.execute(select_existing).all())
+
                 session.commit()
-                return TodoLabel.from_orm(todo_label)
         except TypeError as error:
             raise CreateMapperError(error)
+
+        for name, identifier in identifiers_by_name.items():
+            self._cache_label(TodoLabel.construct(id=identifier, name=name))
+        return [identifiers_by_name[value_object.name] for value_object in value_objects]
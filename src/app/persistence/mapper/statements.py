@@ -0,0 +1,331 @@
+from datetime import datetime
+from typing import Iterable, Iterator, List, Literal, Optional, Tuple
+
+from sqlalchemy import (
+    DateTime,
+    String,
+    bindparam,
+    column,
+    lambda_stmt,
+    select,
+    table,
+    text,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import joinedload, noload, selectinload
+from sqlalchemy.orm.strategy_options import Load
+from sqlalchemy.sql import StatementLambdaElement
+from sqlalchemy.sql.dml import Insert, Update
+from sqlalchemy.sql.elements import TextClause
+from sqlalchemy.sql.selectable import Select
+
+from entities import TodoEntry
+from persistence.mapper.errors import CreateMapperError
+from persistence.mapper.pagination import to_storage_datetime
+from persistence.mapper.search import to_match_query
+from persistence.models import TodoEntryModel, TodoLabelModel
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
+
+# Older SQLite builds allow at most 999 bound parameters per statement
+INSERT_CHUNK_SIZE = 300
+IN_CHUNK_SIZE = 900
+
+# Full-text index kept by triggers, see `TODO_ENTRIES_FTS_DDL`
+todo_entries_fts = table("todo_entries_fts", column("rowid"), column("rank"))
+
+LabelLoading = Literal["joined", "selectin", "noload"]
+
+# "orm" reads load models into the session, "core" reads plain rows
+ReadPath = Literal["orm", "core"]
+
+_label_loaders = {
+    "joined": joinedload,
+    "selectin": selectinload,
+    "noload": noload,
+}
+
+
+def load_todo_entry_label(strategy: LabelLoading) -> Load:
+    """
+    Eager loading of `TodoEntryModel.label`: "joined" adds a LEFT OUTER JOIN
+    to the query and suits single rows, "selectin" loads the labels of all
+    rows with one more `IN` query and suits batches. "noload" leaves the
+    label out, e.g. to take it from the label cache.
+    """
+    return _label_loaders[strategy](TodoEntryModel.label)
+
+
+def _insert_returning(model: type, rows: List[dict], returning: str) -> TextClause:
+    """
+    Multi-row INSERT of `rows` with a RETURNING clause, as text: SQLAlchemy
+    1.4 doesn't compile RETURNING for SQLite, which supports it since 3.35
+    """
+    columns = model.__table__.c
+    names = list(rows[0])
+    values = ", ".join(
+        "(" + ", ".join(f":{name}_{index}" for name in names) + ")"
+        for index in range(len(rows))
+    )
+    return text(
+        f"INSERT INTO {model.__tablename__} ({', '.join(names)}) VALUES {values} RETURNING {returning}"
+    ).bindparams(*[
+        bindparam(f"{name}_{index}", row[name], type_=columns[name].type)
+        for index, row in enumerate(rows)
+        for name in names
+    ])
+
+
+def insert_todo_entries(entities: List[TodoEntry]) -> Iterator[TextClause]:
+    """
+    Yields multi-row INSERT statements returning the ids of their rows,
+    see `inserted_identifiers`
+    """
+    for start in range(0, len(entities), INSERT_CHUNK_SIZE):
+        yield _insert_returning(
+            TodoEntryModel,
+            [
+                {
+                    "summary": entity.summary,
+                    "detail": entity.detail,
+                    "created_at": to_storage_datetime(entity.created_at),
+                }
+                for entity in entities[start:start + INSERT_CHUNK_SIZE]
+            ],
+            returning="id",
+        )
+
+
+def insert_todo_labels(value_objects: List[TodoLabel]) -> Iterator[TextClause]:
+    """
+    Same as `insert_todo_entries` for TodoLabels, returns `(name, id)`
+    rows: names are unique and tell which id is whose
+    """
+    for start in range(0, len(value_objects), INSERT_CHUNK_SIZE):
+        yield _insert_returning(
+            TodoLabelModel,
+            [{"name": value_object.name} for value_object in value_objects[start:start + INSERT_CHUNK_SIZE]],
+            returning="name, id",
+        )
+
+
+def inserted_identifiers(identifiers: Iterable[int]) -> List[int]:
+    """
+    Ids returned by an `insert_todo_entries` statement, in the order of
+    its rows.
+
+    RETURNING yields rows in no particular order. Rows are inserted in
+    order and each gets the largest rowid plus one, so the ids sorted are
+    the rows' ones. Only once the largest possible rowid is taken does
+    SQLite pick unused ones at random: the ids aren't consecutive then
+    and the order is unknown.
+    """
+    identifiers = sorted(identifiers)
+    if identifiers and identifiers[-1] - identifiers[0] != len(identifiers) - 1:
+        raise CreateMapperError("Inserted rows didn't get consecutive ids.")
+    return identifiers
+
+
+def insert_todo_label_if_missing(name: str) -> Insert:
+    return sqlite_insert(TodoLabelModel).values(name=name).on_conflict_do_nothing(
+        index_elements=[TodoLabelModel.name],
+    )
+
+
+def select_todo_label_by_name(name: str) -> Select:
+    return select(TodoLabelModel).where(TodoLabelModel.name == name)
+
+
+def get_or_create_todo_labels(names: List[str]) -> Iterator[Tuple[Insert, Select]]:
+    """
+    Yields, per chunk of names, an INSERT of the missing ones and a
+    statement selecting the ids of all of them
+    """
+    names = sorted(set(names))
+    for start in range(0, len(names), IN_CHUNK_SIZE):
+        chunk = names[start:start + IN_CHUNK_SIZE]
+        yield (
+            sqlite_insert(TodoLabelModel).values([{"name": name} for name in chunk]).on_conflict_do_nothing(
+                index_elements=[TodoLabelModel.name],
+            ),
+            select(TodoLabelModel.name, TodoLabelModel.id).where(TodoLabelModel.name.in_(chunk)),
+        )
+
+
+def select_todo_labels(identifiers: Iterable[int]) -> Select:
+    return select(TodoLabelModel).where(TodoLabelModel.id.in_(list(identifiers)))
+
+
+def update_todo_entries(
+    identifiers: List[int], values: dict
+) -> Iterator[Tuple[Select, Update]]:
+    """
+    Yields, per chunk of ids, a statement selecting the existing ones and
+    a set-based UPDATE of them
+    """
+    identifiers = sorted(set(identifiers))
+    for start in range(0, len(identifiers), IN_CHUNK_SIZE):
+        chunk = identifiers[start:start + IN_CHUNK_SIZE]
+        yield (
+            select(TodoEntryModel.id).where(TodoEntryModel.id.in_(chunk)),
+            update(TodoEntryModel).where(TodoEntryModel.id.in_(chunk)).values(**values),
+        )
+
+
+# SQLAlchemy 1.4 doesn't compile RETURNING for SQLite, which supports it since 3.35
+_update_todo_entry_label = text(
+    """
+    UPDATE todo_entries
+    SET label_id = :label_id, updated_at = :updated_at
+    WHERE id = :identifier
+        AND label_id IS NOT :label_id
+        AND EXISTS (SELECT 1 FROM todo_labels WHERE id = :label_id)
+    RETURNING id, summary, detail, created_at, updated_at, label_id,
+        (SELECT name FROM todo_labels WHERE id = :label_id) AS label_name
+    """
+).bindparams(
+    bindparam("updated_at", type_=DateTime),
+).columns(
+    TodoEntryModel.id,
+    TodoEntryModel.summary,
+    TodoEntryModel.detail,
+    TodoEntryModel.created_at,
+    TodoEntryModel.updated_at,
+    TodoEntryModel.label_id,
+    column("label_name", String),
+)
+
+
+def update_todo_entry_label(identifier: int, label_id: Optional[int], updated_at: datetime) -> TextClause:
+    """
+    Assigns the label and returns the updated row, in `_todo_entry_rows`
+    shape, in one statement. No row is returned when the entry or the label
+    doesn't exist, or the label is assigned already: nothing is written then.
+    """
+    return _update_todo_entry_label.bindparams(
+        identifier=identifier,
+        label_id=label_id,
+        updated_at=updated_at,
+    )
+
+
+# Plain rows of entries with the name of their label, see `todo_entry_from_row`
+_todo_entry_rows = (
+    select(
+        TodoEntryModel.id,
+        TodoEntryModel.summary,
+        TodoEntryModel.detail,
+        TodoEntryModel.created_at,
+        TodoEntryModel.updated_at,
+        TodoEntryModel.label_id,
+        TodoLabelModel.name.label("label_name"),
+    )
+    .outerjoin(TodoLabelModel, TodoEntryModel.label_id == TodoLabelModel.id)
+)
+
+
+def select_todo_entry_row(identifier: int) -> StatementLambdaElement:
+    """
+    Lambda statement: its construction is cached along with the SQL,
+    `identifier` is extracted as a bound parameter on every call.
+    """
+    return lambda_stmt(lambda: _todo_entry_rows.where(TodoEntryModel.id == identifier))
+
+
+def select_todo_entries_page(
+    filters: TodoEntryFilter,
+    after: Optional[PageCursor],
+    limit: int,
+    label_loading: LabelLoading = "selectin",
+) -> Select:
+    """
+    Keyset pagination in `(created_at, id)` order, served by the composite
+    indexes of `todo_entries`. One extra row tells whether a next page exists.
+    """
+    statement = select(TodoEntryModel).options(load_todo_entry_label(label_loading))
+    return _paginate(statement=statement, filters=filters, after=after, limit=limit)
+
+
+def select_todo_entry_rows_page(
+    filters: TodoEntryFilter,
+    after: Optional[PageCursor],
+    limit: int,
+) -> Select:
+    """Same as `select_todo_entries_page` for plain rows."""
+    return _paginate(statement=_todo_entry_rows, filters=filters, after=after, limit=limit)
+
+
+def _paginate(
+    statement: Select,
+    filters: TodoEntryFilter,
+    after: Optional[PageCursor],
+    limit: int,
+) -> Select:
+    statement = (
+        statement
+        .order_by(TodoEntryModel.created_at, TodoEntryModel.id)
+        .limit(limit + 1)
+    )
+
+    if filters.label_id is not None:
+        statement = statement.where(TodoEntryModel.label_id == filters.label_id)
+    if filters.created_after is not None:
+        statement = statement.where(
+            TodoEntryModel.created_at >= to_storage_datetime(filters.created_after)
+        )
+    if filters.created_before is not None:
+        statement = statement.where(
+            TodoEntryModel.created_at < to_storage_datetime(filters.created_before)
+        )
+    if after is not None:
+        statement = statement.where(
+            tuple_(TodoEntryModel.created_at, TodoEntryModel.id)
+            > tuple_(to_storage_datetime(after.created_at), after.id)
+        )
+
+    return statement
+
+
+def select_todo_entries_search(
+    terms: List[str],
+    offset: int,
+    limit: int,
+    label_loading: LabelLoading = "selectin",
+) -> Select:
+    """
+    Entries containing every term, best bm25 rank first, found through
+    the FTS5 index. One extra row tells whether a next page exists.
+    """
+    statement = select(TodoEntryModel).options(load_todo_entry_label(label_loading))
+    return _search(statement=statement, terms=terms, offset=offset, limit=limit)
+
+
+def select_todo_entry_rows_search(terms: List[str], offset: int, limit: int) -> Select:
+    """Same as `select_todo_entries_search` for plain rows."""
+    return _search(statement=_todo_entry_rows, terms=terms, offset=offset, limit=limit)
+
+
+def _search(statement: Select, terms: List[str], offset: int, limit: int) -> Select:
+    return (
+        statement
+        .join(todo_entries_fts, todo_entries_fts.c.rowid == TodoEntryModel.id)
+        .where(text("todo_entries_fts MATCH :query").bindparams(query=to_match_query(terms)))
+        .order_by(todo_entries_fts.c.rank, TodoEntryModel.id)
+        .offset(offset)
+        .limit(limit + 1)
+    )
+
+
+def select_todo_entries_export(after: int, chunk_size: int) -> Select:
+    """
+    Next chunk of export rows. Every chunk is a short query of its own,
+    so a long export neither holds a read transaction nor the memory
+    of a whole result.
+    """
+    return (
+        _todo_entry_rows
+        .where(TodoEntryModel.id > after)
+        .order_by(TodoEntryModel.id)
+        .limit(chunk_size)
+    )
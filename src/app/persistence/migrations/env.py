@@ -16,8 +16,8 @@ if config.config_file_name is not None:
 
 # add your model's MetaData object here
 # for 'autogenerate' support
-from src.app.persistence.database import Base
-from src.app.persistence.models import *
+from persistence.database import Base
+from persistence.models import *
 target_metadata = Base.metadata
 # 
 # other values from the config, defined by the needs of env.py,
@@ -57,6 +57,16 @@ def run_migrations_online() -> None:
     and associate a connection with the context.
 
     """
+    # A connection given by the caller, see `persistence.tenants.upgrade_schema`
+    connection = config.attributes.get("connection")
+    if connection is not None:
+        context.configure(
+            connection=connection, target_metadata=target_metadata
+        )
+        with context.begin_transaction():
+            context.run_migrations()
+        return
+
     connectable = engine_from_config(
         config.get_section(config.config_ini_section),
         prefix="sqlalchemy.",
@@ -0,0 +1,25 @@
+"""002_TodoEntry_updated_at
+
+Revision ID: 5c2e8d1f4b7a
+Revises: a1fd7b48c40f
+Create Date: 2026-10-18 10:12:41.532114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5c2e8d1f4b7a'
+down_revision = 'a1fd7b48c40f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('todo_entries', sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('todo_entries') as batch_op:
+        batch_op.drop_column('updated_at')
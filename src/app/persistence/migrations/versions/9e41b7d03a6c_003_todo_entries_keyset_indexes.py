@@ -0,0 +1,33 @@
+"""003_TodoEntries_keyset_indexes
+
+Revision ID: 9e41b7d03a6c
+Revises: 5c2e8d1f4b7a
+Create Date: 2026-10-18 11:02:17.904532
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '9e41b7d03a6c'
+down_revision = '5c2e8d1f4b7a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        'ix_todo_entries_created_at_id',
+        'todo_entries',
+        ['created_at', 'id'],
+    )
+    op.create_index(
+        'ix_todo_entries_label_id_created_at_id',
+        'todo_entries',
+        ['label_id', 'created_at', 'id'],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_todo_entries_label_id_created_at_id', table_name='todo_entries')
+    op.drop_index('ix_todo_entries_created_at_id', table_name='todo_entries')
@@ -0,0 +1,47 @@
+"""004_TodoLabels_unique_name
+
+Revision ID: c7d3a9e2f016
+Revises: 9e41b7d03a6c
+Create Date: 2026-10-18 15:12:40.518923
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7d3a9e2f016'
+down_revision = '9e41b7d03a6c'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Entries of duplicated labels are moved to the oldest label of the name
+    op.execute(
+        """
+        UPDATE todo_entries
+        SET label_id = (
+            SELECT MIN(duplicate.id)
+            FROM todo_labels AS label
+            JOIN todo_labels AS duplicate ON duplicate.name = label.name
+            WHERE label.id = todo_entries.label_id
+        )
+        WHERE label_id IS NOT NULL
+        """
+    )
+    op.execute(
+        """
+        DELETE FROM todo_labels
+        WHERE id NOT IN (SELECT MIN(id) FROM todo_labels GROUP BY name)
+        """
+    )
+    op.create_index(
+        'ux_todo_labels_name',
+        'todo_labels',
+        ['name'],
+        unique=True,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ux_todo_labels_name', table_name='todo_labels')
@@ -0,0 +1,60 @@
+"""005_TodoEntries_fts
+
+Revision ID: e2b6f0a41d95
+Revises: c7d3a9e2f016
+Create Date: 2026-10-18 16:40:03.117482
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2b6f0a41d95'
+down_revision = 'c7d3a9e2f016'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE VIRTUAL TABLE todo_entries_fts USING fts5(
+            summary, detail, content='todo_entries', content_rowid='id'
+        )
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER todo_entries_fts_insert AFTER INSERT ON todo_entries BEGIN
+            INSERT INTO todo_entries_fts(rowid, summary, detail)
+            VALUES (new.id, new.summary, new.detail);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER todo_entries_fts_delete AFTER DELETE ON todo_entries BEGIN
+            INSERT INTO todo_entries_fts(todo_entries_fts, rowid, summary, detail)
+            VALUES ('delete', old.id, old.summary, old.detail);
+        END
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER todo_entries_fts_update AFTER UPDATE OF summary, detail ON todo_entries BEGIN
+            INSERT INTO todo_entries_fts(todo_entries_fts, rowid, summary, detail)
+            VALUES ('delete', old.id, old.summary, old.detail);
+            INSERT INTO todo_entries_fts(rowid, summary, detail)
+            VALUES (new.id, new.summary, new.detail);
+        END
+        """
+    )
+    # Indexes the existing entries
+    op.execute("INSERT INTO todo_entries_fts(todo_entries_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER todo_entries_fts_update")
+    op.execute("DROP TRIGGER todo_entries_fts_delete")
+    op.execute("DROP TRIGGER todo_entries_fts_insert")
+    op.execute("DROP TABLE todo_entries_fts")
@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import DDL, Column, Integer, String, DateTime, ForeignKey, Index, event
 from sqlalchemy.orm import relationship
 
 from .database import Base
@@ -13,10 +13,21 @@ class TodoEntryModel(Base):
     summary = Column(String(length=26), nullable=False)
     detail = Column(String(length=255))
     created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, onupdate=datetime.utcnow)
     label_id = Column(Integer, ForeignKey(
         "todo_labels.id", 
         ondelete="CASCADE",
     ))
+    label = relationship(
+        "TodoLabelModel",
+        back_populates="todo_entries",
+        lazy="select",
+    )
+
+    __table_args__ = (
+        Index("ix_todo_entries_created_at_id", "created_at", "id"),
+        Index("ix_todo_entries_label_id_created_at_id", "label_id", "created_at", "id"),
+    )
 
     def __repr__(self) -> str:
         return f"""{self.__name__}(
@@ -29,6 +40,41 @@ class TodoEntryModel(Base):
         """
 
 
+# Full-text index of summary and detail. It is an external content FTS5
+# table, kept in sync by triggers, so it stores no copy of the texts.
+# Label changes don't touch the indexed columns and skip the triggers.
+TODO_ENTRIES_FTS_DDL = (
+    """
+    CREATE VIRTUAL TABLE todo_entries_fts USING fts5(
+        summary, detail, content='todo_entries', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER todo_entries_fts_insert AFTER INSERT ON todo_entries BEGIN
+        INSERT INTO todo_entries_fts(rowid, summary, detail)
+        VALUES (new.id, new.summary, new.detail);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_entries_fts_delete AFTER DELETE ON todo_entries BEGIN
+        INSERT INTO todo_entries_fts(todo_entries_fts, rowid, summary, detail)
+        VALUES ('delete', old.id, old.summary, old.detail);
+    END
+    """,
+    """
+    CREATE TRIGGER todo_entries_fts_update AFTER UPDATE OF summary, detail ON todo_entries BEGIN
+        INSERT INTO todo_entries_fts(todo_entries_fts, rowid, summary, detail)
+        VALUES ('delete', old.id, old.summary, old.detail);
+        INSERT INTO todo_entries_fts(rowid, summary, detail)
+        VALUES (new.id, new.summary, new.detail);
+    END
+    """,
+)
+
+for statement in TODO_ENTRIES_FTS_DDL:
+    event.listen(TodoEntryModel.__table__, "after_create", DDL(statement))
+
+
 class TodoLabelModel(Base):
     __tablename__ = "todo_labels"
 
@@ -36,10 +82,14 @@ class TodoLabelModel(Base):
     name = Column(String(length=26), nullable=False)
     todo_entries = relationship(
         "TodoEntryModel", 
-        backref="label",
+        back_populates="label",
         lazy="select",
     )
 
+    __table_args__ = (
+        Index("ux_todo_labels_name", "name", unique=True),
+    )
+
     def __repr__(self) -> str:
         return f"""{self.__name__}(
             id={self.id},
@@ -1,19 +1,23 @@
-from entities import TodoEntry
+from typing import AsyncIterator, List, Optional
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
 from persistence.errors import (
     EntityNotFoundError, 
     CreateError,
+    RelatedEntityNotFoundError,
     UpdateError,
 )
 from persistence.mapper.errors import (
     EntityNotFoundMapperError, 
     CreateMapperError,
+    RelatedEntityNotFoundMapperError,
     UpdateMapperError,
 )
 from persistence.mapper.interfaces import (
     TodoEntryMapperInterface,
     TodoLabelMapperInterface,
 )
-from value_objects import TodoLabel
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
 
 
 class TodoEntryRepository:
@@ -28,18 +32,53 @@ class TodoEntryRepository:
         except EntityNotFoundMapperError as error:
             raise EntityNotFoundError(error)
 
+    async def find(
+        self,
+        filters: TodoEntryFilter,
+        after: Optional[PageCursor],
+        limit: int,
+    ) -> TodoEntryPage:
+        return await self._mapper.find(filters=filters, after=after, limit=limit)
+
+    async def search(self, query: str, offset: int, limit: int) -> TodoEntrySearchPage:
+        return await self._mapper.search(query=query, offset=offset, limit=limit)
+
+    def export(self, chunk_size: int) -> AsyncIterator[List[dict]]:
+        return self._mapper.export(chunk_size=chunk_size)
+
     async def create(self, entity: TodoEntry) -> TodoEntry:
         try:
             return await self._mapper.create(entity=entity)
         except CreateMapperError as error:
             raise CreateError(error)
 
+    async def create_many(self, entities: List[TodoEntry]) -> List[int]:
+        try:
+            return await self._mapper.create_many(entities=entities)
+        except CreateMapperError as error:
+            raise CreateError(error)
+
     async def update(self, identifier: int, fields: dict) -> TodoEntry:
         try:
             return await self._mapper.update(
                 identifier=identifier,
                 fields=fields,
             )
+        except EntityNotFoundMapperError as error:
+            raise EntityNotFoundError(error)
+        except RelatedEntityNotFoundMapperError as error:
+            raise RelatedEntityNotFoundError(error)
+        except UpdateMapperError as error:
+            raise UpdateError(error)
+
+    async def update_many(self, identifiers: List[int], fields: dict) -> List[int]:
+        try:
+            return await self._mapper.update_many(
+                identifiers=identifiers,
+                fields=fields,
+            )
+        except RelatedEntityNotFoundMapperError as error:
+            raise RelatedEntityNotFoundError(error)
         except UpdateMapperError as error:
             raise UpdateError(error)
 
@@ -55,3 +94,15 @@ class TodoLabelRepository:
             return await self._mapper.create(value_object=value_object)
         except CreateMapperError as error:
             raise CreateError(error)
+
+    async def create_many(self, value_objects: List[TodoLabel]) -> List[int]:
+        try:
+            return await self._mapper.create_many(value_objects=value_objects)
+        except CreateMapperError as error:
+            raise CreateError(error)
+
+    async def get_or_create(self, value_object: TodoLabel) -> TodoLabel:
+        try:
+            return await self._mapper.get_or_create(value_object=value_object)
+        except CreateMapperError as error:
+            raise CreateError(error)
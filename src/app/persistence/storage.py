@@ -0,0 +1,181 @@
+from typing import List, Optional, Union
+
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from persistence.cache import CachedTodoEntryMapper, LabelCache, LRUCache
+from persistence.database import (
+    StorageSettings,
+    create_async_session_maker,
+    create_async_storage_engine,
+    create_session_maker,
+    create_storage_engine,
+)
+from persistence.executor import SessionExecutor
+from persistence.group_commit import (
+    GroupCommit,
+    GroupCommitTodoEntryMapper,
+    GroupCommitTodoLabelMapper,
+)
+from persistence.instrumentation import (
+    InstrumentedTodoEntryMapper,
+    InstrumentedTodoLabelMapper,
+)
+from persistence.mapper.async_sqlite import (
+    AsyncSqliteTodoEntryMapper,
+    AsyncSqliteTodoLabelMapper,
+)
+from persistence.mapper.memory import (
+    MemoryStorage,
+    MemoryTodoEntryMapper,
+    MemoryTodoLabelMapper,
+)
+from persistence.mapper.sqlite import (
+    SqliteTodoEntryMapper,
+    SqliteTodoLabelMapper,
+)
+from persistence.repository import (
+    TodoEntryRepository,
+    TodoLabelRepository,
+)
+
+
+class Storage:
+    """
+    Application wide storage context: the engine with its connection pool
+    and the repositories built on top of it. Created once on startup,
+    `dispose` must be awaited on shutdown.
+
+    With `read_write_split` reads go to `read_engine`, a read-only engine
+    of its own, otherwise `read_engine` is the `engine`.
+
+    "memory" mode keeps the data in process memory only, it has no engines.
+
+    In thread pool mode an `executor` shared with other storages may be
+    given, it is left running on `dispose`.
+    """
+    settings: StorageSettings
+    engine: Union[Engine, AsyncEngine, None]
+    read_engine: Union[Engine, AsyncEngine, None]
+    executor: Optional[SessionExecutor]
+    todo_entry_cache: Optional[LRUCache]
+    todo_entry_response_cache: Optional[LRUCache]
+    label_cache: Optional[LabelCache]
+    group_commits: List[GroupCommit]
+    _owns_executor: bool
+    todo_entry_repository: TodoEntryRepository
+    todo_label_repository: TodoLabelRepository
+
+    def __init__(
+        self,
+        settings: StorageSettings,
+        executor: Optional[SessionExecutor] = None,
+    ) -> None:
+        self.settings = settings
+        self.executor = None
+        self._owns_executor = executor is None
+        self.todo_entry_cache = None
+        self.todo_entry_response_cache = None
+        self.label_cache = LabelCache() if settings.label_cache else None
+        self.group_commits = []
+
+        if settings.mapper_mode == "thread_pool":
+            self.engine = create_storage_engine(settings=settings)
+            self.read_engine = self.engine
+            if settings.read_write_split:
+                self.read_engine = create_storage_engine(settings=settings, read_only=True)
+            self.executor = executor or SessionExecutor(max_workers=settings.thread_pool_size)
+            session_maker = create_session_maker(engine=self.engine)
+            todo_entry_mapper = SqliteTodoEntryMapper(
+                storage=session_maker,
+                executor=self.executor,
+                label_loading=settings.label_loading,
+                batch_label_loading=settings.batch_label_loading,
+                read_storage=create_session_maker(engine=self.read_engine),
+                label_cache=self.label_cache,
+                read_path=settings.read_path,
+            )
+            todo_label_mapper = SqliteTodoLabelMapper(
+                storage=session_maker,
+                executor=self.executor,
+                label_cache=self.label_cache,
+            )
+        elif settings.mapper_mode == "memory":
+            self.engine = self.read_engine = None
+            memory_storage = MemoryStorage()
+            todo_entry_mapper = MemoryTodoEntryMapper(storage=memory_storage)
+            todo_label_mapper = MemoryTodoLabelMapper(storage=memory_storage)
+        else:
+            self.engine = create_async_storage_engine(settings=settings)
+            self.read_engine = self.engine
+            if settings.read_write_split:
+                self.read_engine = create_async_storage_engine(settings=settings, read_only=True)
+            session_maker = create_async_session_maker(engine=self.engine)
+            todo_entry_mapper = AsyncSqliteTodoEntryMapper(
+                storage=session_maker,
+                label_loading=settings.label_loading,
+                batch_label_loading=settings.batch_label_loading,
+                read_storage=create_async_session_maker(engine=self.read_engine),
+                label_cache=self.label_cache,
+                read_path=settings.read_path,
+            )
+            todo_label_mapper = AsyncSqliteTodoLabelMapper(
+                storage=session_maker,
+                label_cache=self.label_cache,
+            )
+
+        # Measures storage time only, below group commits and caches
+        todo_entry_mapper = InstrumentedTodoEntryMapper(mapper=todo_entry_mapper)
+        todo_label_mapper = InstrumentedTodoLabelMapper(mapper=todo_label_mapper)
+
+        if settings.group_commit_max_batch_size > 1:
+            todo_entry_mapper = GroupCommitTodoEntryMapper(
+                mapper=todo_entry_mapper,
+                max_batch_size=settings.group_commit_max_batch_size,
+                max_wait=settings.group_commit_max_wait,
+            )
+            todo_label_mapper = GroupCommitTodoLabelMapper(
+                mapper=todo_label_mapper,
+                max_batch_size=settings.group_commit_max_batch_size,
+                max_wait=settings.group_commit_max_wait,
+            )
+            self.group_commits = [
+                todo_entry_mapper.group_commit,
+                todo_label_mapper.group_commit,
+                todo_label_mapper.get_or_create_group_commit,
+            ]
+
+        if settings.cache_max_size > 0:
+            self.todo_entry_cache = LRUCache(
+                max_size=settings.cache_max_size,
+                ttl=settings.cache_ttl,
+            )
+            if settings.cache_responses:
+                self.todo_entry_response_cache = LRUCache(
+                    max_size=settings.cache_max_size,
+                    ttl=settings.cache_ttl,
+                )
+            todo_entry_mapper = CachedTodoEntryMapper(
+                mapper=todo_entry_mapper,
+                cache=self.todo_entry_cache,
+                response_cache=self.todo_entry_response_cache,
+            )
+
+        self.todo_entry_repository = TodoEntryRepository(mapper=todo_entry_mapper)
+        self.todo_label_repository = TodoLabelRepository(mapper=todo_label_mapper)
+
+    async def dispose(self) -> None:
+        for group_commit in self.group_commits:
+            await group_commit.close()
+
+        if self.executor is not None and self._owns_executor:
+            self.executor.shutdown()
+
+        engines = {self.engine, self.read_engine}
+        for engine in engines:
+            if engine is None:
+                continue
+            if isinstance(engine, AsyncEngine):
+                await engine.dispose()
+            else:
+                engine.dispose()
@@ -0,0 +1,197 @@
+import asyncio
+import re
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Callable, Dict, List, Optional, Set, Tuple
+
+from alembic import command
+from alembic.config import Config
+from alembic.runtime.migration import MigrationContext
+from alembic.script import ScriptDirectory
+from sqlalchemy import create_engine
+
+from metrics import Counters, MetricsRegistry
+from persistence.database import StorageSettings
+from persistence.errors import InvalidTenantError
+from persistence.executor import SessionExecutor
+from persistence.storage import Storage
+
+MIGRATIONS_PATH = Path(__file__).resolve().parent / "migrations"
+
+TENANT_PATTERN = re.compile(r"^[a-z0-9][a-z0-9_-]{0,62}$")
+
+
+def upgrade_schema(db_path: Path) -> bool:
+    """
+    Applies pending migrations to the database at `db_path`, creating
+    it when missing. Returns whether anything was applied.
+    """
+    config = Config()
+    config.set_main_option("script_location", str(MIGRATIONS_PATH))
+    engine = create_engine(f"sqlite:///{db_path}")
+    try:
+        with engine.begin() as connection:
+            current = MigrationContext.configure(connection).get_current_revision()
+            if current == ScriptDirectory.from_config(config).get_current_head():
+                return False
+
+            # `env.py` runs the migrations on this connection
+            config.attributes["connection"] = connection
+            command.upgrade(config, "head")
+            return True
+    finally:
+        engine.dispose()
+
+
+@dataclass
+class TenantStats:
+    acquisitions: int = 0
+    opens: int = 0
+    evictions: int = 0
+    migrations: int = 0
+
+
+_stats_documentation = {
+    "acquisitions": "Requests for the storage of the tenant.",
+    "opens": "Openings of the storage of the tenant.",
+    "evictions": "Evictions of the storage of the tenant, to open another.",
+    "migrations": "Schema upgrades of the database of the tenant.",
+}
+
+
+class TenantRegistry:
+    """
+    Storages of tenants, one SQLite file `<tenants_path>/<tenant>.sqlite3`
+    per tenant, so that tenants don't share the write lock.
+
+    At most `max_open_tenants` storages are kept open, the least recently
+    used one is evicted to open another. Schema of a tenant database is
+    created or migrated when the storage is opened. In thread pool mode
+    all tenants share one executor.
+
+    Storages taken with `acquire` are leased until `release`: an evicted
+    storage is disposed once its last lease is released, not under the
+    requests still using it.
+    """
+    settings: StorageSettings
+    executor: Optional[SessionExecutor]
+    _storages: "OrderedDict[str, Storage]"
+    _leases: Dict[Storage, int]
+    _evicted: Set[Storage]
+    _stats: Dict[str, TenantStats]
+    _lock: asyncio.Lock
+
+    def __init__(self, settings: StorageSettings) -> None:
+        if settings.tenants_path is None:
+            raise ValueError("`tenants_path` is not configured.")
+
+        self.settings = settings
+        self.executor = None
+        if settings.mapper_mode == "thread_pool":
+            self.executor = SessionExecutor(max_workers=settings.thread_pool_size)
+        self._storages = OrderedDict()
+        self._leases = {}
+        self._evicted = set()
+        self._stats = {}
+        self._lock = asyncio.Lock()
+
+    async def get(self, tenant: Optional[str]) -> Storage:
+        if tenant is None:
+            raise InvalidTenantError("Tenant is not given.")
+        if not TENANT_PATTERN.match(tenant):
+            raise InvalidTenantError(f"Tenant `{tenant}` is not valid.")
+
+        stats = self._stats.setdefault(tenant, TenantStats())
+        stats.acquisitions += 1
+
+        storage = self._storages.get(tenant)
+        if storage is None:
+            async with self._lock:
+                storage = self._storages.get(tenant)
+                if storage is None:
+                    storage = await self._open(tenant=tenant, stats=stats)
+
+        self._storages.move_to_end(tenant)
+        return storage
+
+    async def acquire(self, tenant: Optional[str]) -> Storage:
+        """Same as `get`, the storage is kept open until released"""
+        storage = await self.get(tenant)
+        self._leases[storage] = self._leases.get(storage, 0) + 1
+        return storage
+
+    async def release(self, storage: Storage) -> None:
+        leases = self._leases.pop(storage) - 1
+        if leases:
+            self._leases[storage] = leases
+        elif storage in self._evicted:
+            self._evicted.discard(storage)
+            await storage.dispose()
+
+    @asynccontextmanager
+    async def lease(self, tenant: Optional[str]) -> AsyncIterator[Storage]:
+        storage = await self.acquire(tenant)
+        try:
+            yield storage
+        finally:
+            await self.release(storage)
+
+    async def dispose(self) -> None:
+        while self._storages:
+            _, storage = self._storages.popitem(last=False)
+            await storage.dispose()
+
+        while self._evicted:
+            await self._evicted.pop().dispose()
+        self._leases.clear()
+
+        if self.executor is not None:
+            self.executor.shutdown()
+
+    @property
+    def stats(self) -> Dict[str, TenantStats]:
+        return {tenant: TenantStats(**vars(stats)) for tenant, stats in self._stats.items()}
+
+    def register_metrics(self, registry: MetricsRegistry) -> List[Counters]:
+        """`todo_tenant_<stat>_total{tenant}` counters of `stats`"""
+        def collect(stat: str) -> Callable[[], Dict[Tuple[str, ...], float]]:
+            return lambda: {(tenant,): getattr(stats, stat) for tenant, stats in self._stats.items()}
+
+        return [
+            registry.counters(
+                name=f"todo_tenant_{stat}_total",
+                documentation=documentation,
+                label_names=("tenant",),
+                collect=collect(stat),
+            )
+            for stat, documentation in _stats_documentation.items()
+        ]
+
+    @property
+    def storages(self) -> Dict[str, Storage]:
+        """Open storages, the least recently used first."""
+        return dict(self._storages)
+
+    async def _open(self, tenant: str, stats: TenantStats) -> Storage:
+        db_path = self.settings.tenants_path / f"{tenant}.sqlite3"
+        self.settings.tenants_path.mkdir(parents=True, exist_ok=True)
+        if await asyncio.get_running_loop().run_in_executor(None, upgrade_schema, db_path):
+            stats.migrations += 1
+
+        while len(self._storages) >= self.settings.max_open_tenants:
+            evicted, storage = self._storages.popitem(last=False)
+            self._stats[evicted].evictions += 1
+            if storage in self._leases:
+                self._evicted.add(storage)
+            else:
+                await storage.dispose()
+
+        storage = Storage(
+            settings=self.settings.copy(update={"db_path": db_path}),
+            executor=self.executor,
+        )
+        self._storages[tenant] = storage
+        stats.opens += 1
+        return storage
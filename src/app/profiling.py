@@ -0,0 +1,133 @@
+import asyncio
+import re
+from cProfile import Profile
+from pathlib import Path
+from random import random
+from time import time
+from typing import Callable, List, Optional
+from uuid import uuid4
+
+from pydantic import BaseSettings
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+REQUEST_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class ProfilingSettings(BaseSettings):
+    """
+    Per-request profiling, off by default. Every option can be overridden
+    by `TODO_PROFILING_<OPTION>` environment variable.
+
+    A request is profiled when it has the `header` (with the `token` as
+    its value, when a token is set) or, at random, `sample_rate` of them.
+    """
+    enabled: bool = False
+    directory: Path = Path("profiles")
+    header: str = "X-Profile"
+    token: Optional[str] = None
+    sample_rate: float = 0.0
+    max_files: int = 100
+    max_bytes: int = 50 * 1024 * 1024
+
+    class Config:
+        env_prefix = "TODO_PROFILING_"
+
+
+def enforce_retention(directory: Path, max_files: int, max_bytes: int) -> List[Path]:
+    """Removes the oldest profiles beyond the limits, returns the removed ones"""
+    profiles = sorted(
+        directory.glob("*.prof"),
+        key=lambda path: (path.stat().st_mtime, path.name),
+    )
+    sizes = [path.stat().st_size for path in profiles]
+    total = sum(sizes)
+
+    removed = []
+    for path, size in zip(profiles, sizes):
+        if len(profiles) - len(removed) <= max_files and total <= max_bytes:
+            break
+
+        path.unlink(missing_ok=True)
+        removed.append(path)
+        total -= size
+    return removed
+
+
+class ProfilingMiddleware:
+    """
+    Runs triggered requests under cProfile and stores the stats to
+    `<directory>/<time>-<request id>.prof`, readable by `pstats` or
+    snakeviz. The id is taken from `X-Request-ID` or generated, it is
+    returned in `X-Profile-ID` response header.
+
+    cProfile follows the event loop thread: while the request awaits,
+    other tasks run and are profiled too, and work done on executor
+    threads only shows as waiting. One request is profiled at a time,
+    others triggered meanwhile run unprofiled.
+    """
+    _app: ASGIApp
+    _settings: ProfilingSettings
+    _random: Callable[[], float]
+    _active: bool
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        settings: ProfilingSettings,
+        random: Callable[[], float] = random,
+    ) -> None:
+        self._app = app
+        self._settings = settings
+        self._random = random
+        self._active = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self._settings.enabled or self._active:
+            await self._app(scope, receive, send)
+            return
+
+        headers = Headers(scope=scope)
+        if not self._is_triggered(headers):
+            await self._app(scope, receive, send)
+            return
+
+        request_id = headers.get("X-Request-ID", "")
+        if not REQUEST_ID_PATTERN.match(request_id):
+            request_id = uuid4().hex
+        name = f"{int(time() * 1000)}-{request_id}"
+
+        async def send_with_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message = {
+                    **message,
+                    "headers": [*message.get("headers", []), (b"x-profile-id", name.encode())],
+                }
+            await send(message)
+
+        profile = Profile()
+        self._active = True
+        profile.enable()
+        try:
+            await self._app(scope, receive, send_with_id)
+        finally:
+            profile.disable()
+            self._active = False
+            await asyncio.get_running_loop().run_in_executor(None, self._store, profile, name)
+
+    def _is_triggered(self, headers: Headers) -> bool:
+        value = headers.get(self._settings.header)
+        if value is not None and self._settings.token in (None, value):
+            return True
+
+        return self._random() < self._settings.sample_rate
+
+    def _store(self, profile: Profile, name: str) -> None:
+        directory = self._settings.directory
+        directory.mkdir(parents=True, exist_ok=True)
+        profile.dump_stats(directory / f"{name}.prof")
+        enforce_retention(
+            directory=directory,
+            max_files=self._settings.max_files,
+            max_bytes=self._settings.max_bytes,
+        )
@@ -0,0 +1,42 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from apischema.conditional import is_not_modified, make_representation
+
+_representation = make_representation(
+    content=b'{"id":1}',
+    last_modified=datetime(2022, 9, 5, 18, 7, 19, 280040),
+)
+
+
+def test_representation_headers() -> None:
+    headers = _representation.headers
+
+    assert headers["ETag"].startswith('"')
+    assert headers["Last-Modified"] == "Mon, 05 Sep 2022 18:07:19 GMT"
+    assert _representation.last_modified.tzinfo == timezone.utc
+
+
+@pytest.mark.parametrize(
+    "headers, expected",
+    [
+        ({}, False),
+        ({"if-none-match": _representation.etag}, True),
+        ({"if-none-match": f'"other", W/{_representation.etag}'}, True),
+        ({"if-none-match": "*"}, True),
+        ({"if-none-match": '"other"'}, False),
+        ({"if-modified-since": "Mon, 05 Sep 2022 18:07:19 GMT"}, True),
+        ({"if-modified-since": "Mon, 05 Sep 2022 18:07:18 GMT"}, False),
+        ({"if-modified-since": "not a date"}, False),
+        (
+            {
+                "if-none-match": '"other"',
+                "if-modified-since": "Mon, 05 Sep 2022 18:07:19 GMT",
+            },
+            False,
+        ),
+    ]
+)
+def test_is_not_modified(headers: dict, expected: bool) -> None:
+    assert is_not_modified(headers=headers, representation=_representation) is expected
@@ -1,3 +1,4 @@
+from datetime import datetime, timezone
 from json import loads
 
 from pydantic import BaseModel
@@ -8,10 +9,12 @@ from apischema.encoder import (
     base_model_to_json,
     encode_to_json_response,
     encode_error_to_json_response,
+    use_backend,
+    _backends,
 )
 from apischema.validator import SchemaError
-from entities import AbstractEntity
-from value_objects import AbstractValueObject
+from entities import AbstractEntity, TodoEntry
+from value_objects import AbstractValueObject, TodoLabel
 
 
 def test_error_to_json() -> None:
@@ -71,3 +74,33 @@ def test_encode_error_to_json_response() -> None:
     data = encode_error_to_json_response(error=error)
 
     assert isinstance(data, bytes)
+
+
+@pytest.mark.parametrize("backend", sorted(_backends))
+@pytest.mark.parametrize(
+    "base_model",
+    [
+        TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+        TodoEntry(
+            id=2,
+            summary="Lorem Ipsum",
+            detail="Dolor sit amet",
+            created_at=datetime.now(),
+            label=TodoLabel(id=3, name="Lorem"),
+        ),
+        TodoLabel(id=4, name="Lorem"),
+    ]
+)
+def test_encoder_backends(backend: str, base_model: BaseModel) -> None:
+    use_backend(backend)
+    try:
+        data = encode_to_json_response(data=base_model)
+    finally:
+        use_backend("auto")
+
+    assert loads(data) == loads(base_model.json())
+
+
+def test_unknown_encoder_backend() -> None:
+    with pytest.raises(ValueError):
+        use_backend("unknown")
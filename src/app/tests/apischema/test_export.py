@@ -0,0 +1,47 @@
+from datetime import datetime
+from json import loads
+from typing import AsyncIterator, List
+
+import pytest
+
+from apischema.export import encode_export, export_formats
+
+_rows = [
+    {
+        "id": 1,
+        "summary": "Lorem, Ipsum",
+        "detail": None,
+        "created_at": datetime(2022, 9, 5, 18, 7, 19),
+        "updated_at": None,
+        "label_id": 1,
+        "label_name": "Lorem",
+    },
+]
+
+
+async def _chunks() -> AsyncIterator[List[dict]]:
+    yield _rows
+    yield _rows
+
+
+@pytest.mark.asyncio
+async def test_ndjson_export() -> None:
+    data = b"".join([
+        chunk async for chunk in encode_export(_chunks(), export_formats["ndjson"])
+    ])
+
+    lines = data.splitlines()
+    assert len(lines) == 2
+    assert loads(lines[0])["created_at"] == "2022-09-05T18:07:19"
+
+
+@pytest.mark.asyncio
+async def test_csv_export() -> None:
+    data = b"".join([
+        chunk async for chunk in encode_export(_chunks(), export_formats["csv"])
+    ])
+
+    lines = data.decode("utf-8").splitlines()
+    assert lines[0] == "id,summary,detail,created_at,updated_at,label_id,label_name"
+    assert lines[1] == '1,"Lorem, Ipsum",,2022-09-05T18:07:19,,1,Lorem'
+    assert len(lines) == 3
@@ -0,0 +1,33 @@
+from typing import AsyncIterator, List
+
+import pytest
+
+from apischema.ndjson import iter_ndjson
+from apischema.validator import SchemaError
+
+
+async def _stream(chunks: List[bytes]) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+@pytest.mark.asyncio
+async def test_lines_split_across_chunks() -> None:
+    chunks = [b'{"summary": "Lo', b'rem"}\n\n  \n{"summary"', b': "Ipsum"}']
+
+    items = [item async for item in iter_ndjson(_stream(chunks))]
+
+    assert items == [(1, {"summary": "Lorem"}), (4, {"summary": "Ipsum"})]
+
+
+@pytest.mark.asyncio
+async def test_invalid_lines() -> None:
+    chunks = [b'{broken\n', b'{"summary": "' + b"x" * 32 + b'"}\n', b'{"id": 1}\n']
+
+    items = [item async for item in iter_ndjson(_stream(chunks), max_line_size=16)]
+
+    assert [line for line, _ in items] == [1, 2, 3]
+    assert isinstance(items[0][1], SchemaError)
+    assert items[0][1].type == "Decoding error"
+    assert items[1][1].message == "Line is longer than 16 bytes."
+    assert items[2][1] == {"id": 1}
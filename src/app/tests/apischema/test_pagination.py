@@ -0,0 +1,21 @@
+from datetime import datetime
+
+import pytest
+
+from apischema.pagination import decode_cursor, encode_cursor
+from value_objects import PageCursor
+
+
+def test_cursor_round_trip() -> None:
+    cursor = PageCursor(created_at=datetime(2022, 9, 5, 18, 7, 19, 280040), id=42)
+
+    value = encode_cursor(cursor=cursor)
+
+    assert "=" not in value
+    assert decode_cursor(value=value) == cursor
+
+
+@pytest.mark.parametrize("value", ["", "abc", "WyJmb28iXQ", "WyJmb28iLCAiYmFyIl0"])
+def test_malformed_cursor(value: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(value=value)
@@ -1,7 +1,9 @@
 from apischema.validator import (
     validate_todo_entry_creation,
+    validate_todo_entries_bulk_creation,
     validate_todo_entry_updating,
     validate_todo_label,
+    registry,
 )
 
 
@@ -39,3 +41,34 @@ def test_short_label_in_todo_label() -> None:
     assert "maxLength" in error.validation_schema
     assert "minLength" in error.validation_schema
     assert "type" in error.validation_schema
+
+
+def test_collect_all_errors() -> None:
+    data = {
+        "summary": "Lo",
+        "detail": 42,
+    }
+
+    errors = registry.validate_all("todo_entry_creation", raw_data=data)
+    assert {error.path for error in errors} == {"", "summary", "detail"}
+
+
+def test_valid_data_has_no_errors() -> None:
+    data = {
+        "summary": "Lorem Ipsum",
+        "created_at": "2022-09-05T18:07:19.280040+00:00",
+    }
+
+    assert validate_todo_entry_creation(raw_data=data) is None
+    assert registry.validate_all("todo_entry_creation", raw_data=data) == []
+
+
+def test_bulk_creation_errors_per_item() -> None:
+    data = [
+        {"summary": "Lorem Ipsum", "created_at": "2022-09-05T18:07:19.280040+00:00"},
+        {"summary": "Lo", "created_at": "2022-09-05T18:07:19.280040+00:00"},
+        {"summary": "Lorem Ipsum"},
+    ]
+
+    errors = validate_todo_entries_bulk_creation(raw_data=data)
+    assert {error.path for error in errors} == {"1.summary", "2"}
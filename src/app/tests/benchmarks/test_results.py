@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from benchmarks.results import compare_results, load_results, percentile, save_results
+
+
+def test_percentile() -> None:
+    ordered = [float(value) for value in range(1, 101)]
+
+    assert percentile(ordered, 0.5) == 50
+    assert percentile(ordered, 0.99) == 99
+    assert percentile([3.0], 0.95) == 3
+    assert percentile([], 0.5) == 0
+
+
+def test_compare_results(tmp_path: Path) -> None:
+    path = tmp_path / "baseline.json"
+    save_results(path=path, benchmark="load", results={
+        "memory all": {"rps": 1000, "p95_ms": 2.0, "requests": 10},
+        "async get": {"p95_ms": 5.0},
+    })
+
+    regressions = compare_results(
+        baseline=load_results(path),
+        current={
+            "memory all": {"rps": 800, "p95_ms": 2.1, "requests": 20},
+            "async get": {"p95_ms": 4.0},
+            "async create": {"p95_ms": 9.0},
+        },
+        tolerance=0.1,
+    )
+
+    assert regressions == ["memory all rps: 1000.00 -> 800.00"]
@@ -0,0 +1,328 @@
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from entities import TodoEntry
+from persistence.cache import LabelCache
+from persistence.database import Base
+from persistence.mapper.async_sqlite import (
+    AsyncSqliteTodoEntryMapper,
+    AsyncSqliteTodoLabelMapper,
+)
+from persistence.mapper.errors import (
+    CreateMapperError,
+    EntityNotFoundMapperError,
+    RelatedEntityNotFoundMapperError,
+)
+from value_objects import TodoEntryFilter, TodoLabel
+
+
+def _record_statements(engine: AsyncEngine) -> List[str]:
+    statements = []
+    event.listen(
+        engine.sync_engine,
+        "before_cursor_execute",
+        lambda connection, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+@pytest_asyncio.fixture
+async def storage() -> sessionmaker:
+    engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    yield sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_todo_entry(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+
+    created = await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+    entity = await mapper.get(identifier=created.id)
+
+    assert entity.id == created.id
+    assert entity.summary == "Lorem Ipsum"
+    assert entity.label is None
+
+
+@pytest.mark.asyncio
+async def test_todo_entry_not_found(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await mapper.get(identifier=42)
+
+
+@pytest.mark.asyncio
+async def test_update_todo_entry_label(storage: sessionmaker) -> None:
+    entry_mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    label_mapper = AsyncSqliteTodoLabelMapper(storage=storage)
+
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    created = await entry_mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+
+    entity = await entry_mapper.update(
+        identifier=created.id,
+        fields={"label_id": label.id},
+    )
+
+    assert entity.label == label
+    assert (await entry_mapper.get(identifier=created.id)).label == label
+
+
+@pytest.mark.asyncio
+async def test_update_not_existing_todo_entry(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await mapper.update(identifier=42, fields={"label_id": 1})
+
+
+@pytest.mark.asyncio
+async def test_update_todo_entry_with_not_existing_label(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    created = await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+
+    with pytest.raises(RelatedEntityNotFoundMapperError):
+        await mapper.update(identifier=created.id, fields={"label_id": 42})
+
+    entity = await mapper.get(identifier=created.id)
+    assert entity.label is None
+    assert entity.updated_at is None
+
+
+@pytest.mark.asyncio
+async def test_create_many_todo_entries(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+
+    identifiers = await mapper.create_many(entities=[
+        TodoEntry(summary=f"Lorem Ipsum {index}", created_at=datetime.now(tz=timezone.utc))
+        for index in range(3)
+    ])
+
+    assert identifiers == [1, 2, 3]
+    assert (await mapper.get(identifier=3)).summary == "Lorem Ipsum 2"
+
+
+@pytest.mark.asyncio
+async def test_created_at_with_offset(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    created_at = datetime(2022, 9, 27, 17, 29, 6, tzinfo=timezone(timedelta(hours=2)))
+
+    created = await mapper.create(entity=TodoEntry(summary="Lorem Ipsum", created_at=created_at))
+    identifiers = await mapper.create_many(entities=[TodoEntry(summary="Lorem Ipsum", created_at=created_at)])
+
+    assert created.created_at == datetime(2022, 9, 27, 15, 29, 6)
+    assert (await mapper.get(identifier=identifiers[0])).created_at == datetime(2022, 9, 27, 15, 29, 6)
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(created_after=datetime(2022, 9, 27, 15, 29, tzinfo=timezone.utc)),
+        after=None,
+        limit=10,
+    )
+    assert [entity.id for entity in page.items] == [created.id, identifiers[0]]
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(created_after=datetime(2022, 9, 27, 17, 30, tzinfo=timezone(timedelta(hours=2)))),
+        after=None,
+        limit=10,
+    )
+    assert page.items == []
+
+
+@pytest.mark.asyncio
+async def test_update_many_todo_entries(storage: sessionmaker) -> None:
+    entry_mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    label_mapper = AsyncSqliteTodoLabelMapper(storage=storage)
+
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(2)
+    ])
+
+    updated = await entry_mapper.update_many(
+        identifiers=[*identifiers, 42],
+        fields={"label_id": label.id},
+    )
+
+    assert updated == identifiers
+    assert (await entry_mapper.get(identifier=identifiers[1])).label == label
+
+    with pytest.raises(RelatedEntityNotFoundMapperError):
+        await entry_mapper.update_many(identifiers=identifiers, fields={"label_id": 42})
+
+
+@pytest.mark.asyncio
+async def test_export_todo_entries(storage: sessionmaker) -> None:
+    entry_mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    label_mapper = AsyncSqliteTodoLabelMapper(storage=storage)
+
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(5)
+    ])
+    await entry_mapper.update_many(identifiers=identifiers[:1], fields={"label_id": label.id})
+
+    chunks = [rows async for rows in entry_mapper.export(chunk_size=2)]
+
+    assert [len(rows) for rows in chunks] == [2, 2, 1]
+    assert [row["id"] for rows in chunks for row in rows] == identifiers
+    assert chunks[0][0]["label_name"] == "Lorem"
+    assert chunks[0][1]["label_id"] is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("label_loading", ["joined", "selectin"])
+async def test_statements_per_operation(storage: sessionmaker, label_loading: str) -> None:
+    entry_mapper = AsyncSqliteTodoEntryMapper(
+        storage=storage,
+        label_loading=label_loading,
+        batch_label_loading=label_loading,
+    )
+    label_mapper = AsyncSqliteTodoLabelMapper(storage=storage)
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(10)
+    ])
+    await entry_mapper.update_many(identifiers=identifiers, fields={"label_id": label.id})
+    statements = _record_statements(storage.kw["bind"])
+    single_selects = 1 if label_loading == "joined" else 2
+
+    statements.clear()
+    assert (await entry_mapper.get(identifier=identifiers[0])).label == label
+    assert len(statements) == single_selects
+
+    statements.clear()
+    page = await entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=10)
+    assert all(entity.label == label for entity in page.items)
+    assert len(statements) == single_selects
+
+    other_label = await label_mapper.create(value_object=TodoLabel(name="Dolor"))
+    statements.clear()
+    entity = await entry_mapper.update(identifier=identifiers[1], fields={"label_id": other_label.id})
+    assert entity.label == other_label
+    # UPDATE ... RETURNING the entry with its label
+    assert len(statements) == 1
+
+    statements.clear()
+    entity = await entry_mapper.update(identifier=identifiers[1], fields={"label_id": other_label.id})
+    assert entity.label == other_label
+    # UPDATE matching nothing, the entry with its label, no commit
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_todo_label(storage: sessionmaker) -> None:
+    label_cache = LabelCache()
+    mapper = AsyncSqliteTodoLabelMapper(storage=storage, label_cache=label_cache)
+
+    created = await mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+
+    # another process has no cached labels
+    assert await AsyncSqliteTodoLabelMapper(storage=storage).get_or_create(
+        value_object=TodoLabel(name="Lorem"),
+    ) == created
+    assert label_cache.get_by_name("Lorem") == created
+
+    with pytest.raises(CreateMapperError):
+        await mapper.create(value_object=TodoLabel(name="Lorem"))
+
+
+@pytest.mark.asyncio
+async def test_statements_with_label_cache(storage: sessionmaker) -> None:
+    label_cache = LabelCache()
+    entry_mapper = AsyncSqliteTodoEntryMapper(storage=storage, label_cache=label_cache)
+    label_mapper = AsyncSqliteTodoLabelMapper(storage=storage, label_cache=label_cache)
+    label = await label_mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(10)
+    ])
+    await entry_mapper.update_many(identifiers=identifiers, fields={"label_id": label.id})
+    statements = _record_statements(storage.kw["bind"])
+
+    statements.clear()
+    assert (await entry_mapper.get(identifier=identifiers[0])).label == label
+    page = await entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=10)
+    assert all(entity.label == label for entity in page.items)
+    assert len(statements) == 2
+
+    statements.clear()
+    entity = await entry_mapper.update(identifier=identifiers[1], fields={"label_id": label.id})
+    assert entity.label == label
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_search_todo_entries(storage: sessionmaker) -> None:
+    mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    identifiers = await mapper.create_many(entities=[
+        TodoEntry(summary=summary, detail=detail, created_at=datetime.now(tz=timezone.utc))
+        for summary, detail in [
+            ("Buy milk", None),
+            ("Call mom", "Ask about milk"),
+            ("Milk run", "milk, MILK and bread"),
+            ("Read a book", None),
+        ]
+    ])
+
+    page = await mapper.search(query="milk", offset=0, limit=2)
+    assert [entity.id for entity in page.items] == [identifiers[2], identifiers[0]]
+    assert page.next_offset == 2
+
+    page = await mapper.search(query="milk", offset=2, limit=2)
+    assert [entity.id for entity in page.items] == [identifiers[1]]
+    assert page.next_offset is None
+
+    assert [entity.id for entity in (await mapper.search(query="Milk bread", offset=0, limit=10)).items] == [identifiers[2]]
+    assert (await mapper.search(query='"mil* OR', offset=0, limit=10)).items == []
+
+
+@pytest.mark.asyncio
+async def test_core_read_path(storage: sessionmaker) -> None:
+    orm_mapper = AsyncSqliteTodoEntryMapper(storage=storage)
+    core_mapper = AsyncSqliteTodoEntryMapper(storage=storage, read_path="core")
+    label = await AsyncSqliteTodoLabelMapper(storage=storage).create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await orm_mapper.create_many(entities=[
+        TodoEntry(summary=f"Lorem Ipsum {index}", created_at=datetime.now(tz=timezone.utc))
+        for index in range(5)
+    ])
+    await orm_mapper.update_many(identifiers=identifiers[:2], fields={"label_id": label.id})
+    statements = _record_statements(storage.kw["bind"])
+
+    entity = await core_mapper.get(identifier=identifiers[0])
+    assert len(statements) == 1
+    assert entity == await orm_mapper.get(identifier=identifiers[0])
+    assert await core_mapper.get(identifier=identifiers[3]) == await orm_mapper.get(identifier=identifiers[3])
+
+    statements.clear()
+    page = await core_mapper.find(filters=TodoEntryFilter(), after=None, limit=3)
+    assert len(statements) == 1
+    assert page == await orm_mapper.find(filters=TodoEntryFilter(), after=None, limit=3)
+    assert page.items[0].label == label
+
+    search_page = await core_mapper.search(query="lorem", offset=0, limit=3)
+    assert search_page == await orm_mapper.search(query="lorem", offset=0, limit=3)
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await core_mapper.get(identifier=42)
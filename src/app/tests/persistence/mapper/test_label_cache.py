@@ -0,0 +1,34 @@
+from typing import Optional
+
+from persistence.cache import LabelCache
+from persistence.mapper.label_cache import LabelCacheMixin
+from persistence.models import TodoEntryModel, TodoLabelModel
+from value_objects import TodoLabel
+
+
+class _Mapper(LabelCacheMixin):
+    def __init__(self, label_cache: Optional[LabelCache]) -> None:
+        self._label_cache = label_cache
+
+
+def test_label_cache_mixin() -> None:
+    mapper = _Mapper(label_cache=LabelCache())
+    mapper._cache_todo_labels([TodoLabelModel(id=1, name="Lorem")])
+    mapper._cache_label(TodoLabel(id=2, name="Ipsum"))
+
+    assert mapper._cached_label(1) == TodoLabel(id=1, name="Lorem")
+    assert mapper._cached_label(3) is None
+    assert mapper._cached_identifiers([TodoLabel(name="Ipsum"), TodoLabel(name="Lorem")]) == [2, 1]
+    assert mapper._cached_identifiers([TodoLabel(name="Ipsum"), TodoLabel(name="Dolor")]) is None
+    assert mapper._missing_label_ids([
+        TodoEntryModel(label_id=1), TodoEntryModel(label_id=3), TodoEntryModel(label_id=None),
+    ]) == {3}
+
+
+def test_label_cache_mixin_without_cache() -> None:
+    mapper = _Mapper(label_cache=None)
+    mapper._cache_label(TodoLabel(id=1, name="Lorem"))
+
+    assert mapper._cached_label(1) is None
+    assert mapper._cached_identifiers([TodoLabel(name="Lorem")]) is None
+    assert mapper._missing_label_ids([TodoEntryModel(label_id=1)]) == set()
@@ -0,0 +1,180 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from entities import TodoEntry
+from persistence.mapper.errors import (
+    CreateMapperError,
+    EntityNotFoundMapperError,
+    RelatedEntityNotFoundMapperError,
+)
+from persistence.mapper.memory import (
+    MemoryStorage,
+    MemoryTodoEntryMapper,
+    MemoryTodoLabelMapper,
+)
+from value_objects import TodoEntryFilter, TodoLabel
+
+
+@pytest.mark.asyncio
+async def test_monotonic_identifiers() -> None:
+    storage = MemoryStorage()
+    entry_mapper = MemoryTodoEntryMapper(storage=storage)
+    label_mapper = MemoryTodoLabelMapper(storage=storage)
+
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(10_001)
+    ])
+    entity = await entry_mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+
+    assert identifiers == list(range(1, 10_002))
+    assert entity.id == 10_002
+    assert label.id == 1
+    assert (await entry_mapper.get(identifier=1)).label is None
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await entry_mapper.get(identifier=10_003)
+
+
+@pytest.mark.asyncio
+async def test_created_at_with_offset() -> None:
+    mapper = MemoryTodoEntryMapper(storage=MemoryStorage())
+    created_at = datetime(2022, 9, 27, 17, 29, 6, tzinfo=timezone(timedelta(hours=2)))
+
+    created = await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=created_at, updated_at=created_at),
+    )
+    identifiers = await mapper.create_many(entities=[TodoEntry(summary="Lorem Ipsum", created_at=created_at)])
+
+    assert created.created_at == datetime(2022, 9, 27, 15, 29, 6)
+    assert created.updated_at == datetime(2022, 9, 27, 15, 29, 6)
+    assert (await mapper.get(identifier=identifiers[0])).created_at == datetime(2022, 9, 27, 15, 29, 6)
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(created_after=datetime(2022, 9, 27, 15, 29, tzinfo=timezone.utc)),
+        after=None,
+        limit=10,
+    )
+    assert [entity.id for entity in page.items] == [created.id, identifiers[0]]
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(created_after=datetime(2022, 9, 27, 17, 30, tzinfo=timezone(timedelta(hours=2)))),
+        after=None,
+        limit=10,
+    )
+    assert page.items == []
+
+
+@pytest.mark.asyncio
+async def test_find_by_label() -> None:
+    storage = MemoryStorage(labels=[TodoLabel(id=1, name="Lorem"), TodoLabel(id=2, name="Ipsum")])
+    mapper = MemoryTodoEntryMapper(storage=storage)
+    identifiers = await mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime(2022, 9, 5, minute=index % 3))
+        for index in range(5)
+    ])
+    await mapper.update_many(identifiers=identifiers, fields={"label_id": 1})
+    await mapper.update(identifier=identifiers[0], fields={"label_id": 2})
+
+    page = await mapper.find(filters=TodoEntryFilter(label_id=1), after=None, limit=2)
+    assert [entity.id for entity in page.items] == [4, 2]
+
+    page = await mapper.find(filters=TodoEntryFilter(label_id=1), after=page.next_cursor, limit=2)
+    assert [entity.id for entity in page.items] == [5, 3]
+    assert page.items[0].label == TodoLabel(id=1, name="Lorem")
+    assert page.next_cursor is None
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(label_id=2, created_before=datetime(2022, 9, 5, minute=1)),
+        after=None,
+        limit=10,
+    )
+    assert [entity.id for entity in page.items] == [1]
+
+    with pytest.raises(RelatedEntityNotFoundMapperError):
+        await mapper.update_many(identifiers=identifiers, fields={"label_id": 42})
+
+
+@pytest.mark.asyncio
+async def test_update() -> None:
+    storage = MemoryStorage(labels=[TodoLabel(id=1, name="Lorem")])
+    mapper = MemoryTodoEntryMapper(storage=storage)
+    created = await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+
+    entity = await mapper.update(identifier=created.id, fields={"label_id": 1})
+    assert entity.label == TodoLabel(id=1, name="Lorem")
+    assert await mapper.update(identifier=created.id, fields={"label_id": 1}) == entity
+
+    with pytest.raises(RelatedEntityNotFoundMapperError):
+        await mapper.update(identifier=created.id, fields={"label_id": 42})
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await mapper.update(identifier=42, fields={"label_id": 1})
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_todo_label() -> None:
+    mapper = MemoryTodoLabelMapper(storage=MemoryStorage(labels=[TodoLabel(id=3, name="Lorem")]))
+
+    assert (await mapper.get_or_create(value_object=TodoLabel(name="Lorem"))).id == 3
+    assert (await mapper.get_or_create(value_object=TodoLabel(name="Ipsum"))).id == 4
+    identifiers = await mapper.get_or_create_many(
+        value_objects=[TodoLabel(name=name) for name in ["Dolor", "Lorem", "Dolor"]],
+    )
+    assert identifiers == [5, 3, 5]
+
+    with pytest.raises(CreateMapperError):
+        await mapper.create(value_object=TodoLabel(name="Ipsum"))
+
+
+
+@pytest.mark.asyncio
+async def test_create_many_is_atomic() -> None:
+    storage = MemoryStorage(labels=[TodoLabel(id=1, name="Lorem")])
+    entry_mapper = MemoryTodoEntryMapper(storage=storage)
+    label_mapper = MemoryTodoLabelMapper(storage=storage)
+
+    with pytest.raises(CreateMapperError):
+        await label_mapper.create_many(value_objects=[TodoLabel(name="Ipsum"), TodoLabel(name="Lorem")])
+    with pytest.raises(CreateMapperError):
+        await label_mapper.create_many(value_objects=[TodoLabel(name="Dolor"), TodoLabel(name="Dolor")])
+    assert storage.label_ids_by_name == {"Lorem": 1}
+
+    with pytest.raises(CreateMapperError):
+        await entry_mapper.create_many(entities=[
+            TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+            TodoEntry.construct(summary="Lorem Ipsum", created_at=None),
+        ])
+    assert storage.entries == {}
+
+    assert await label_mapper.create_many(value_objects=[TodoLabel(name="Ipsum")]) == [2]
+    assert await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    ]) == [1]
+
+@pytest.mark.asyncio
+async def test_search_todo_entries() -> None:
+    mapper = MemoryTodoEntryMapper(storage=MemoryStorage())
+    identifiers = await mapper.create_many(entities=[
+        TodoEntry(summary=summary, detail=detail, created_at=datetime.now(tz=timezone.utc))
+        for summary, detail in [
+            ("Buy milk", None),
+            ("Call mom", "Ask about milk"),
+            ("Milk run", "milk, MILK and bread"),
+            ("Read a book", None),
+        ]
+    ])
+
+    page = await mapper.search(query="milk", offset=0, limit=2)
+    assert [entity.id for entity in page.items] == [identifiers[2], identifiers[0]]
+    assert page.next_offset == 2
+
+    page = await mapper.search(query="milk bread", offset=0, limit=2)
+    assert [entity.id for entity in page.items] == [identifiers[2]]
+    assert page.next_offset is None
@@ -0,0 +1,396 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+import pytest
+from sqlalchemy import create_engine, event, insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from entities import TodoEntry
+from persistence.cache import LabelCache
+from persistence.database import Base
+from persistence.executor import SessionExecutor
+from persistence.mapper.errors import (
+    CreateMapperError,
+    EntityNotFoundMapperError,
+    RelatedEntityNotFoundMapperError,
+)
+from persistence.mapper.sqlite import (
+    SqliteTodoEntryMapper,
+    SqliteTodoLabelMapper,
+)
+from persistence.mapper.statements import INSERT_CHUNK_SIZE
+from persistence.models import TodoEntryModel, TodoLabelModel
+from value_objects import TodoEntryFilter, TodoLabel
+
+
+@pytest.fixture
+def storage() -> sessionmaker:
+    engine = create_engine(
+        "sqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    Base.metadata.create_all(engine)
+
+    yield sessionmaker(bind=engine)
+
+    engine.dispose()
+
+
+def _record_statements(engine: Engine) -> List[str]:
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda connection, cursor, statement, *args: statements.append(statement),
+    )
+    return statements
+
+
+@pytest.fixture
+def executor() -> SessionExecutor:
+    executor = SessionExecutor(max_workers=1)
+
+    yield executor
+
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_create_and_get_todo_entry(storage: sessionmaker) -> None:
+    mapper = SqliteTodoEntryMapper(storage=storage)
+
+    created = await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+    entity = await mapper.get(identifier=created.id)
+
+    assert entity.id == created.id
+    assert entity.label is None
+
+
+@pytest.mark.asyncio
+async def test_update_errors(storage: sessionmaker) -> None:
+    mapper = SqliteTodoEntryMapper(storage=storage)
+    created = await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await mapper.update(identifier=42, fields={"label_id": 1})
+
+    with pytest.raises(RelatedEntityNotFoundMapperError):
+        await mapper.update(identifier=created.id, fields={"label_id": 42})
+
+    entity = await mapper.get(identifier=created.id)
+    assert entity.label is None
+    assert entity.updated_at is None
+
+
+@pytest.mark.asyncio
+async def test_executor_mode(storage: sessionmaker, executor: SessionExecutor) -> None:
+    entry_mapper = SqliteTodoEntryMapper(storage=storage, executor=executor)
+    label_mapper = SqliteTodoLabelMapper(storage=storage, executor=executor)
+
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    entities = await asyncio.gather(*[
+        entry_mapper.create(
+            entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+        )
+        for _ in range(3)
+    ])
+    entity = await entry_mapper.update(
+        identifier=entities[0].id,
+        fields={"label_id": label.id},
+    )
+    assert entity.label == label
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await entry_mapper.get(identifier=42)
+
+    stats = executor.stats
+    assert stats["SqliteTodoEntryMapper.create"].calls == 3
+    assert stats["SqliteTodoEntryMapper.create"].queue_depth == 0
+    assert stats["SqliteTodoEntryMapper.update"].calls == 1
+    assert stats["SqliteTodoEntryMapper.get"].errors == 1
+    assert stats["SqliteTodoLabelMapper.create"].run_time > 0
+
+
+@pytest.mark.asyncio
+async def test_create_many_todo_entries(storage: sessionmaker) -> None:
+    mapper = SqliteTodoEntryMapper(storage=storage)
+    await mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+
+    identifiers = await mapper.create_many(entities=[
+        TodoEntry(summary=f"Lorem Ipsum {index}", created_at=datetime.now(tz=timezone.utc))
+        for index in range(INSERT_CHUNK_SIZE + 10)
+    ])
+
+    assert identifiers == list(range(2, INSERT_CHUNK_SIZE + 12))
+    assert (await mapper.get(identifier=identifiers[-1])).summary == f"Lorem Ipsum {INSERT_CHUNK_SIZE + 9}"
+
+
+@pytest.mark.asyncio
+async def test_create_many_after_largest_rowid(storage: sessionmaker) -> None:
+    entry_mapper = SqliteTodoEntryMapper(storage=storage)
+    label_mapper = SqliteTodoLabelMapper(storage=storage)
+    with storage() as session:
+        session.execute(insert(TodoEntryModel).values(
+            id=2 ** 63 - 1, summary="Lorem Ipsum", created_at=datetime.utcnow(),
+        ))
+        session.execute(insert(TodoLabelModel).values(id=2 ** 63 - 1, name="Lorem"))
+        session.commit()
+
+    # SQLite picks unused rowids at random, their order is unknown
+    with pytest.raises(CreateMapperError):
+        await entry_mapper.create_many(entities=[
+            TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+            for _ in range(3)
+        ])
+
+    names = ["Ipsum", "Dolor", "Sit"]
+    identifiers = await label_mapper.create_many(value_objects=[TodoLabel(name=name) for name in names])
+    assert [(await label_mapper.get_or_create(value_object=TodoLabel(name=name))).id for name in names] == identifiers
+
+
+@pytest.mark.asyncio
+async def test_update_many_todo_entries(storage: sessionmaker) -> None:
+    entry_mapper = SqliteTodoEntryMapper(storage=storage)
+    label_mapper = SqliteTodoLabelMapper(storage=storage)
+
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(3)
+    ])
+
+    updated = await entry_mapper.update_many(
+        identifiers=[identifiers[0], identifiers[2], 42],
+        fields={"label_id": label.id},
+    )
+
+    assert updated == [identifiers[0], identifiers[2]]
+    assert (await entry_mapper.get(identifier=identifiers[0])).label == label
+    assert (await entry_mapper.get(identifier=identifiers[1])).label is None
+
+    with pytest.raises(RelatedEntityNotFoundMapperError):
+        await entry_mapper.update_many(identifiers=identifiers, fields={"label_id": 42})
+
+
+@pytest.mark.asyncio
+async def test_created_at_with_offset(storage: sessionmaker) -> None:
+    mapper = SqliteTodoEntryMapper(storage=storage)
+    created_at = datetime(2022, 9, 27, 17, 29, 6, tzinfo=timezone(timedelta(hours=2)))
+
+    created = await mapper.create(entity=TodoEntry(summary="Lorem Ipsum", created_at=created_at))
+    identifiers = await mapper.create_many(entities=[TodoEntry(summary="Lorem Ipsum", created_at=created_at)])
+
+    assert created.created_at == datetime(2022, 9, 27, 15, 29, 6)
+    assert (await mapper.get(identifier=identifiers[0])).created_at == datetime(2022, 9, 27, 15, 29, 6)
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(created_after=datetime(2022, 9, 27, 15, 29, tzinfo=timezone.utc)),
+        after=None,
+        limit=10,
+    )
+    assert [entity.id for entity in page.items] == [created.id, identifiers[0]]
+
+    page = await mapper.find(
+        filters=TodoEntryFilter(created_after=datetime(2022, 9, 27, 17, 30, tzinfo=timezone(timedelta(hours=2)))),
+        after=None,
+        limit=10,
+    )
+    assert page.items == []
+
+
+@pytest.mark.asyncio
+async def test_find_todo_entries(storage: sessionmaker) -> None:
+    entry_mapper = SqliteTodoEntryMapper(storage=storage)
+    label_mapper = SqliteTodoLabelMapper(storage=storage)
+
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime(2022, 9, 5, minute=index % 3))
+        for index in range(5)
+    ])
+    await entry_mapper.update_many(identifiers=identifiers[:2], fields={"label_id": label.id})
+
+    found, after = [], None
+    while True:
+        page = await entry_mapper.find(filters=TodoEntryFilter(), after=after, limit=2)
+        found.extend(entity.id for entity in page.items)
+        after = page.next_cursor
+        if after is None:
+            break
+
+    assert found == [1, 4, 2, 5, 3]
+
+    page = await entry_mapper.find(
+        filters=TodoEntryFilter(
+            label_id=label.id,
+            created_after=datetime(2022, 9, 5, minute=1),
+        ),
+        after=None,
+        limit=10,
+    )
+    assert [entity.id for entity in page.items] == [2]
+    assert page.items[0].label == label
+    assert page.next_cursor is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("label_loading", ["joined", "selectin"])
+async def test_statements_per_operation(storage: sessionmaker, label_loading: str) -> None:
+    entry_mapper = SqliteTodoEntryMapper(
+        storage=storage,
+        label_loading=label_loading,
+        batch_label_loading=label_loading,
+    )
+    label_mapper = SqliteTodoLabelMapper(storage=storage)
+    label = await label_mapper.create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(10)
+    ])
+    await entry_mapper.update_many(identifiers=identifiers, fields={"label_id": label.id})
+    statements = _record_statements(storage.kw["bind"])
+    single_selects = 1 if label_loading == "joined" else 2
+
+    statements.clear()
+    assert (await entry_mapper.get(identifier=identifiers[0])).label == label
+    assert len(statements) == single_selects
+
+    statements.clear()
+    page = await entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=10)
+    assert all(entity.label == label for entity in page.items)
+    assert len(statements) == single_selects
+
+    other_label = await label_mapper.create(value_object=TodoLabel(name="Dolor"))
+    statements.clear()
+    entity = await entry_mapper.update(identifier=identifiers[1], fields={"label_id": other_label.id})
+    assert entity.label == other_label
+    # UPDATE ... RETURNING the entry with its label
+    assert len(statements) == 1
+
+    statements.clear()
+    entity = await entry_mapper.update(identifier=identifiers[1], fields={"label_id": other_label.id})
+    assert entity.label == other_label
+    # UPDATE matching nothing, the entry with its label, no commit
+    assert len(statements) == 2
+
+    statements.clear()
+    await entry_mapper.create(
+        entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+    )
+    await label_mapper.create(value_object=TodoLabel(name="Ipsum"))
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_todo_label(storage: sessionmaker) -> None:
+    mapper = SqliteTodoLabelMapper(storage=storage)
+
+    created = await mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+    existing = await mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+
+    assert existing == created
+    ipsum = await mapper.get_or_create(value_object=TodoLabel(name="Ipsum"))
+    assert ipsum.id != created.id
+
+    identifiers = await mapper.get_or_create_many(
+        value_objects=[TodoLabel(name=name) for name in ["Dolor", "Lorem", "Dolor", "Ipsum"]],
+    )
+    assert identifiers[1:] == [created.id, identifiers[0], ipsum.id]
+    assert identifiers[0] not in (created.id, ipsum.id)
+
+    with pytest.raises(CreateMapperError):
+        await mapper.create(value_object=TodoLabel(name="Lorem"))
+
+
+@pytest.mark.asyncio
+async def test_statements_with_label_cache(storage: sessionmaker) -> None:
+    label_cache = LabelCache()
+    entry_mapper = SqliteTodoEntryMapper(storage=storage, label_cache=label_cache)
+    label_mapper = SqliteTodoLabelMapper(storage=storage, label_cache=label_cache)
+    label = await label_mapper.get_or_create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await entry_mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(10)
+    ])
+    await entry_mapper.update_many(identifiers=identifiers, fields={"label_id": label.id})
+    statements = _record_statements(storage.kw["bind"])
+
+    statements.clear()
+    assert (await entry_mapper.get(identifier=identifiers[0])).label == label
+    page = await entry_mapper.find(filters=TodoEntryFilter(), after=None, limit=10)
+    assert all(entity.label == label for entity in page.items)
+    assert len(statements) == 2
+
+    statements.clear()
+    entity = await entry_mapper.update(identifier=identifiers[1], fields={"label_id": label.id})
+    assert entity.label == label
+    assert len(statements) == 2
+
+    statements.clear()
+    assert await label_mapper.get_or_create(value_object=TodoLabel(name="Lorem")) == label
+    assert statements == []
+
+
+@pytest.mark.asyncio
+async def test_search_todo_entries(storage: sessionmaker) -> None:
+    mapper = SqliteTodoEntryMapper(storage=storage)
+    identifiers = await mapper.create_many(entities=[
+        TodoEntry(summary=summary, detail=detail, created_at=datetime.now(tz=timezone.utc))
+        for summary, detail in [
+            ("Buy milk", None),
+            ("Call mom", "Ask about milk"),
+            ("Milk run", "milk, MILK and bread"),
+            ("Read a book", None),
+        ]
+    ])
+
+    page = await mapper.search(query="milk", offset=0, limit=2)
+    assert [entity.id for entity in page.items] == [identifiers[2], identifiers[0]]
+    assert page.next_offset == 2
+
+    page = await mapper.search(query="milk", offset=2, limit=2)
+    assert [entity.id for entity in page.items] == [identifiers[1]]
+    assert page.next_offset is None
+
+    assert [entity.id for entity in (await mapper.search(query="Milk bread", offset=0, limit=10)).items] == [identifiers[2]]
+    assert (await mapper.search(query='"mil* OR', offset=0, limit=10)).items == []
+
+
+@pytest.mark.asyncio
+async def test_core_read_path(storage: sessionmaker) -> None:
+    orm_mapper = SqliteTodoEntryMapper(storage=storage)
+    core_mapper = SqliteTodoEntryMapper(storage=storage, read_path="core")
+    label = await SqliteTodoLabelMapper(storage=storage).create(value_object=TodoLabel(name="Lorem"))
+    identifiers = await orm_mapper.create_many(entities=[
+        TodoEntry(summary=f"Lorem Ipsum {index}", created_at=datetime.now(tz=timezone.utc))
+        for index in range(5)
+    ])
+    await orm_mapper.update_many(identifiers=identifiers[:2], fields={"label_id": label.id})
+    statements = _record_statements(storage.kw["bind"])
+
+    entity = await core_mapper.get(identifier=identifiers[0])
+    assert len(statements) == 1
+    assert entity == await orm_mapper.get(identifier=identifiers[0])
+    assert await core_mapper.get(identifier=identifiers[3]) == await orm_mapper.get(identifier=identifiers[3])
+
+    statements.clear()
+    page = await core_mapper.find(filters=TodoEntryFilter(), after=None, limit=3)
+    assert len(statements) == 1
+    assert page == await orm_mapper.find(filters=TodoEntryFilter(), after=None, limit=3)
+    assert page.items[0].label == label
+
+    search_page = await core_mapper.search(query="lorem", offset=0, limit=3)
+    assert search_page == await orm_mapper.search(query="lorem", offset=0, limit=3)
+
+    with pytest.raises(EntityNotFoundMapperError):
+        await core_mapper.get(identifier=42)
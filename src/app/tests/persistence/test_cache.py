@@ -0,0 +1,114 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import pytest
+
+from entities import TodoEntry
+from persistence.cache import CachedTodoEntryMapper, LabelCache, LRUCache
+from persistence.mapper.memory import MemoryStorage, MemoryTodoEntryMapper
+from value_objects import TodoLabel
+
+
+class _Clock:
+    now: float = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_lru_eviction() -> None:
+    cache = LRUCache(max_size=2)
+    cache.set(1, "one")
+    cache.set(2, "two")
+    cache.get(1)
+    cache.set(3, "three")
+
+    assert cache.get(2) is None
+    assert cache.get(1) == "one"
+    assert cache.get(3) == "three"
+    assert cache.stats.evictions == 1
+    assert cache.stats.size == 2
+
+
+def test_ttl_expiration() -> None:
+    clock = _Clock()
+    cache = LRUCache(max_size=2, ttl=5, clock=clock)
+    cache.set(1, "one")
+
+    clock.now = 4
+    assert cache.get(1) == "one"
+
+    clock.now = 6
+    assert cache.get(1) is None
+
+    stats = cache.stats
+    assert (stats.hits, stats.misses, stats.expirations) == (1, 1, 1)
+
+
+def test_set_after_invalidation_is_ignored() -> None:
+    cache = LRUCache(max_size=2)
+
+    generation = cache.generation
+    cache.invalidate(1)
+    cache.set(1, "stale", generation=generation)
+
+    assert cache.get(1) is None
+
+
+def test_label_cache() -> None:
+    cache = LabelCache(max_size=1)
+    cache.add(TodoLabel(id=1, name="Lorem"))
+    cache.add(TodoLabel(id=2, name="Ipsum"))
+
+    assert cache.get(1) == TodoLabel(id=1, name="Lorem")
+    assert cache.get_by_name("Lorem") == TodoLabel(id=1, name="Lorem")
+    assert cache.get_by_name("Ipsum") is None
+    assert cache.missing([1, 2, None]) == {2}
+    assert cache.stats.size == 1
+
+
+def test_label_cache_from_threads() -> None:
+    cache = LabelCache(max_size=500)
+
+    def use(identifier: int) -> None:
+        cache.add(TodoLabel(id=identifier, name=f"Lorem {identifier}"))
+        cache.get(identifier)
+        cache.get_by_name(f"Lorem {identifier}")
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(use, range(1000)))
+
+    stats = cache.stats
+    assert stats.size == 500
+    assert stats.hits + stats.misses == 2000
+    assert stats.hits == 1000
+    for identifier in range(1000):
+        label = cache.get(identifier)
+        assert label is None or cache.get_by_name(label.name) == label
+
+
+@pytest.mark.asyncio
+async def test_cached_mapper_invalidation() -> None:
+    storage = MemoryStorage(
+        entries=[TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))],
+        labels=[TodoLabel(id=10_001, name="Lorem")],
+    )
+    cache = LRUCache(max_size=8)
+    response_cache = LRUCache(max_size=8)
+    response_cache.set(1, b"{}")
+    mapper = CachedTodoEntryMapper(
+        mapper=MemoryTodoEntryMapper(storage=storage),
+        cache=cache,
+        response_cache=response_cache,
+    )
+
+    await mapper.get(identifier=1)
+    await mapper.get(identifier=1)
+    assert (cache.stats.hits, cache.stats.misses) == (1, 1)
+
+    await mapper.update(identifier=1, fields={"label_id": 10_001})
+    assert cache.stats.size == 0
+    assert response_cache.get(1) is None
+
+    entity = await mapper.get(identifier=1)
+    assert entity.label.id == 10_001
@@ -0,0 +1,123 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import List
+
+import pytest
+from sqlalchemy import create_engine
+
+from entities import TodoEntry
+from persistence.database import Base, StorageSettings
+from persistence.group_commit import GroupCommit
+from persistence.mapper.errors import CreateMapperError
+from persistence.storage import Storage
+from value_objects import TodoLabel
+
+
+class _Committer:
+    def __init__(self) -> None:
+        self.batches = []
+        self.last_id = 0
+
+    async def commit_many(self, items: List[str]) -> List[int]:
+        self.batches.append(items)
+        if any(item == "invalid" for item in items):
+            raise CreateMapperError("Invalid item")
+
+        identifiers = list(range(self.last_id + 1, self.last_id + len(items) + 1))
+        self.last_id += len(items)
+        return identifiers
+
+
+@pytest.mark.asyncio
+async def test_concurrent_items_share_batch() -> None:
+    committer = _Committer()
+    group_commit = GroupCommit(commit_many=committer.commit_many, max_batch_size=3, max_wait=0.01)
+
+    identifiers = await asyncio.gather(*[group_commit.submit(f"item {index}") for index in range(5)])
+
+    assert identifiers == [1, 2, 3, 4, 5]
+    assert [len(batch) for batch in committer.batches] == [3, 2]
+    assert group_commit.stats.batches == 2
+    assert group_commit.stats.max_batch_size == 3
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_resolves_items_one_by_one() -> None:
+    committer = _Committer()
+    group_commit = GroupCommit(commit_many=committer.commit_many, max_batch_size=10, max_wait=0.01)
+
+    results = await asyncio.gather(
+        group_commit.submit("first"),
+        group_commit.submit("invalid"),
+        group_commit.submit("last"),
+        return_exceptions=True,
+    )
+
+    assert results[0] == 1
+    assert isinstance(results[1], CreateMapperError)
+    assert results[2] == 2
+    assert group_commit.stats.fallbacks == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mapper_mode", ["async", "thread_pool"])
+async def test_storage_group_commit(tmp_path: Path, mapper_mode: str) -> None:
+    settings = StorageSettings(
+        db_path=tmp_path / "db.sqlite3",
+        mapper_mode=mapper_mode,
+        group_commit_max_batch_size=50,
+    )
+    Base.metadata.create_all(create_engine(f"sqlite:///{settings.db_path}"))
+
+    storage = Storage(settings=settings)
+    try:
+        entities = await asyncio.gather(*[
+            storage.todo_entry_repository.create(
+                entity=TodoEntry(summary=f"Lorem Ipsum {index}", created_at=datetime.now(tz=timezone.utc)),
+            )
+            for index in range(20)
+        ])
+        label = await storage.todo_label_repository.create(value_object=TodoLabel(name="Lorem"))
+
+        assert [entity.id for entity in entities] == list(range(1, 21))
+        assert (await storage.todo_entry_repository.get(identifier=20)).summary == "Lorem Ipsum 19"
+        assert label.id == 1
+        assert storage.group_commits[0].stats.batches == 1
+
+        labels = await asyncio.gather(*[
+            storage.todo_label_repository.get_or_create(value_object=TodoLabel(name=name))
+            for name in ["Lorem", "Ipsum", "Dolor", "Ipsum"]
+        ])
+
+        assert [label.id for label in labels] == [1, 3, 2, 3]
+        assert [label.name for label in labels] == ["Lorem", "Ipsum", "Dolor", "Ipsum"]
+        assert storage.group_commits[2].stats.batches == 1
+    finally:
+        await storage.dispose()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mapper_mode", ["async", "thread_pool"])
+async def test_group_commit_create_matches_mapper(tmp_path: Path, mapper_mode: str) -> None:
+    created_at = datetime(2022, 9, 27, 17, 29, 6, tzinfo=timezone(timedelta(hours=2)))
+    entities = []
+    for batch_size in (0, 50):
+        settings = StorageSettings(
+            db_path=tmp_path / f"db{batch_size}.sqlite3",
+            mapper_mode=mapper_mode,
+            group_commit_max_batch_size=batch_size,
+        )
+        Base.metadata.create_all(create_engine(f"sqlite:///{settings.db_path}"))
+
+        storage = Storage(settings=settings)
+        try:
+            entities.append(await storage.todo_entry_repository.create(
+                entity=TodoEntry(summary="Lorem Ipsum", created_at=created_at, updated_at=created_at),
+            ))
+        finally:
+            await storage.dispose()
+
+    direct, grouped = entities
+    assert grouped == direct
+    assert grouped.created_at == datetime(2022, 9, 27, 15, 29, 6)
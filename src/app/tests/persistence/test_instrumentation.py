@@ -0,0 +1,32 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from entities import TodoEntry
+from metrics import Histogram
+from persistence.instrumentation import InstrumentedTodoEntryMapper
+from persistence.mapper.errors import EntityNotFoundMapperError
+from persistence.mapper.memory import MemoryStorage, MemoryTodoEntryMapper
+
+
+@pytest.mark.asyncio
+async def test_mapper_calls_are_observed() -> None:
+    histogram = Histogram(name="mapper_seconds", documentation="", label_names=("mapper", "method"))
+    mapper = InstrumentedTodoEntryMapper(
+        mapper=MemoryTodoEntryMapper(storage=MemoryStorage()),
+        histogram=histogram,
+    )
+
+    await mapper.create_many(entities=[
+        TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))
+        for _ in range(3)
+    ])
+    assert [len(rows) async for rows in mapper.export(chunk_size=2)] == [2, 1]
+    with pytest.raises(EntityNotFoundMapperError):
+        await mapper.get(identifier=42)
+
+    lines = list(histogram.render())
+    assert 'mapper_seconds_count{mapper="MemoryTodoEntryMapper",method="create_many"} 1' in lines
+    # two chunks and the end of the export
+    assert 'mapper_seconds_count{mapper="MemoryTodoEntryMapper",method="export"} 3' in lines
+    assert 'mapper_seconds_count{mapper="MemoryTodoEntryMapper",method="get"} 1' in lines
@@ -9,6 +9,7 @@ from persistence.errors import (
     UpdateError,
 )
 from persistence.mapper.memory import (
+    MemoryStorage,
     MemoryTodoEntryMapper,
     MemoryTodoLabelMapper,
 )
@@ -18,10 +19,10 @@ from persistence.repository import (
 )
 from value_objects import TodoLabel
 
-_memory_storage = {
-    1: TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
-    10_001: TodoLabel(id=10_001, name="Lorem"),
-}
+_memory_storage = MemoryStorage(
+    entries=[TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))],
+    labels=[TodoLabel(id=10_001, name="Lorem")],
+)
 
 
 @pytest.mark.asyncio
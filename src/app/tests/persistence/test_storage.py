@@ -0,0 +1,137 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+
+from entities import TodoEntry
+from persistence.database import Base, StorageSettings, check_sqlite_version
+from persistence.storage import Storage
+from value_objects import TodoLabel
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mapper_mode", ["async", "thread_pool"])
+async def test_storage_repositories(tmp_path: Path, mapper_mode: str) -> None:
+    settings = StorageSettings(
+        db_path=tmp_path / "db.sqlite3",
+        mapper_mode=mapper_mode,
+        pool_size=2,
+        max_overflow=0,
+        pool_pre_ping=True,
+    )
+    Base.metadata.create_all(create_engine(f"sqlite:///{settings.db_path}"))
+
+    storage = Storage(settings=settings)
+    try:
+        label = await storage.todo_label_repository.create(
+            value_object=TodoLabel(name="Lorem"),
+        )
+        entity = await storage.todo_entry_repository.create(
+            entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+        )
+        entity = await storage.todo_entry_repository.update(
+            identifier=entity.id,
+            fields={"label_id": label.id},
+        )
+
+        assert (await storage.todo_entry_repository.get(identifier=entity.id)).label == label
+        assert storage.engine.pool.size() == 2
+    finally:
+        await storage.dispose()
+
+
+def test_storage_settings_from_environment(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setenv("TODO_STORAGE_POOL_SIZE", "20")
+    monkeypatch.setenv("TODO_STORAGE_MAPPER_MODE", "thread_pool")
+
+    settings = StorageSettings()
+
+    assert settings.pool_size == 20
+    assert settings.mapper_mode == "thread_pool"
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mapper_mode", ["async", "thread_pool"])
+async def test_sqlite_profile(tmp_path: Path, mapper_mode: str) -> None:
+    settings = StorageSettings(
+        db_path=tmp_path / "db.sqlite3",
+        mapper_mode=mapper_mode,
+        sqlite_profile="fast",
+        sqlite_pragmas={"synchronous": "OFF"},
+    )
+
+    storage = Storage(settings=settings)
+    try:
+        if mapper_mode == "async":
+            async with storage.engine.connect() as connection:
+                journal_mode = (await connection.exec_driver_sql("PRAGMA journal_mode")).scalar()
+                synchronous = (await connection.exec_driver_sql("PRAGMA synchronous")).scalar()
+        else:
+            with storage.engine.connect() as connection:
+                journal_mode = connection.exec_driver_sql("PRAGMA journal_mode").scalar()
+                synchronous = connection.exec_driver_sql("PRAGMA synchronous").scalar()
+
+        assert journal_mode == "wal"
+        assert synchronous == 0
+    finally:
+        await storage.dispose()
+
+
+def test_unsupported_sqlite_pragma() -> None:
+    with pytest.raises(ValueError):
+        StorageSettings(sqlite_pragmas={"key": "secret"})
+
+    with pytest.raises(ValueError):
+        StorageSettings(sqlite_pragmas={"synchronous": "OFF; DROP TABLE todo_entries"})
+
+
+
+def test_label_loading_with_label_cache() -> None:
+    with pytest.raises(ValueError, match="label_loading"):
+        StorageSettings(label_loading="selectin")
+    with pytest.raises(ValueError, match="batch_label_loading"):
+        StorageSettings(batch_label_loading="joined")
+
+    settings = StorageSettings(label_loading="selectin", batch_label_loading="joined", label_cache=False)
+    assert (settings.label_loading, settings.batch_label_loading) == ("selectin", "joined")
+    assert StorageSettings().label_loading is None
+
+
+def test_check_sqlite_version() -> None:
+    check_sqlite_version(version_info=(3, 35, 0))
+
+    with pytest.raises(RuntimeError, match="SQLite 3.35.0 or newer is required, 3.34.1 is linked."):
+        check_sqlite_version(version_info=(3, 34, 1))
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mapper_mode", ["async", "thread_pool"])
+async def test_read_write_split(tmp_path: Path, mapper_mode: str) -> None:
+    settings = StorageSettings(
+        db_path=tmp_path / "db.sqlite3",
+        mapper_mode=mapper_mode,
+        read_write_split=True,
+        read_pool_size=4,
+    )
+    Base.metadata.create_all(create_engine(f"sqlite:///{settings.db_path}"))
+
+    storage = Storage(settings=settings)
+    try:
+        entity = await storage.todo_entry_repository.create(
+            entity=TodoEntry(summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
+        )
+
+        assert (await storage.todo_entry_repository.get(identifier=entity.id)).summary == "Lorem Ipsum"
+        assert storage.engine.pool.size() == 1
+        assert storage.read_engine.pool.size() == 4
+        with pytest.raises(OperationalError, match="readonly"):
+            if mapper_mode == "async":
+                async with storage.read_engine.begin() as connection:
+                    await connection.exec_driver_sql("DELETE FROM todo_entries")
+            else:
+                with storage.read_engine.begin() as connection:
+                    connection.exec_driver_sql("DELETE FROM todo_entries")
+    finally:
+        await storage.dispose()
@@ -0,0 +1,76 @@
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+
+from entities import TodoEntry
+from persistence.database import StorageSettings
+from persistence.errors import InvalidTenantError
+from persistence.tenants import TenantRegistry, upgrade_schema
+
+
+def test_upgrade_schema(tmp_path: Path) -> None:
+    db_path = tmp_path / "db.sqlite3"
+
+    assert upgrade_schema(db_path) is True
+    assert upgrade_schema(db_path) is False
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("mapper_mode", ["async", "thread_pool"])
+async def test_tenant_registry(tmp_path: Path, mapper_mode: str) -> None:
+    registry = TenantRegistry(settings=StorageSettings(
+        tenants_path=tmp_path,
+        mapper_mode=mapper_mode,
+        max_open_tenants=2,
+    ))
+    try:
+        for tenant in ["acme", "globex", "acme", "initech"]:
+            storage = await registry.get(tenant)
+            await storage.todo_entry_repository.create(
+                entity=TodoEntry(summary=f"Lorem {tenant}", created_at=datetime.now(tz=timezone.utc)),
+            )
+
+        storage = await registry.get("acme")
+        assert (await storage.todo_entry_repository.get(identifier=2)).summary == "Lorem acme"
+
+        assert list(registry.storages) == ["initech", "acme"]
+        stats = registry.stats
+        assert stats["acme"].acquisitions == 3
+        assert stats["acme"].opens == 1
+        assert stats["globex"].evictions == 1
+        assert stats["initech"].migrations == 1
+        assert (tmp_path / "globex.sqlite3").exists()
+
+        with pytest.raises(InvalidTenantError):
+            await registry.get("../acme")
+        with pytest.raises(InvalidTenantError):
+            await registry.get(None)
+    finally:
+        await registry.dispose()
+
+
+@pytest.mark.asyncio
+async def test_tenant_registry_leases(tmp_path: Path) -> None:
+    registry = TenantRegistry(settings=StorageSettings(tenants_path=tmp_path, max_open_tenants=1))
+    disposed = []
+    try:
+        async with registry.lease("acme") as storage:
+            dispose = storage.dispose
+
+            async def record_dispose() -> None:
+                disposed.append(storage)
+                await dispose()
+
+            storage.dispose = record_dispose
+            await registry.get("globex")
+
+            assert list(registry.storages) == ["globex"]
+            assert disposed == []
+            await storage.todo_entry_repository.create(
+                entity=TodoEntry(summary="Lorem acme", created_at=datetime.now(tz=timezone.utc)),
+            )
+
+        assert disposed == [storage]
+    finally:
+        await registry.dispose()
@@ -0,0 +1,50 @@
+import json
+from typing import AsyncIterator
+
+import pytest
+import pytest_asyncio
+from starlette.applications import Starlette
+
+from api import app as todo_app
+from benchmarks.asgi import lifespan, request
+
+
+@pytest_asyncio.fixture
+async def app(monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[Starlette]:
+    monkeypatch.setenv("TODO_STORAGE_MAPPER_MODE", "memory")
+    monkeypatch.delenv("TODO_STORAGE_TENANTS_PATH", raising=False)
+    async with lifespan(todo_app):
+        yield todo_app
+
+
+@pytest.mark.asyncio
+async def test_create_todo_entries_with_invalid_created_at(app: Starlette) -> None:
+    status, content = await request(app, "POST", "/todo/bulk/", body=[
+        {"summary": "Lorem Ipsum", "created_at": "2022-09-05T18:07:19.280040+00:00"},
+        {"summary": "Lorem Ipsum", "created_at": "not-a-date"},
+    ])
+
+    assert status == 422
+    errors = json.loads(content)
+    assert [error["path"] for error in errors] == ["1"]
+    assert errors[0]["type"] == "Validation error"
+
+    status, content = await request(app, "GET", "/todo/")
+    assert status == 200
+    assert json.loads(content)["items"] == []
+
+
+@pytest.mark.asyncio
+async def test_import_report_in_line_order(app: Starlette) -> None:
+    valid = json.dumps({"summary": "Lorem Ipsum", "created_at": "2022-09-05T18:07:19.280040+00:00"})
+    lines = [valid, '{"summary": "Lo"}', valid, "not json", valid, valid]
+
+    status, content = await request(
+        app, "POST", "/todo/import/", query="chunk_size=2", content="\n".join(lines).encode("utf-8"),
+    )
+
+    assert status == 200
+    report = [json.loads(line) for line in content.splitlines()]
+    assert [result.get("line") for result in report] == [1, 2, 3, 4, 5, 6, None]
+    assert ["id" in result for result in report[:-1]] == [True, False, True, False, True, True]
+    assert report[-1] == {"created": 4, "failed": 2}
@@ -0,0 +1,85 @@
+import pytest
+
+from metrics import Counters, Histogram, MetricsMiddleware, MetricsRegistry, timed
+
+
+def test_histogram_render() -> None:
+    registry = MetricsRegistry()
+    histogram = registry.histogram(
+        name="request_seconds",
+        documentation="Request time.",
+        label_names=("handler",),
+        buckets=(0.1, 1.0),
+    )
+    for value in (0.05, 0.1, 0.5, 2.0):
+        histogram.observe(value, "get_todo")
+
+    assert registry.render().decode("utf-8").splitlines() == [
+        "# HELP request_seconds Request time.",
+        "# TYPE request_seconds histogram",
+        'request_seconds_bucket{handler="get_todo",le="0.1"} 2',
+        'request_seconds_bucket{handler="get_todo",le="1.0"} 3',
+        'request_seconds_bucket{handler="get_todo",le="+Inf"} 4',
+        'request_seconds_sum{handler="get_todo"} 2.65',
+        'request_seconds_count{handler="get_todo"} 4',
+    ]
+
+
+def test_timed() -> None:
+    histogram = Histogram(name="encoding_seconds", documentation="", label_names=("body",))
+
+    @timed(histogram, "entity")
+    def encode() -> bytes:
+        return b"{}"
+
+    assert encode() == b"{}"
+    assert encode() == b"{}"
+    assert 'encoding_seconds_count{body="entity"} 2' in histogram.render()
+
+
+
+def test_counters_render() -> None:
+    registry = MetricsRegistry()
+    counts = {("globex",): 1, ("acme",): 3}
+    counters = registry.counters(
+        name="tenant_opens_total",
+        documentation="Tenant opens.",
+        label_names=("tenant",),
+        collect=lambda: counts,
+    )
+    assert isinstance(counters, Counters)
+
+    assert registry.render().decode("utf-8").splitlines() == [
+        "# HELP tenant_opens_total Tenant opens.",
+        "# TYPE tenant_opens_total counter",
+        'tenant_opens_total{tenant="acme"} 3.0',
+        'tenant_opens_total{tenant="globex"} 1.0',
+    ]
+
+    registry.unregister(counters)
+    assert registry.render() == b"\n"
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels() -> None:
+    histogram = Histogram(
+        name="request_seconds",
+        documentation="",
+        label_names=("handler", "method", "status"),
+    )
+
+    async def get_todo() -> None:
+        pass
+
+    async def app(scope: dict, receive, send) -> None:
+        scope["endpoint"] = get_todo
+        await send({"type": "http.response.start", "status": 404, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def send(message: dict) -> None:
+        pass
+
+    middleware = MetricsMiddleware(app, histogram=histogram)
+    await middleware({"type": "http", "method": "GET", "path": "/todo/1/"}, None, send)
+
+    assert 'request_seconds_count{handler="get_todo",method="GET",status="404"} 1' in histogram.render()
@@ -0,0 +1,76 @@
+import os
+from pathlib import Path
+from pstats import Stats
+
+import pytest
+
+from profiling import ProfilingMiddleware, ProfilingSettings, enforce_retention
+
+
+async def _app(scope: dict, receive, send) -> None:
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def _call(middleware: ProfilingMiddleware, headers: list) -> list:
+    messages = []
+
+    async def send(message: dict) -> None:
+        messages.append(message)
+
+    await middleware({"type": "http", "method": "GET", "path": "/", "headers": headers}, None, send)
+    return messages
+
+
+@pytest.mark.asyncio
+async def test_profile_triggered_by_header(tmp_path: Path) -> None:
+    settings = ProfilingSettings(enabled=True, directory=tmp_path, token="secret")
+    middleware = ProfilingMiddleware(_app, settings=settings)
+
+    await _call(middleware, headers=[(b"x-profile", b"wrong")])
+    assert list(tmp_path.iterdir()) == []
+
+    messages = await _call(middleware, headers=[
+        (b"x-profile", b"secret"),
+        (b"x-request-id", b"req-42"),
+    ])
+    profile_id = dict(messages[0]["headers"])[b"x-profile-id"].decode()
+    path = tmp_path / f"{profile_id}.prof"
+
+    assert profile_id.endswith("-req-42")
+    assert Stats(str(path)).total_calls > 0
+
+
+@pytest.mark.asyncio
+async def test_disabled_profiling(tmp_path: Path) -> None:
+    settings = ProfilingSettings(enabled=False, directory=tmp_path, sample_rate=1.0)
+    middleware = ProfilingMiddleware(_app, settings=settings)
+
+    messages = await _call(middleware, headers=[(b"x-profile", b"1")])
+
+    assert messages[0]["headers"] == []
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_sampled_profiling(tmp_path: Path) -> None:
+    settings = ProfilingSettings(enabled=True, directory=tmp_path, sample_rate=0.5)
+    samples = iter([0.7, 0.2])
+    middleware = ProfilingMiddleware(_app, settings=settings, random=lambda: next(samples))
+
+    await _call(middleware, headers=[])
+    await _call(middleware, headers=[])
+
+    assert len(list(tmp_path.glob("*.prof"))) == 1
+
+
+def test_retention(tmp_path: Path) -> None:
+    for index in range(5):
+        path = tmp_path / f"{index}.prof"
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (index, index))
+
+    removed = enforce_retention(directory=tmp_path, max_files=3, max_bytes=25)
+
+    assert [path.name for path in removed] == ["0.prof", "1.prof", "2.prof"]
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["3.prof", "4.prof"]
@@ -3,20 +3,25 @@ from datetime import datetime, timezone
 import pytest
 
 from entities import TodoEntry, TodoLabel
-from persistence.mapper.memory import MemoryTodoEntryMapper
+from persistence.mapper.memory import MemoryStorage, MemoryTodoEntryMapper
 from persistence.repository import TodoEntryRepository
+from value_objects import TodoEntryFilter
 from usecases import (
     get_todo_entry, 
+    list_todo_entries,
     update_todo_entry,
+    update_todo_entries,
+    InvalidReferenceError,
     NotFoundError, 
     create_todo_entry, 
+    create_todo_entries,
     UseCaseError,
 )
 
-_storage = {
-    1: TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc)),
-    10_001: TodoLabel(id=10_001, name="Lorem"),
-}
+_storage = MemoryStorage(
+    entries=[TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime.now(tz=timezone.utc))],
+    labels=[TodoLabel(id=10_001, name="Lorem")],
+)
 
 
 @pytest.mark.asyncio
@@ -75,6 +80,18 @@ async def test_update_todo_entry() -> None:
     assert isinstance(entity, TodoEntry)
 
 
+@pytest.mark.asyncio
+async def test_update_not_existing_todo_entry() -> None:
+    mapper = MemoryTodoEntryMapper(storage=_storage)
+    repository = TodoEntryRepository(mapper=mapper)
+
+    with pytest.raises(NotFoundError):
+        await update_todo_entry(identifier=42, fields={"label_id": 10_001}, repository=repository)
+
+    with pytest.raises(InvalidReferenceError):
+        await update_todo_entry(identifier=1, fields={"label_id": 42}, repository=repository)
+
+
 @pytest.mark.asyncio
 async def test_todo_entry_updating_error() -> None:
     mapper = MemoryTodoEntryMapper(storage=None)
@@ -88,3 +105,71 @@ async def test_todo_entry_updating_error() -> None:
             fields=fields,        
             repository=repository,
         )
+
+
+@pytest.mark.asyncio
+async def test_create_todo_entries() -> None:
+    mapper = MemoryTodoEntryMapper(storage=_storage)
+    repository = TodoEntryRepository(mapper=mapper)
+
+    data = [
+        TodoEntry(summary="Lorem ipsum", created_at=datetime.now(tz=timezone.utc)),
+        TodoEntry(summary="Dolor sit amet", created_at=datetime.now(tz=timezone.utc)),
+    ]
+    identifiers = await create_todo_entries(entities=data, repository=repository)
+
+    assert len(set(identifiers)) == 2
+
+
+@pytest.mark.asyncio
+async def test_update_todo_entries() -> None:
+    mapper = MemoryTodoEntryMapper(storage=_storage)
+    repository = TodoEntryRepository(mapper=mapper)
+
+    updated = await update_todo_entries(
+        identifiers=[1, 42],
+        fields={"label_id": 10_001},
+        repository=repository,
+    )
+
+    assert updated == [1]
+
+
+@pytest.mark.asyncio
+async def test_update_todo_entries_with_not_existing_label() -> None:
+    mapper = MemoryTodoEntryMapper(storage=_storage)
+    repository = TodoEntryRepository(mapper=mapper)
+
+    with pytest.raises(InvalidReferenceError):
+        await update_todo_entries(
+            identifiers=[1],
+            fields={"label_id": 42},
+            repository=repository,
+        )
+
+
+@pytest.mark.asyncio
+async def test_list_todo_entries() -> None:
+    mapper = MemoryTodoEntryMapper(storage=MemoryStorage(entries=[
+        TodoEntry(id=1, summary="Lorem Ipsum", created_at=datetime(2022, 9, 5, 18, 1)),
+        TodoEntry(id=2, summary="Lorem Ipsum", created_at=datetime(2022, 9, 5, 18, 0)),
+        TodoEntry(id=3, summary="Lorem Ipsum", created_at=datetime(2022, 9, 5, 18, 2)),
+    ]))
+    repository = TodoEntryRepository(mapper=mapper)
+
+    page = await list_todo_entries(
+        filters=TodoEntryFilter(created_before=datetime(2022, 9, 5, 18, 2)),
+        after=None,
+        limit=1,
+        repository=repository,
+    )
+    assert [entity.id for entity in page.items] == [2]
+
+    page = await list_todo_entries(
+        filters=TodoEntryFilter(created_before=datetime(2022, 9, 5, 18, 2)),
+        after=page.next_cursor,
+        limit=1,
+        repository=repository,
+    )
+    assert [entity.id for entity in page.items] == [1]
+    assert page.next_cursor is None
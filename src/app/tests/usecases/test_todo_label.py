@@ -1,7 +1,7 @@
 import pytest
 
 from entities import TodoLabel
-from persistence.mapper.memory import MemoryTodoLabelMapper
+from persistence.mapper.memory import MemoryStorage, MemoryTodoLabelMapper
 from persistence.repository import TodoLabelRepository
 from usecases import (
     create_todo_label, 
@@ -11,7 +11,7 @@ from usecases import (
 
 @pytest.mark.asyncio
 async def test_create_todo_entry() -> None:
-    mapper = MemoryTodoLabelMapper(storage={})
+    mapper = MemoryTodoLabelMapper(storage=MemoryStorage())
     repository = TodoLabelRepository(mapper=mapper)
 
     data = TodoLabel(name="Lorem Ipsum")
@@ -28,3 +28,14 @@ async def test_todo_entry_creation_error() -> None:
     data = TodoLabel(name="Lorem Ipsum")
     with pytest.raises(UseCaseError):
         await create_todo_label(value_object=data, repository=repository)
+
+
+@pytest.mark.asyncio
+async def test_todo_label_is_interned() -> None:
+    mapper = MemoryTodoLabelMapper(storage=MemoryStorage())
+    repository = TodoLabelRepository(mapper=mapper)
+
+    first = await create_todo_label(value_object=TodoLabel(name="Lorem"), repository=repository)
+    second = await create_todo_label(value_object=TodoLabel(name="Lorem"), repository=repository)
+
+    assert first == second
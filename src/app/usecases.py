@@ -1,14 +1,17 @@
-from entities import TodoEntry
+from typing import AsyncIterator, List, Optional
+
+from entities import TodoEntry, TodoEntryPage, TodoEntrySearchPage
 from persistence.errors import (
     CreateError, 
     EntityNotFoundError,
+    RelatedEntityNotFoundError,
     UpdateError,
 )
 from persistence.repository import (
     TodoEntryRepository,
     TodoLabelRepository,
 )
-from value_objects import TodoLabel
+from value_objects import PageCursor, TodoEntryFilter, TodoLabel
 
 
 class UseCaseError(Exception):
@@ -19,6 +22,10 @@ class NotFoundError(UseCaseError):
     pass
 
 
+class InvalidReferenceError(UseCaseError):
+    pass
+
+
 async def get_todo_entry(identifier: int, repository: TodoEntryRepository) -> TodoEntry:
     try:
         return await repository.get(identifier=identifier)
@@ -26,6 +33,31 @@ async def get_todo_entry(identifier: int, repository: TodoEntryRepository) -> To
         raise NotFoundError(err)
 
 
+async def list_todo_entries(
+    filters: TodoEntryFilter,
+    after: Optional[PageCursor],
+    limit: int,
+    repository: TodoEntryRepository,
+) -> TodoEntryPage:
+    return await repository.find(filters=filters, after=after, limit=limit)
+
+
+async def search_todo_entries(
+    query: str,
+    offset: int,
+    limit: int,
+    repository: TodoEntryRepository,
+) -> TodoEntrySearchPage:
+    return await repository.search(query=query, offset=offset, limit=limit)
+
+
+def export_todo_entries(
+    chunk_size: int,
+    repository: TodoEntryRepository,
+) -> AsyncIterator[List[dict]]:
+    return repository.export(chunk_size=chunk_size)
+
+
 async def create_todo_entry(
     entity: TodoEntry, repository: TodoEntryRepository
 ) -> TodoEntry:
@@ -35,6 +67,15 @@ async def create_todo_entry(
         raise UseCaseError(error)
 
 
+async def create_todo_entries(
+    entities: List[TodoEntry], repository: TodoEntryRepository
+) -> List[int]:
+    try:
+        return await repository.create_many(entities=entities)
+    except CreateError as error:
+        raise UseCaseError(error)
+
+
 async def update_todo_entry(
     identifier: int,
     fields: dict,
@@ -45,6 +86,26 @@ async def update_todo_entry(
             identifier=identifier,
             fields=fields,
         )
+    except EntityNotFoundError as error:
+        raise NotFoundError(error)
+    except RelatedEntityNotFoundError as error:
+        raise InvalidReferenceError(error)
+    except UpdateError as error:
+        raise UseCaseError(error)
+
+
+async def update_todo_entries(
+    identifiers: List[int],
+    fields: dict,
+    repository: TodoEntryRepository,
+) -> List[int]:
+    try:
+        return await repository.update_many(
+            identifiers=identifiers,
+            fields=fields,
+        )
+    except RelatedEntityNotFoundError as error:
+        raise InvalidReferenceError(error)
     except UpdateError as error:
         raise UseCaseError(error)
 
@@ -52,8 +113,9 @@ async def update_todo_entry(
 async def create_todo_label(
     value_object: TodoLabel,
     repository: TodoLabelRepository,
-) -> TodoEntry:
+) -> TodoLabel:
+    """Labels are unique by name, the existing one is returned"""
     try:
-        return await repository.create(value_object=value_object)
+        return await repository.get_or_create(value_object=value_object)
     except CreateError as error:
         raise UseCaseError(error)
@@ -1,3 +1,4 @@
+from datetime import datetime
 from typing import Optional
 
 from pydantic import BaseModel
@@ -12,3 +13,16 @@ class TodoLabel(AbstractValueObject):
 
     class Config:
         orm_mode = True
+
+
+class PageCursor(BaseModel):
+    """Position of the last item of a page, in `(created_at, id)` order"""
+    created_at: datetime
+    id: int
+
+
+class TodoEntryFilter(BaseModel):
+    """`created_after` is inclusive, `created_before` is exclusive"""
+    label_id: Optional[int]
+    created_after: Optional[datetime]
+    created_before: Optional[datetime]